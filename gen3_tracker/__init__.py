@@ -163,7 +163,7 @@ class NaturalOrderGroup(click.Group):
                 # delegate to git
                 try:
                     from gen3_tracker.git import run_command
-                    result = run_command(f'git {" ".join(args)}', dry_run=False, no_capture=True)
+                    result = run_command(['git', *args], dry_run=False, no_capture=True)
                     sys.exit(result.return_code)
                     # os._exit(result.return_code)  # noqa
                 except subprocess.CalledProcessError as e2:
@@ -1,8 +1,8 @@
-import requests
 from gen3.auth import Gen3Auth
 from requests import HTTPError
 
 from gen3_tracker.config import ensure_auth, Config
+from gen3_tracker.gen3.session import curl, session
 
 
 def _ensure_auth(auth, config):
@@ -38,7 +38,7 @@ def get_requests(config: Config = None, auth: Gen3Auth = None, mine: bool = Fals
             parms.append("active")
         if len(parms) > 0:
             url = url + "?" + "&".join(parms)
-        return auth.curl(url).json()
+        return curl(auth, url).json()
     else:
         # returns a list of dicts
         # https://github.com/uc-cdis/requestor/blob/master/src/requestor/routes/query.py#L158
@@ -50,7 +50,7 @@ def get_requests(config: Config = None, auth: Gen3Auth = None, mine: bool = Fals
             parms.append("active")
         if len(parms) > 0:
             url = url + "?" + "&".join(parms)
-        return auth.curl(url).json()
+        return curl(auth, url).json()
 
 
 def get_request(config: Config = None, auth: Gen3Auth = None, request_id: str = None):
@@ -59,7 +59,7 @@ def get_request(config: Config = None, auth: Gen3Auth = None, request_id: str =
     auth = _ensure_auth(auth, config)
     # returns a dict
     # https://github.com/uc-cdis/requestor/blob/master/src/requestor/routes/query.py#L235
-    return auth.curl(f'/requestor/request/{request_id}').json()
+    return curl(auth, f'/requestor/request/{request_id}').json()
 
 
 def create_request(config: Config = None, auth: Gen3Auth = None, request: dict = None, revoke: bin = False):
@@ -72,7 +72,7 @@ def create_request(config: Config = None, auth: Gen3Auth = None, request: dict =
     if revoke:
         url = url + "?revoke"
 
-    response = requests.post(
+    response = session().post(
         url, json=request, auth=auth
     )
 
@@ -94,7 +94,7 @@ def update_request(config: Config = None, auth: Gen3Auth = None, request_id: str
     auth = _ensure_auth(auth, config)
     request = {'status': status}
 
-    response = requests.put(
+    response = session().put(
         auth.endpoint + "/" + f'requestor/request/{request_id}', json=request, auth=auth
     )
     response.raise_for_status()
@@ -7,6 +7,7 @@ from gen3_tracker import NaturalOrderGroup
 from gen3_tracker.collaborator.access.requestor import update
 from gen3_tracker.common import CLIOutput, assert_config, ERROR_COLOR, validate_email
 from gen3_tracker.config import Config, ensure_auth
+from gen3_tracker.gen3.session import curl
 
 
 @click.group(name='collaborator', cls=NaturalOrderGroup)
@@ -256,7 +257,7 @@ def add_steward(config: Config, resource_path: str, user_name: str, approve: boo
             with Halo(text='Adding', spinner='line', placement='right', color='white'):
                 auth = ensure_auth(config=config)
 
-                user = auth.curl('/user/user').json()
+                user = curl(auth, '/user/user').json()
                 is_privileged = False
                 for _ in user['authz']['/programs']:
                     if _['method'] == 'update' and _['service'] == 'requestor':
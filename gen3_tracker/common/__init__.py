@@ -47,6 +47,7 @@ SUCCESS_COLOR = 'green'
 
 PROJECT_DIR = '.g3t'
 PROJECT_DIRECTORIES = [PROJECT_DIR, 'META/', 'MANIFEST/', 'logs/']
+PROJECT_STATE_DIR = f'{PROJECT_DIR}/state'
 PROJECT_README = """
 # Data Directory
 
@@ -99,6 +100,18 @@ def print_formatted(config, output: Mapping) -> None:
         print(output)
 
 
+def state_dir() -> pathlib.Path | None:
+    """Return the local, un-tracked state directory, create it if needed. None if not in a project root."""
+    if not pathlib.Path(PROJECT_DIR).is_dir():
+        return None
+    path = pathlib.Path(PROJECT_STATE_DIR)
+    if not path.exists():
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / '.gitignore', 'w') as f:
+            f.write("*\n")
+    return path
+
+
 def read_ndjson_file(path: str) -> Iterator[dict]:
     """Read ndjson file, load json line by line."""
     with _file_opener(path) as jsonfile:
@@ -571,8 +584,11 @@ def assert_config(config: Config):
 
 def parse_iso_tz_date(date_str: str) -> str:
     """Parse an iso date string."""
-    # parse the string into a datetime object
-    date_obj = dateutil_parser.parse(date_str)
+    # parse the string into a datetime object, iso formats, e.g. the ones we write, do not need the much slower dateutil
+    try:
+        date_obj = datetime.fromisoformat(date_str)
+    except ValueError:
+        date_obj = dateutil_parser.parse(date_str)
     # if the date string doesn't have a timezone, you can add one
     if date_obj.tzinfo is None:
         date_obj = date_obj.replace(tzinfo=tzutc())
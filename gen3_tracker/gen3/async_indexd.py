@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import typing
+
+import aiohttp
+import orjson
+from gen3.auth import Gen3Auth
+from gen3.index import Gen3Index
+
+from gen3_tracker.gen3.indexd import RETRIES, RETRY_STATUS_CODES, indexd_record, retry_delay
+from gen3_tracker.git import DVC, LoggingWriter
+
+DEFAULT_CONCURRENCY = 64
+BULK_SIZE = 500
+"""dids per bulk/documents request."""
+
+
+class AsyncIndexd:
+    """indexd's create, get, delete, bulk and list calls over one aiohttp session, at most concurrency requests in flight.
+
+        async with AsyncIndexd(auth, concurrency=256) as client:
+            await asyncio.gather(*[client.create(_) for _ in records])
+
+    Requests are retried like the sync client's, see with_retries.
+    """
+
+    def __init__(self, auth: Gen3Auth = None, endpoint: str = None, concurrency: int = DEFAULT_CONCURRENCY, retries: int = RETRIES,
+                 logger: logging.Logger = None):
+        self.auth = auth
+        # the sdk's url conventions, e.g. no /index prefix for a local indexd
+        self.url = Gen3Index(endpoint=endpoint, auth_provider=auth).endpoint.rstrip('/')
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.logger = logger or logging.getLogger(__name__)
+        self.semaphore: asyncio.Semaphore = None
+        self.session: aiohttp.ClientSession = None
+
+    async def __aenter__(self) -> 'AsyncIndexd':
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=60),
+            json_serialize=lambda _: orjson.dumps(_).decode()
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.session.close()
+
+    async def request(self, method: str, path: str, json: typing.Any = None, params: list[tuple[str, str]] = None,
+                      conflict_on_retry_ok: bool = False) -> typing.Any:
+        """The json response, None for a 404, or for a 409 on a retry if conflict_on_retry_ok: an earlier attempt that landed.
+
+        429, 5xx and dropped connections are retried, see retry_delay, other errors raise aiohttp.ClientResponseError.
+        """
+        url = f"{self.url}/{path}"
+        for attempt in range(self.retries + 1):
+            headers = {'Authorization': self.auth._get_auth_value()} if self.auth else {}
+            retry_after = ''
+            try:
+                async with self.semaphore, self.session.request(method, url, json=json, params=params, headers=headers) as response:
+                    body = await response.read()
+                    if response.status == 404 or (response.status == 409 and attempt and conflict_on_retry_ok):
+                        return None
+                    if response.status < 400:
+                        return orjson.loads(body) if body else {}
+                    retry_after = response.headers.get('Retry-After', '')
+                    error = aiohttp.ClientResponseError(response.request_info, response.history, status=response.status,
+                                                        message=body.decode(errors='replace'), headers=response.headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+            if attempt == self.retries or (isinstance(error, aiohttp.ClientResponseError) and error.status not in RETRY_STATUS_CODES):
+                raise error
+            delay = retry_delay(attempt, retry_after)
+            self.logger.warning(f"{method} {path} failed: {error!r}, retry {attempt + 1} of {self.retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def create(self, record: dict) -> dict:
+        """Create a record, see indexd_record, return its did and rev."""
+        response = await self.request('POST', 'index/', json={'form': 'object', **record}, conflict_on_retry_ok=True)
+        return response or await self.get(record['did'])
+
+    async def get(self, did: str) -> typing.Optional[dict]:
+        """The record, None if there is none."""
+        return await self.request('GET', f'index/{did}')
+
+    async def delete(self, did: str) -> typing.Optional[dict]:
+        """Delete a record if it exists, return it."""
+        record = await self.get(did)
+        if record:
+            await self.request('DELETE', f'index/{did}', params=[('rev', record['rev'])])
+        return record
+
+    async def bulk(self, dids: list[str]) -> list[dict]:
+        """The records of dids that exist, BULK_SIZE dids per request, the requests in flight together."""
+        chunks = [dids[i:i + BULK_SIZE] for i in range(0, len(dids), BULK_SIZE)]
+        pages = await asyncio.gather(*[self.request('POST', 'bulk/documents', json=_) for _ in chunks])
+        return [record for page in pages for record in page or []]
+
+    async def list(self, params: dict = None, page_size: int = 100) -> typing.AsyncIterator[dict]:
+        """The records matching params, e.g. {'authz': ..., 'metadata': {...}}, a page at a time, see IndexClient.list_with_params."""
+        params = dict(params or {})
+        query = [('metadata', f'{k}:{v}') for k, v in params.pop('metadata', {}).items()]
+        query += [(k, str(v)) for k, v in params.items()]
+        start = None
+        while True:
+            page = await self.request('GET', 'index', params=query + [('limit', str(page_size))] + ([('start', start)] if start else []))
+            records = (page or {}).get('records', [])
+            for _ in records:
+                yield _
+            if len(records) < page_size:
+                return
+            start = records[-1]['did']
+
+
+async def ordered_gather(fn: typing.Callable[[typing.Any], typing.Awaitable], items: list, worker_count: int,
+                         on_result: typing.Callable[[typing.Any], None] = None) -> list:
+    """await fn of each item, worker_count at a time, return the results in the order of items.
+
+    on_result is called as each call completes, e.g. to update a progress bar. A failure cancels the calls in flight.
+    """
+    results = [None] * len(items)
+    indices = iter(range(len(items)))
+
+    async def _worker():
+        for i in indices:
+            results[i] = await fn(items[i])
+            if on_result:
+                on_result(results[i])
+
+    workers = [asyncio.create_task(_worker()) for _ in range(max(1, min(worker_count, len(items))))]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for _ in workers:
+            _.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+    return results
+
+
+def delete_records(auth: Gen3Auth, dids: list[str], concurrency: int = DEFAULT_CONCURRENCY, endpoint: str = None) -> list[typing.Optional[dict]]:
+    """Delete the records of dids from one thread with asyncio, concurrency requests in flight.
+    Returns the deleted records in the order of dids, None for the ones that did not exist."""
+    async def _delete():
+        async with AsyncIndexd(auth, endpoint=endpoint, concurrency=concurrency) as client:
+            return await ordered_gather(client.delete, dids, concurrency)
+
+    return asyncio.run(_delete())
+
+
+async def write_indexd_async(client: AsyncIndexd,
+                             project_id: str,
+                             dvc: DVC,
+                             bucket_name: str,
+                             overwrite: bool,
+                             restricted_project_id: str,
+                             existing_records: typing.Container[str] = (),
+                             message: str = None) -> bool:
+    """Write manifest entry to indexd, see write_indexd."""
+    record = indexd_record(dvc, project_id, bucket_name, restricted_project_id, message)
+
+    if overwrite and dvc.object_id in existing_records:
+        await client.delete(dvc.object_id)
+
+    try:
+        await client.create(record)
+    except aiohttp.ClientResponseError as e:
+        if e.status == 409:
+            logging.getLogger(__name__).error(
+                f"indexd record already exists, consider using --overwrite. {dvc.object_id} {e.message}")
+        raise e
+    return True
+
+
+class AsyncIndexdWriter(LoggingWriter):
+    """Submit records to the indexd service from one thread with asyncio, see IndexdWriter."""
+
+    def __init__(self, log_file, auth: Gen3Auth, project_id: str, bucket_name: str, overwrite: bool, restricted_project_id: str, existing_ids: list[str],
+                 concurrency: int = DEFAULT_CONCURRENCY, endpoint: str = None):
+        super().__init__(log_file)
+        self.auth = auth
+        self.project_id = project_id
+        self.bucket_name = bucket_name
+        self.overwrite = overwrite
+        self.restricted_project_id = restricted_project_id
+        self.existing_ids = set(existing_ids)
+        self.concurrency = concurrency
+        self.endpoint = endpoint
+
+    async def save(self, dvc: DVC, client: AsyncIndexd = None) -> str:
+        self.logger.debug(f'Saving {dvc}')
+        await write_indexd_async(
+            client=client,
+            dvc=dvc,
+            project_id=self.project_id,
+            bucket_name=self.bucket_name,
+            overwrite=self.overwrite,
+            restricted_project_id=self.restricted_project_id,
+            existing_records=self.existing_ids
+        )
+        return 'OK'
+
+    async def save_all(self, dvc_objects: list[DVC], on_saved: typing.Callable[[str], None] = None) -> list[str]:
+        """Save every object, concurrency requests in flight, results in the order of dvc_objects."""
+        async with AsyncIndexd(self.auth, endpoint=self.endpoint, concurrency=self.concurrency, logger=self.logger) as client:
+            return await ordered_gather(lambda _: self.save(_, client), dvc_objects, self.concurrency, on_saved)
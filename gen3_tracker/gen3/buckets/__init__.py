@@ -3,6 +3,7 @@ import logging
 from gen3.auth import Gen3Auth
 
 from gen3_tracker.config import ensure_auth, Config
+from gen3_tracker.gen3.session import curl
 
 
 def get_buckets(config: Config = None, auth: Gen3Auth = None) -> dict:
@@ -11,7 +12,7 @@ def get_buckets(config: Config = None, auth: Gen3Auth = None) -> dict:
         assert config
         auth = ensure_auth(config=config)
 
-    response = auth.curl('/user/data/buckets')
+    response = curl(auth, '/user/data/buckets')
 
     # TODO - remove when no longer needed
     if response.status_code == 405:
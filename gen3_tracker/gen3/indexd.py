@@ -1,45 +1,86 @@
 import logging
+import random
 import socket
+import time
+import typing
 from urllib.parse import urlparse
 
 import requests
 from gen3.auth import Gen3Auth
 from gen3.index import Gen3Index
 
+from gen3_tracker.common import ACCEPTABLE_HASHES
+from gen3_tracker.gen3.session import gen3_index
 from gen3_tracker.git import DVC, DVCMeta
 
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRIES = 5
+BACKOFF = 0.5
+MAX_BACKOFF = 30.0
 
-def write_indexd(auth: Gen3Auth,
-                 project_id: str,
-                 dvc: DVC,
-                 bucket_name: str,
-                 overwrite: bool,
-                 restricted_project_id: str,
-                 existing_records: list[str] = [],
-                 message: str = None) -> bool:
-    """Write manifest entry to indexd."""
-    assert auth, "Expected auth"
-    assert project_id, "Expected project_id"
-    index_client = Gen3Index(auth)
+
+def retryable(e: Exception) -> bool:
+    """True for errors worth retrying: throttling, server errors and dropped connections."""
+    if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+        return e.response.status_code in RETRY_STATUS_CODES
+    return isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def retry_delay(attempt: int, retry_after: str = '') -> float:
+    """Seconds to wait before retry attempt + 1: exponential backoff from BACKOFF seconds with jitter, at least a 429's Retry-After."""
+    delay = min(MAX_BACKOFF, BACKOFF * 2 ** attempt) * random.uniform(0.5, 1.0)
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, float(retry_after))
+    return delay
+
+
+def with_retries(fn: typing.Callable, *args, retries: int = RETRIES, logger: logging.Logger = None, **kwargs) -> typing.Any:
+    """Call fn, retrying retryable errors, see retry_delay."""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if attempt == retries or not retryable(e):
+                raise
+            delay = retry_delay(attempt, e.response.headers.get('Retry-After', '') if e.response is not None else '')
+            (logger or logging.getLogger(__name__)).warning(f"{getattr(fn, '__name__', fn)} failed: {e}, retry {attempt + 1} of {retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+
+def _delete_record(index_client: Gen3Index, did: str):
+    """Delete a record if it exists."""
+    record = index_client.client.get(did)
+    if record:
+        record.delete()
+
+
+def delete_indexd(index_client: Gen3Index, did: str, retries: int = RETRIES, retry_logger: logging.Logger = None):
+    """Delete a record if it exists, retrying retryable errors, see with_retries."""
+    with_retries(_delete_record, index_client, did, retries=retries, logger=retry_logger)
+
+
+def _create_record(index_client: Gen3Index, attempts: list, **kwargs) -> dict:
+    """Create a record, return its json. Called again by with_retries, a conflict means an earlier attempt created it
+    and its response was lost, e.g. the create's read of the new record failed."""
+    attempts.append(len(attempts))
+    try:
+        return index_client.client.create(**kwargs).to_json()
+    except requests.exceptions.HTTPError as e:
+        if len(attempts) > 1 and e.response is not None and e.response.status_code == 409:
+            return index_client.client.get(kwargs['did']).to_json()
+        raise
+
+
+def indexd_record(dvc: DVC, project_id: str, bucket_name: str, restricted_project_id: str, message: str = None) -> dict:
+    """The indexd record of a manifest entry, the arguments of IndexClient.create."""
     program, project = project_id.split('-')
-    logger = logging.getLogger(__name__)
     dvc.project_id = project_id
 
-    # SYNC
-    existing_record = None
     hashes, metadata = create_hashes_metadata(dvc, program, project)
 
     if message:
         metadata['message'] = message
 
-    if overwrite:
-        existing_record = dvc.object_id in existing_records
-        if existing_record:
-            # SYNC
-            # print(f"Deleting existing record {dvc.object_id}")
-            index_client.delete_record(guid=dvc.object_id)
-            existing_record = False
-
     authz = [f'/programs/{program}/projects/{project}']
     if restricted_project_id:
         _ = restricted_project_id.split('-')
@@ -52,34 +93,60 @@ def write_indexd(auth: Gen3Auth,
     if dvc.out.realpath:
         metadata['realpath'] = urlparse(dvc.out.realpath).path
 
-    if not existing_record:
-        try:
-            file_name = dvc.out.path
-            urls = [f"s3://{bucket_name}/{dvc.object_id}/{file_name}"]
-            if dvc.meta.no_bucket:
-                hostname = socket.gethostname()
-                _ = f"{hostname}/{metadata['realpath']}".replace('//', '/')
-                urls = [f"scp://{_}"]
-            if dvc.out.source_url:
-                urls = [dvc.out.source_url]
-
-            # print(f"Writing indexd record for {dvc.object_id} {urls}")
-            response = index_client.create_record(
-                did=dvc.object_id,
-                hashes=hashes,
-                size=dvc.out.size,
-                authz=authz,
-                file_name=file_name,
-                metadata=metadata,
-                urls=urls
-            )
-            assert response, "Expected response from indexd create_record"
-
-        except (requests.exceptions.HTTPError, AssertionError) as e:
-            if 'already exists' in str(e):
-                logger.error(
-                    f"indexd record already exists, consider using --overwrite. {dvc.object_id} {str(e)}")
-            raise e
+    file_name = dvc.out.path
+    urls = [f"s3://{bucket_name}/{dvc.object_id}/{file_name}"]
+    if dvc.meta.no_bucket:
+        hostname = socket.gethostname()
+        _ = f"{hostname}/{metadata['realpath']}".replace('//', '/')
+        urls = [f"scp://{_}"]
+    if dvc.out.source_url:
+        urls = [dvc.out.source_url]
+
+    return {
+        'did': dvc.object_id,
+        'hashes': hashes,
+        'size': dvc.out.size,
+        'authz': authz,
+        'file_name': file_name,
+        'metadata': metadata,
+        'urls': urls
+    }
+
+
+def write_indexd(auth: Gen3Auth,
+                 project_id: str,
+                 dvc: DVC,
+                 bucket_name: str,
+                 overwrite: bool,
+                 restricted_project_id: str,
+                 existing_records: list[str] = [],
+                 message: str = None,
+                 index_client: Gen3Index = None,
+                 retries: int = RETRIES,
+                 retry_logger: logging.Logger = None) -> bool:
+    """Write manifest entry to indexd.
+
+    Pass an index_client to share one between calls. Each request is retried on 429, 5xx and dropped connections, see with_retries,
+    the index client is called directly as the sdk's Gen3Index backoff also retries the errors that will not go away, e.g. a 401.
+    """
+    assert auth or index_client, "Expected auth"
+    assert project_id, "Expected project_id"
+    index_client = index_client or gen3_index(auth)
+    logger = logging.getLogger(__name__)
+    record = indexd_record(dvc, project_id, bucket_name, restricted_project_id, message)
+
+    if overwrite and dvc.object_id in existing_records:
+        with_retries(_delete_record, index_client, dvc.object_id, retries=retries, logger=retry_logger)
+
+    try:
+        response = with_retries(_create_record, index_client, [], retries=retries, logger=retry_logger, **record)
+        assert response, "Expected response from indexd create_record"
+
+    except (requests.exceptions.HTTPError, AssertionError) as e:
+        if 'already exists' in str(e):
+            logger.error(
+                f"indexd record already exists, consider using --overwrite. {dvc.object_id} {str(e)}")
+        raise e
     return True
 
 
@@ -90,6 +157,11 @@ def create_hashes_metadata(dvc: DVC, program, project):
         meta = DVCMeta()
 
     hashes = {dvc.out.hash: getattr(dvc.out, dvc.out.hash)}
+    # any additional digests calculated when the file was added
+    for hash_type in ACCEPTABLE_HASHES:
+        hash_value = getattr(dvc.out, hash_type, None)
+        if hash_value and hash_type not in hashes:
+            hashes[hash_type] = hash_value
     metadata = {
         **{
             'document_reference_id': dvc.object_id,
@@ -13,6 +13,7 @@ from gen3.jobs import Gen3Jobs
 from gen3_tracker import Config
 from gen3_tracker.common import Push, Commit
 from gen3_tracker.gen3.indexd import write_indexd
+from gen3_tracker.gen3.session import curl
 from gen3_tracker.git import calculate_hash, DVC, run_command, DVCMeta, DVCItem, modified_date
 
 
@@ -43,7 +44,7 @@ def cp(config: Config,
     metadata = dict({'submitter': None, 'metadata_version': '0.0.1', 'is_metadata': True} | metadata)
     if not metadata['submitter']:
         if not user:
-            user = auth.curl('/user/user').json()
+            user = curl(auth, '/user/user').json()
         metadata['submitter'] = user['name']
 
     program, project = project_id.split('-')
@@ -91,7 +92,7 @@ def cp(config: Config,
     # document = file_client.upload_file_to_guid(guid=id_, file_name=object_name, bucket=bucket_name)
     # print(document, file=sys.stderr)
 
-    run_command(f"gen3-client upload-single --bucket {bucket_name} --guid {my_dvc.object_id} --file {zipfile_path} --profile {config.gen3.profile}", no_capture=False)
+    run_command(['gen3-client', 'upload-single', '--bucket', bucket_name, '--guid', my_dvc.object_id, '--file', str(zipfile_path), '--profile', config.gen3.profile], no_capture=False)
 
     return {'msg': f"Uploaded {zipfile_path} to {bucket_name}", "object_id": my_dvc.object_id, "object_name": object_name}
 
@@ -103,7 +104,7 @@ def publish_commits(config: Config, wait: bool, auth: Gen3Auth, bucket_name: str
     #  meta information is already in git REPO,
     #  we should consider changing the fhir_import_export job to use the git REPO
 
-    user = auth.curl('/user/user').json()
+    user = curl(auth, '/user/user').json()
 
     # copy meta to bucket
     upload_result = cp(
@@ -0,0 +1,94 @@
+import os
+import threading
+
+import requests
+from gen3.auth import Gen3Auth
+from gen3.index import Gen3Index
+from indexclient.client import IndexClient, handle_error, retry_and_timeout_wrapper, timeout_wrapper
+from requests.adapters import HTTPAdapter
+
+POOL_SIZE_ENV = 'G3T_HTTP_POOL_SIZE'
+DEFAULT_POOL_SIZE = 32
+
+_session: requests.Session = None
+_pool_size = 0
+_lock = threading.Lock()
+
+
+def pool_size() -> int:
+    """Connections kept alive per host, `$G3T_HTTP_POOL_SIZE` or DEFAULT_POOL_SIZE."""
+    return int(os.environ.get(POOL_SIZE_ENV) or DEFAULT_POOL_SIZE)
+
+
+def session(min_pool_size: int = 0) -> requests.Session:
+    """The requests session shared by every gen3 client, so a push reuses a few keep-alive connections.
+
+    min_pool_size: grow the pool for that many concurrent requests, e.g. push's worker_count.
+    Responses are gzip compressed, see Accept-Encoding. The session is safe to share between threads.
+    """
+    global _session, _pool_size
+    with _lock:
+        size = max(min_pool_size, pool_size())
+        if _session is None:
+            _session = requests.Session()
+            _session.headers['Accept-Encoding'] = 'gzip, deflate'
+        if size > _pool_size:
+            replaced = _session.adapters.get('https://') if _pool_size else None
+            # pool_block: wait for a free connection rather than open and discard extra ones
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=size, pool_block=True)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+            _pool_size = size
+            if replaced:
+                # its idle connections, connections in use are closed when released
+                replaced.close()
+        return _session
+
+
+def close_session():
+    """Close the shared session's connections, the next call to session opens new ones."""
+    global _session, _pool_size
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session, _pool_size = None, 0
+
+
+def curl(auth: Gen3Auth, path: str, request: str = 'GET', json=None) -> requests.Response:
+    """Gen3Auth.curl over the shared session, e.g. curl(auth, '/user/user')."""
+    return session().request(request, auth.endpoint + "/" + path, json=json, auth=auth)
+
+
+class SessionIndexClient(IndexClient):
+    """An indexd client whose requests, including those of its Documents, go over the shared session."""
+
+    @retry_and_timeout_wrapper
+    def _get(self, *path, **kwargs):
+        resp = session().get(self.url_for(*path), **kwargs)
+        handle_error(resp)
+        return resp
+
+    @timeout_wrapper
+    def _post(self, *path, **kwargs):
+        resp = session().post(self.url_for(*path), **kwargs)
+        handle_error(resp)
+        return resp
+
+    @timeout_wrapper
+    def _put(self, *path, **kwargs):
+        resp = session().put(self.url_for(*path), **kwargs)
+        handle_error(resp)
+        return resp
+
+    @timeout_wrapper
+    def _delete(self, *path, **kwargs):
+        resp = session().delete(self.url_for(*path), **kwargs)
+        handle_error(resp)
+        return resp
+
+
+def gen3_index(auth: Gen3Auth = None, endpoint: str = None) -> Gen3Index:
+    """A Gen3Index that uses the shared session, for auth's commons or an endpoint."""
+    index = Gen3Index(endpoint=endpoint, auth_provider=auth)
+    index.client = SessionIndexClient(index.endpoint, auth=auth)
+    return index
@@ -1,3 +1,5 @@
+import collections
+import contextlib
 import json
 import logging
 import mimetypes
@@ -15,12 +17,16 @@ from typing import NamedTuple
 import inflection
 import pydantic
 import pytz
-import yaml
 from fhir.resources.attachment import Attachment
 from gen3.auth import Gen3Auth
 from pydantic import BaseModel, ConfigDict, field_validator
 
 from gen3_tracker.common import ACCEPTABLE_HASHES, parse_iso_tz_date, create_object_id
+from gen3_tracker.git import process
+from gen3_tracker.git.hasher import HashCache, DEFAULT_ETAG_PART_SIZE, Fingerprint, cache_hash_type, calculate_hashes, fingerprint, fingerprint_changed
+from gen3_tracker.git.process import command_text
+from gen3_tracker.git.serializer import dump_dvc, load_dvc, loads_dvc
+from gen3_tracker.git.tracker import TrackedFiles
 
 # constants ---------------------------------------------------------------------
 INIT_MESSAGE = 'Initializing a new repository...'
@@ -79,21 +85,37 @@ class DVCItem(BaseModel):
 
     object_id: typing.Optional[str] = None
 
+    fingerprint: typing.Optional[str] = None
+    """Large files added with --fingerprint: size, mtime and first/middle/last sample digest. The hash value is computed by push."""
+
     @pydantic.model_validator(mode="after")
     def check_hash_value(self):
         """Check that the hash value is valid."""
         hash_type = self.hash
         assert hash_type in ACCEPTABLE_HASHES, f'Invalid hash type {hash_type}'
         v = getattr(self, hash_type)
-        assert ACCEPTABLE_HASHES[hash_type](v), f'Invalid {hash_type} {v}'
+        if not (v is None and self.fingerprint):
+            assert ACCEPTABLE_HASHES[hash_type](v), f'Invalid {hash_type} {v}'
         self.modified = parse_iso_tz_date(self.modified)
         return self
 
+    @classmethod
+    def from_trusted(cls, data: dict) -> 'DVCItem':
+        """Construct without validation from data that already passed model_validate, only `modified` is canonicalized."""
+        item = cls.model_construct(**data)
+        item.modified = parse_iso_tz_date(item.modified)
+        return item
+
     @property
     def hash_value(self):
         """Get the hash value."""
         return getattr(self, self.hash)
 
+    @property
+    def hash_pending(self) -> bool:
+        """True if the file was fingerprinted and its hash not yet calculated."""
+        return self.hash_value is None and self.fingerprint is not None
+
     def set_object_id(self, project_id: str) -> str:
         """ create a unique did for this object within a project"""
         assert self.path, 'path is required'
@@ -135,6 +157,19 @@ class DVC(BaseModel):
             self.outs[0].set_object_id(self.project_id)
         return self
 
+    @classmethod
+    def from_trusted(cls, data: dict) -> 'DVC':
+        """Construct without validation from data that already passed model_validate, e.g. the content of the manifest cache.
+
+        For read only consumers, user input must be validated by model_validate.
+        The object_id is set lazily, by the object_id property.
+        """
+        data = dict(data)
+        data['outs'] = [DVCItem.from_trusted(_) for _ in data['outs']]
+        if data.get('meta') is not None:
+            data['meta'] = DVCMeta.model_construct(**data['meta'])
+        return cls.model_construct(**data)
+
     @property
     def out(self) -> DVCItem:
         """Convenience method to get the first out."""
@@ -224,25 +259,25 @@ class DVC(BaseModel):
         return dvc_object
 
 
-def run_command(command: str, dry_run: bool = False, raise_on_err: bool = True, env: dict = None, no_capture: bool = False) -> CommandResult:
-    """Run a shell command and return its output. Raise an exception if the command fails."""
+def run_command(command: typing.Union[str, list[str]], dry_run: bool = False, raise_on_err: bool = True, env: dict = None, no_capture: bool = False) -> CommandResult:
+    """Run a command and return its output. Raise an exception if the command fails.
+
+    Prefer an argv list; a string is split, and only run by a shell if it uses shell operators. Commands are timed in the command log, see process.
+    """
     _logger = logging.getLogger(__package__)
     if dry_run:
-        _logger.info(f'dry_run: {command}')
+        _logger.info(f'dry_run: {command_text(command)}')
         return CommandResult('', '', 0)
     else:
-        if no_capture:
-            process = subprocess.run(command, shell=True, env=env, check=True)
-            stdout = b''
-            stderr = b''
-        else:
-            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, env=env)
-            stdout, stderr = process.communicate()
-
-        if raise_on_err and process.returncode != 0:
-            raise Exception(f'Command `{command}` failed with error code {process.returncode}, stderr: {stderr.decode()}')
-        rc = CommandResult(stdout.decode(), stderr.decode(), process.returncode)
-        _logger.debug(f'Command `{command}` returned {rc}')
+        result = process.run(command, env=env, capture=not no_capture)
+        if no_capture and result.return_code != 0:
+            raise subprocess.CalledProcessError(result.return_code, command_text(command))
+        stdout = (result.stdout or b'').decode()
+        stderr = (result.stderr or b'').decode()
+        if raise_on_err and result.return_code != 0:
+            raise Exception(f'Command `{command_text(command)}` failed with error code {result.return_code}, stderr: {stderr}')
+        rc = CommandResult(stdout, stderr, result.return_code)
+        _logger.debug(f'Command `{command_text(command)}` returned {rc} in {result.elapsed:.3f}s')
         return rc
 
 
@@ -250,7 +285,7 @@ def run_command(command: str, dry_run: bool = False, raise_on_err: bool = True,
 def git_remote_exists(dry_run: bool = False) -> bool:
     """Check if git repo has a remote."""
 
-    stdout, stderr, return_code = run_command('git remote -v', dry_run=dry_run, raise_on_err=False)
+    stdout, stderr, return_code = run_command(['git', 'remote', '-v'], dry_run=dry_run, raise_on_err=False)
     if '' != stdout:
         print('git_remote_exists', f">{stdout}<")
         return True
@@ -260,7 +295,7 @@ def git_remote_exists(dry_run: bool = False) -> bool:
 def git_repository_exists(dry_run: bool = False) -> bool:
     """Check if git is already initialized"""
 
-    stdout, stderr, return_code = run_command('git status', dry_run=dry_run, raise_on_err=False)
+    stdout, stderr, return_code = run_command(['git', 'status'], dry_run=dry_run, raise_on_err=False)
     if return_code != 0:
         return False
     return True
@@ -268,7 +303,7 @@ def git_repository_exists(dry_run: bool = False) -> bool:
 
 def git_status() -> dict:
     """Get the status of the git repository"""
-    result = run_command('git status -s --branch')
+    result = run_command(['git', 'status', '-s', '--branch'])
     assert result.return_code == 0, result.stderr
     path_statuses = []
     for line in result.stdout.split('\n'):
@@ -286,34 +321,44 @@ def git_status() -> dict:
 
 def git_ls(dry_run: bool = False) -> list[dict]:
     """List the files in the git repository"""
-    results = run_command('git ls-files', dry_run=dry_run)
+    results = run_command(['git', 'ls-files'], dry_run=dry_run)
     return json.loads(results.stdout)
 
 
+def git_add(paths: typing.Iterable[typing.Union[str, pathlib.Path]], dry_run: bool = False) -> int:
+    """Stage paths with a single git call, streaming them on stdin so the argument list can not overflow ARG_MAX.
+
+    Files are passed to `git update-index`, which, unlike `git add --pathspec-from-file`, does not match every
+    path against every pathspec. Directories are expanded by `git add`.
+    Paths are literal (no glob expansion) and de-duplicated in order. Returns the number of paths passed to git.
+    """
+    _logger = logging.getLogger(__package__)
+    paths = list(dict.fromkeys(os.path.normpath(_) for _ in paths))
+    if not paths:
+        return 0
+    directories = [_ for _ in paths if os.path.isdir(_)]
+    files = [_ for _ in paths if _ not in directories] if directories else paths
+    commands = []
+    if files:
+        commands.append((['git', 'update-index', '--add', '--remove', '-z', '--stdin'], files))
+    if directories:
+        commands.append((['git', '--literal-pathspecs', 'add', '--pathspec-from-file=-', '--pathspec-file-nul'], directories))
+    for command, pathspecs in commands:
+        if dry_run:
+            _logger.info(f'dry_run: {" ".join(command)} ({len(pathspecs)} paths)')
+            continue
+        result = process.run(command, input='\0'.join(pathspecs).encode())
+        if result.return_code != 0:
+            raise Exception(f'Command `{" ".join(command)}` failed with error code {result.return_code}, stderr: {result.stderr.decode()}')
+        _logger.debug(f'Command `{" ".join(command)}` staged {len(pathspecs)} paths')
+    return len(paths)
+
+
 def git_files(dry_run=False) -> list[str]:
-    """List the files in the git repository"""
-    # """
-    # %h = abbreviated commit hash
-    # %x09 = tab (character for code 9)
-    # %an = author name
-    # %ad = author date (format respects --date= option)
-    # %s = subject
-    # """
-    # get all files in the repository
-    result = run_command('git log --pretty=format:"%h%x09%an%x09%ad%x09%s"  --date=iso-strict ', dry_run=dry_run, raise_on_err=False)
-    if result.return_code == 0:
-        git_logs = [_.split('\t') for _ in result.stdout.split('\n')]
-        git_logs = [{'hash': _[0], 'author': _[1], 'timestamp': _[2], 'subject': _[3]} for _ in git_logs]
-        for _ in git_logs:
-            # diff = run_command(f'git diff --name-only {_["hash"]}~1 {_["hash"]}', ctx.obj['DRY_RUN'])
-            files = run_command(f'git ls-tree --name-only -r {_["hash"]}', dry_run=dry_run)
-            _['files'] = [_ for _ in files.stdout.split('\n') if _ != '']
-        # de-duplicate the files
-        to_upload = set()
-        for _ in git_logs:
-            to_upload.update([_ for _ in _['files'] if _.startswith('MANIFEST')])
-        return list(to_upload)
-    return []
+    """List the committed files under MANIFEST, see TrackedFiles."""
+    if dry_run:
+        return []
+    return list(TrackedFiles.default().committed())
 
 
 # file helpers ------------------------------------------------------------------
@@ -323,24 +368,18 @@ def get_mime_type(file_name):
 
 
 def calculate_hash(hash_type, file_name):
-    """Calculate the MD5 hash of a file."""
-    assert hash_type == 'md5', f'Hash type {hash_type} is not supported (yet'
-    import hashlib
-    hash_md5 = hashlib.md5()
-    with open(file_name, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+    """Calculate the hash of a file."""
+    return calculate_hashes([hash_type], file_name)[hash_type]
 
 
 def git_archive(zip_name):
     """Archive the current branch and it's content to a zip file."""
-    result = run_command("git rev-parse --abbrev-ref HEAD", no_capture=False)
+    result = run_command(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], no_capture=False)
     assert result.return_code == 0, f"Could not get current branch {result.stderr}"
     branch = result.stdout.strip()
     assert branch, "Could not get current branch"
     # add all the content
-    run_command(f"git archive -o {zip_name} {branch}", no_capture=False)
+    run_command(['git', 'archive', '-o', str(zip_name), branch], no_capture=False)
     # add the .git folder
     with zipfile.ZipFile(zip_name, 'a') as zipf:  # 'a' for append mode
         for root, dirs, files in os.walk('.git'):
@@ -362,36 +401,125 @@ class ManifestChange(NamedTuple):
     dvc_path: pathlib.Path
 
 
-def data_file_changes(manifest_path, update: bool = False) -> list[ManifestChange]:
-    """Check for changes in the dvc files timestamps, return the data path and the dvc file"""
-    changes = []
-    for _ in manifest_path.rglob('*.dvc'):
-        dvc = to_dvc(_)
+DEFAULT_SCAN_WORKERS = 32
+"""Threads used to stat data files, metadata calls on NFS/Lustre are latency bound rather than cpu bound."""
+
+
+def _data_file_change(dvc_path: str, dvc_stat: os.stat_result, dvc: 'DVC') -> typing.Optional[tuple[pathlib.Path, str, os.stat_result, 'DVC']]:
+    """Stat the data file once, return (data path, dvc path, data stat, dvc) if it changed after its dvc file was written."""
+    if not dvc.out.realpath or dvc.out.source_url:
+        return None
+    data_path = pathlib.Path(dvc.out.realpath)
+    try:
+        data_stat = os.stat(data_path)
+    except FileNotFoundError:
+        # missing, or a dangling symlink
+        return None
+    if data_stat.st_mtime <= dvc_stat.st_mtime:
+        return None
+    if dvc.out.fingerprint and not fingerprint_changed(dvc.out.fingerprint, data_path, data_stat):
+        return None
+    return data_path, dvc_path, data_stat, dvc
+
+
+def data_file_changes(manifest_path, update: bool = False, worker_count: int = DEFAULT_SCAN_WORKERS,
+                      hash_worker_count: int = multiprocessing.cpu_count(),
+                      dvc_files: list[tuple[str, os.stat_result]] = None, etag_part_size: int = DEFAULT_ETAG_PART_SIZE) -> list[ManifestChange]:
+    """Check for changes in the dvc files timestamps, return the data path and the dvc file.
+    Each data file is stat'ed once, by a pool of worker_count threads. On update, changed files are re-hashed by hash_worker_count threads,
+    every digest they have, etags with etag_part_size parts.
+    Fingerprinted files are compared by fingerprint, on update their hash is deferred to push rather than re-calculated.
+    dvc_files: the (path, stat) of the .dvc files to check, if the caller already scanned them, defaults to all files in manifest_path."""
+    from concurrent.futures import ThreadPoolExecutor
+    from gen3_tracker.git.manifest_cache import scan_dvc_files
+
+    if dvc_files is None:
+        dvc_files = sorted(scan_dvc_files(str(manifest_path)))
+    dvc_objects = dvc_data([path for path, _ in dvc_files], [stat_result for _, stat_result in dvc_files])
+    with ThreadPoolExecutor(max_workers=max(1, worker_count)) as executor:
+        changed = [_ for _ in executor.map(lambda _: _data_file_change(*_), ((path, stat_result, dvc) for (path, stat_result), dvc in zip(dvc_files, dvc_objects))) if _]
+
+    if update and changed:
+        _update_dvc_files(changed, hash_worker_count, etag_part_size)
+
+    return [ManifestChange(data_path, pathlib.Path(dvc_path)) for data_path, dvc_path, _, _ in changed]
+
+
+def _update_dvc_files(changed: list[tuple[pathlib.Path, str, os.stat_result, 'DVC']], worker_count: int, etag_part_size: int = DEFAULT_ETAG_PART_SIZE):
+    """Record the new size, modified and hashes (or fingerprint) of changed data files, hashing them concurrently.
+    Every digest the dvc file already has is re-calculated, in a single read of each file."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    hash_cache = HashCache.default()
+    with hash_cache or contextlib.nullcontext():
+        hashes = {}
+        misses = []
+        for data_path, dvc_path, data_stat, dvc in changed:
+            if dvc.out.fingerprint:
+                continue
+            hash_types = [dvc.out.hash] + [_ for _ in ACCEPTABLE_HASHES if _ != dvc.out.hash and getattr(dvc.out, _, None)]
+            hashes[dvc_path] = {}
+            for hash_type in hash_types:
+                hash_value = hash_cache.get(data_stat, cache_hash_type(hash_type, etag_part_size)) if hash_cache else None
+                if hash_value:
+                    hashes[dvc_path][hash_type] = hash_value
+            missing = [_ for _ in hash_types if _ not in hashes[dvc_path]]
+            if missing:
+                misses.append((data_path, dvc_path, data_stat, missing))
+        with ThreadPoolExecutor(max_workers=max(1, worker_count)) as executor:
+            for (data_path, dvc_path, data_stat, missing), calculated in zip(misses, executor.map(lambda _: calculate_hashes(_[3], _[0], etag_part_size=etag_part_size), misses)):
+                hashes[dvc_path].update(calculated)
+                if hash_cache:
+                    for hash_type, hash_value in calculated.items():
+                        hash_cache.put(data_stat, cache_hash_type(hash_type, etag_part_size), hash_value, str(data_path))
+
+        for data_path, dvc_path, data_stat, dvc in changed:
+            yaml_data = load_dvc(dvc_path)
+            out = yaml_data['outs'][0]
+            out['size'] = data_stat.st_size
+            out['modified'] = datetime.fromtimestamp(data_stat.st_mtime, pytz.UTC).isoformat()
+            if dvc.out.fingerprint:
+                out['fingerprint'] = str(fingerprint(data_path, data_stat, sample_size=Fingerprint.parse(dvc.out.fingerprint).sample_size))
+                for hash_type in ACCEPTABLE_HASHES:
+                    if hash_type in out:
+                        out[hash_type] = None
+            else:
+                out.update(hashes[dvc_path])
+            yaml_data['outs'] = [out]
+            dump_dvc(yaml_data, dvc_path)
 
-        if not dvc.out.realpath or dvc.out.source_url:
-            continue
 
-        data_path = pathlib.Path(dvc.out.realpath)
+def complete_pending_hashes(dvc_objects: typing.Iterable['DVC'], worker_count: int = 1) -> list['DVC']:
+    """Calculate the deferred hashes of fingerprinted files, in place, return the completed dvc objects.
 
-        if not data_path.is_symlink() and not data_path.exists():
-            continue
+    Each file must still match its fingerprint. Hashes are read from, and saved to, the hash cache;
+    files are read concurrently by worker_count threads (hashlib releases the GIL).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    pending = [_ for _ in dvc_objects if _.out.hash_pending]
+    if not pending:
+        return []
+    hash_cache = HashCache.default()
+    with hash_cache or contextlib.nullcontext():
+        misses = []
+        for dvc in pending:
+            data_path = pathlib.Path(dvc.out.realpath)
+            stat_result = os.stat(data_path)
+            assert not fingerprint_changed(dvc.out.fingerprint, data_path, stat_result), f'{dvc.out.path} changed since it was added. See `g3t status`'
+            hash_value = hash_cache.get(stat_result, cache_hash_type(dvc.out.hash)) if hash_cache else None
+            if hash_value:
+                setattr(dvc.out, dvc.out.hash, hash_value)
+            else:
+                misses.append((dvc, stat_result))
 
-        if data_path.stat().st_mtime > _.stat().st_mtime:
-            if update:
-                with open(_, 'r') as f:
-                    yaml_data = yaml.safe_load(f)
-                    out = yaml_data['outs'][0]
-                    out['size'] = data_path.stat().st_size
-                    out['modified'] = datetime.fromtimestamp(data_path.stat().st_mtime, pytz.UTC).isoformat()
-                    out[out['hash']] = calculate_hash(out['hash'], data_path)
-                    yaml_data['outs'] = [out]
-                with open(_, 'w') as f:
-                    yaml.dump(yaml_data, f, default_flow_style=False)
-            #
-            # return the data path and the dvc file
-            #
-            changes.append(ManifestChange(data_path, _))
-    return changes
+        with ThreadPoolExecutor(max_workers=max(1, worker_count)) as executor:
+            hashes = executor.map(lambda _: calculate_hash(_[0].out.hash, _[0].out.realpath), misses)
+            for (dvc, stat_result), hash_value in zip(misses, hashes):
+                setattr(dvc.out, dvc.out.hash, hash_value)
+                if hash_cache:
+                    hash_cache.put(stat_result, cache_hash_type(dvc.out.hash), hash_value, dvc.out.realpath)
+    return pending
 
 
 # meta data helpers ------------------------------------------------------------
@@ -412,8 +540,7 @@ def update_meta(file_path, new_meta):
     }
 
     # Load existing data from the YAML file
-    with open(file_path, 'r') as f:
-        yaml_data = yaml.safe_load(f)
+    yaml_data = load_dvc(file_path)
 
     # Check if file attributes in the YAML data match the actual file attributes
     if yaml_data['outs'][0]['size'] == file_attributes['size'] and \
@@ -424,8 +551,7 @@ def update_meta(file_path, new_meta):
             yaml_data['meta'] = new_meta
 
             # Write the updated data back to the YAML file
-            with open(file_path, 'w') as f:
-                yaml.dump(yaml_data, f, default_flow_style=False)
+            dump_dvc(yaml_data, file_path)
             return True
 
     return False
@@ -433,18 +559,59 @@ def update_meta(file_path, new_meta):
 
 # gen3 helpers ------------------------------------------------------------------
 
-def dvc_data(committed_files) -> typing.Generator[DVC, None, None]:
-    """Get the dvc data from the committed files."""
-    for committed_file in committed_files:
-        if str(committed_file).endswith('.dvc'):
-            yield to_dvc(committed_file)
+def dvc_data(committed_files, stat_results: list[os.stat_result] = None) -> typing.Generator[DVC, None, None]:
+    """Get the dvc data from the committed files, via the manifest cache when in a project root.
+    stat_results: the files' stat, if the caller already has them."""
+    from gen3_tracker.git.manifest_cache import ManifestCache
+
+    committed_files = list(committed_files)
+    if stat_results is None:
+        stat_results = [None] * len(committed_files)
+    dvc_files = [(path, stat_result) for path, stat_result in zip(committed_files, stat_results) if str(path).endswith('.dvc')]
+    manifest_cache = ManifestCache.default()
+    if not manifest_cache:
+        for dvc_file, _ in dvc_files:
+            yield to_dvc(dvc_file)
+        return
+    with manifest_cache:
+        dvc_objects = list(manifest_cache.load([path for path, _ in dvc_files], [stat_result for _, stat_result in dvc_files]))
+    yield from dvc_objects
+
+
+def committed_objects() -> list[tuple[str, str]]:
+    """The (path, blob id) of the committed .dvc files."""
+    return [(path, oid) for path, oid in TrackedFiles.default().committed_objects() if path.endswith('.dvc')]
+
+
+def committed_content(objects: typing.Iterable[tuple[str, str]]) -> typing.Iterator[dict]:
+    """The validated content of committed (path, blob id)s, in order, read from git objects by a single `git cat-file --batch`,
+    independent of the working tree. Parsed content is cached by blob id in the manifest cache when in a project root."""
+    from gen3_tracker.git.manifest_cache import ManifestCache
+    from gen3_tracker.git.objects import GitObjectReader
+
+    objects = list(objects)
+    with GitObjectReader() as reader:
+        manifest_cache = ManifestCache.default()
+        if manifest_cache:
+            with manifest_cache:
+                yield from manifest_cache.committed_content(objects, reader)
+            return
+        for (path, oid), (_, content) in zip(objects, reader.read_many(oid for _, oid in objects)):
+            assert content is not None, f"Missing git object {oid} {path}"
+            yaml_data = loads_dvc(content)
+            DVC.model_validate(yaml_data)
+            yield yaml_data
+
+
+def committed_dvc_data() -> tuple[list[str], list[DVC]]:
+    """The committed .dvc files and their dvc data, as committed, see committed_content."""
+    objects = committed_objects()
+    return [path for path, _ in objects], [DVC.from_trusted(_) for _ in committed_content(objects)]
 
 
 def to_dvc(path) -> DVC:
     """Get the dvc data from a file."""
-    with open(path, 'r') as f:
-        _ = yaml.safe_load(f)
-        return DVC.model_validate(_)
+    return DVC.model_validate(load_dvc(path))
 
 
 class LoggingWriter:
@@ -486,14 +653,18 @@ class MockIndexdWriter(LoggingWriter):
 class IndexdWriter(LoggingWriter):
     """Submit a job to the indexd service, return response."""
 
-    def __init__(self, log_file, auth: Gen3Auth, project_id: str, bucket_name: str, overwrite: bool, restricted_project_id: str, existing_ids: list[str]):
+    def __init__(self, log_file, auth: Gen3Auth, project_id: str, bucket_name: str, overwrite: bool, restricted_project_id: str, existing_ids: list[str],
+                 index_client=None):
+        from gen3_tracker.gen3.session import gen3_index
         super().__init__(log_file)
         self.auth = auth
         self.project_id = project_id
         self.bucket_name = bucket_name
         self.overwrite = overwrite
         self.restricted_project_id = restricted_project_id
-        self.existing_ids = existing_ids
+        self.existing_ids = set(existing_ids)
+        # one client for every save, its connections are pooled, see session
+        self.index_client = index_client or gen3_index(auth)
 
     def save(self, dvc: DVC) -> str:
         from gen3_tracker.gen3.indexd import write_indexd
@@ -505,7 +676,9 @@ class IndexdWriter(LoggingWriter):
             bucket_name=self.bucket_name,
             overwrite=self.overwrite,
             restricted_project_id=self.restricted_project_id,
-            existing_records=self.existing_ids
+            existing_records=self.existing_ids,
+            index_client=self.index_client,
+            retry_logger=self.logger
         )
         return 'OK'
 
@@ -601,22 +774,48 @@ class Gen3ClientRemoteWriter(LoggingWriter):
         with open(self.manifest_file_path, 'w') as f:
             json.dump(self.manifest, f)
         if len(self.manifest) > 0:
-            cmd = f"gen3-client upload-multiple --manifest {self.manifest_file_path} --profile {profile} --upload-path {upload_path} --bucket {bucket_name} --numparallel {worker_count}"
-            print(cmd)
+            cmd = ['gen3-client', 'upload-multiple', '--manifest', str(self.manifest_file_path), '--profile', profile,
+                   '--upload-path', upload_path, '--bucket', bucket_name, '--numparallel', str(worker_count)]
+            print(command_text(cmd))
             run_command(cmd, dry_run=dry_run, raise_on_err=True, no_capture=True)
         else:
             print(f'No files to upload to {self.remote} by gen3-client.')
         return 'OK'
 
 
+def ordered_map(fn: typing.Callable, items: typing.Iterable, worker_count: int) -> typing.Generator[typing.Any, None, None]:
+    """fn of each item, called by worker_count threads, yielded in the order of items.
+
+    At most 2 * worker_count calls are in flight, so results are reported as they complete and a failure stops the rest.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    if worker_count <= 1:
+        yield from map(fn, items)
+        return
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=worker_count) as executor:
+        try:
+            for _ in items:
+                pending.append(executor.submit(fn, _))
+                if len(pending) >= 2 * worker_count:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for _ in pending:
+                _.cancel()
+
+
 def to_indexd(dvc_objects: list[DVC],
               auth: Gen3Auth,
               project_id: str,
               bucket_name: str,
               overwrite: bool,
-              restricted_project_id: str
+              restricted_project_id: str,
+              worker_count: int = 1,
+              index_client=None
               ) -> typing.Generator[typing.Any, None, None]:
-    """Upload committed files to indexd."""
+    """Upload committed files to indexd, worker_count requests at a time, results are yielded in the order of dvc_objects."""
     # indexd_writer = MockIndexdWriter
     # log_file = "logs/mock-indexd.log"
     indexd_writer = IndexdWriter
@@ -633,11 +832,42 @@ def to_indexd(dvc_objects: list[DVC],
                        bucket_name=bucket_name,
                        overwrite=overwrite,
                        existing_ids=existing_ids,
-                       restricted_project_id=restricted_project_id) as indexd:
-        for _ in dvc_objects:
-            # add to indexd
-            rc = indexd.save(_)
-            yield rc
+                       restricted_project_id=restricted_project_id,
+                       index_client=index_client) as indexd:
+        # add to indexd
+        yield from ordered_map(indexd.save, dvc_objects, worker_count)
+
+
+def to_indexd_async(dvc_objects: list[DVC],
+                    auth: Gen3Auth,
+                    project_id: str,
+                    bucket_name: str,
+                    overwrite: bool,
+                    restricted_project_id: str,
+                    concurrency: int = 64,
+                    endpoint: str = None,
+                    on_saved: typing.Callable[[str], None] = None
+                    ) -> list[str]:
+    """Upload committed files to indexd with asyncio, concurrency requests in flight from one thread, see to_indexd.
+    Returns the results in the order of dvc_objects, on_saved is called as each one completes."""
+    import asyncio
+    from gen3_tracker.gen3.async_indexd import AsyncIndexdWriter
+
+    existing_ids = []
+    for _ in dvc_objects:
+        _.project_id = project_id
+        existing_ids.append(_.object_id)
+
+    with AsyncIndexdWriter(auth=auth,
+                           log_file="logs/indexd.log",
+                           project_id=project_id,
+                           bucket_name=bucket_name,
+                           overwrite=overwrite,
+                           existing_ids=existing_ids,
+                           restricted_project_id=restricted_project_id,
+                           concurrency=concurrency,
+                           endpoint=endpoint) as indexd:
+        return asyncio.run(indexd.save_all(dvc_objects, on_saved))
 
 
 def to_remote(upload_method, dvc_objects, bucket_name, profile, dry_run, work_dir):
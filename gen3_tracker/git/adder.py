@@ -1,18 +1,29 @@
+import contextlib
+import copy
+import csv
+import functools
 import glob
+import itertools
+import multiprocessing
+import os
 import pathlib
 import sys
+import typing
 from datetime import datetime
 from urllib.parse import urlparse, ParseResult
 
 import click
 import dateutil
+import orjson
 import pytz
-import yaml
 from dateutil.tz import tzutc
 
 from gen3_tracker import Config
-from gen3_tracker.common import ACCEPTABLE_HASHES
+from gen3_tracker.common import ACCEPTABLE_HASHES, is_url
 from gen3_tracker.git import DVC
+from gen3_tracker.git.hasher import HashCache, DEFAULT_ETAG_PART_SIZE, Fingerprint, cache_hash_type, calculate_hashes, fingerprint
+from gen3_tracker.git.serializer import dump_dvc, load_dvc
+from gen3_tracker.git.walker import AddCheckpoint, WalkEntry, split_recursive_pattern, walk_files
 
 
 def is_valid_url(target):
@@ -54,15 +65,25 @@ def get_cloud_storage_path(url) -> ParseResult:
     return parsed_url
 
 
-def add_url(ctx, target) -> tuple[list[pathlib.Path], list[str]]:
+def args_to_metadata(args: list[str]) -> dict:
+    """Convert --key value arguments to dvc metadata."""
+    metadata = {'meta': dict(map(lambda i: (args[i].replace('--', ''), args[i + 1]), range(len(args) - 1)[::2]))}
+    if '--no-bucket' in args or '--no_bucket' in args:
+        metadata['meta']['no_bucket'] = True
+    return metadata
+
+
+def add_url(ctx, target, metadata: dict = None, files_already_in_repo: list[str] = None) -> tuple[list[pathlib.Path], list[str]]:
     from gen3_tracker.common import ACCEPTABLE_HASHES, INFO_COLOR
 
-    """Add a url to the repository. If the file is already in the repository, it will be updated."""
+    """Add a url to the repository. If the file is already in the repository, it will be updated.
+    metadata defaults to the --key value arguments."""
     assert is_valid_url(target), f'{target} is not a valid url.'
     url = target
     from gen3_tracker.git import git_files
 
-    files_already_in_repo = git_files()
+    if files_already_in_repo is None:
+        files_already_in_repo = git_files()
     updates = []  # only updates
     all_changed_files = []  # new and updates
     config: Config = ctx.obj
@@ -75,16 +96,16 @@ def add_url(ctx, target) -> tuple[list[pathlib.Path], list[str]]:
         updates.append(target)
 
     # process args to DVC
-    _args = ctx.args
-    metadata = {'meta': dict(map(lambda i: (_args[i].replace('--', ''), _args[i + 1]), range(len(_args) - 1)[::2]))}
-    if '--no-bucket' in _args or '--no_bucket' in _args:
-        metadata['meta']['no_bucket'] = True
+    if metadata is None:
+        metadata = args_to_metadata(ctx.args)
 
     required_keys = ['size', 'modified']
     required_keys_msg = []
     for k in required_keys:
         if k not in metadata['meta']:
             required_keys_msg.append(f'--{k} is required for urls.')
+    if not any(k in metadata['meta'] for k in ACCEPTABLE_HASHES):
+        required_keys_msg.append(f'One of --{", --".join(ACCEPTABLE_HASHES)} is required for urls.')
     assert not required_keys_msg, f'{", ".join(required_keys_msg)}'
 
     # check content of parameters
@@ -147,88 +168,287 @@ def url_path(url):
     return target
 
 
-def add_file(ctx, target) -> tuple[list[pathlib.Path], list[str]]:
-    from gen3_tracker.common import INFO_COLOR
-    config: Config = ctx.obj
-
-    """Add a real file to the repository. Expand wildcards. If the file is already in the repository, it will be updated."""
+def add_file(ctx, target, worker_count: int = 1, hash_types: typing.Sequence[str] = ('md5',),
+             etag_part_size: int = DEFAULT_ETAG_PART_SIZE, fingerprint_size: int = 0) -> tuple[list[pathlib.Path], list[str]]:
+    """Add a real file to the repository. Expand wildcards. If the file is already in the repository, it will be updated.
+    When worker_count > 1, targets are stat'ed and hashed by a pool of processes, the dvc files are written here.
+    Unless provided by the user, all hash_types are calculated in a single read of each file.
+    If fingerprint_size, files larger than 3 * fingerprint_size are fingerprinted, their hash deferred to push."""
     from gen3_tracker.git import git_files
+    from gen3_tracker.common import INFO_COLOR
 
-    targets = glob.glob(target, recursive=True)
-    if not targets:
-        # not a wildcard, check if it is a file
-        # assert pathlib.Path(target).exists(), f'{pathlib.Path(target).resolve()} does not exist.'
-        targets = [target]
+    # create reference to the file
+    # convert --arguments to metadata
+    metadata = args_to_metadata(ctx.args)
+    check_hash_metadata(metadata)
 
-    files_already_in_repo = git_files()
+    files_already_in_repo = set(git_files())
     updates = []  # only updates
+    checkpoint = None
+    recursive_pattern = split_recursive_pattern(target)
+    if recursive_pattern:
+        # stream <dir>/**, resume an interrupted add of the same target
+        checkpoint = AddCheckpoint.default()
+        after = checkpoint.start(target, ctx.args) if checkpoint else None
+        if after:
+            click.secho(f'Resuming add of {target} after {after}, {len(checkpoint.done)} files already added.', fg=INFO_COLOR, file=sys.stderr)
+            updates.extend(_ for _, _dvc in checkpoint.done if f"MANIFEST/{_}.dvc" in files_already_in_repo)
+        candidates = ((_.path, _) for _ in walk_files(*recursive_pattern, after=after))
+    else:
+        targets = glob.glob(target, recursive=True)
+        if not targets:
+            # not a wildcard, check if it is a file
+            # assert pathlib.Path(target).exists(), f'{pathlib.Path(target).resolve()} does not exist.'
+            targets = [target]
+        candidates = ((_, None) for _ in targets)
+
+    def _jobs():
+        for target_, entry in candidates:
+            job = file_job(target_, metadata, files_already_in_repo, updates, entry=entry)
+            if job:
+                yield job
+
+    try:
+        all_changed_files = write_file_dvcs(ctx.obj, _jobs(), worker_count=worker_count, hash_types=hash_types, etag_part_size=etag_part_size,
+                                            fingerprint_size=fingerprint_size, checkpoint=checkpoint)
+    finally:
+        if checkpoint:
+            checkpoint.close()
+    if checkpoint:
+        checkpoint.finish()
+    return all_changed_files, updates
+
+
+def check_hash_metadata(metadata: dict):
+    """If the user specified a --hash, it must have a valid value."""
+    if 'hash' in metadata['meta']:
+        hash_type = metadata['meta']['hash']
+        assert hash_type in ACCEPTABLE_HASHES.keys(), f'hash should be one of {", ".join(ACCEPTABLE_HASHES.keys())}'
+        hash_value = metadata['meta'][hash_type]
+        assert hash_value, f'{hash_type} should be provided.'
+        hash_regex = ACCEPTABLE_HASHES[hash_type]
+        assert hash_regex(hash_value), f'{hash_value} is not a valid {hash_type} hash.'
+
+
+def file_job(target: str, metadata: dict, files_already_in_repo: typing.Collection[str], updates: list[str],
+             entry: WalkEntry = None) -> typing.Optional[tuple[dict, str, typing.Optional[WalkEntry]]]:
+    """Check a file target, return a (metadata, target, entry) job to stat and hash it, or None if it should be skipped.
+    A WalkEntry from the walker is a file, and already has its stat and realpath."""
+    from gen3_tracker.common import INFO_COLOR
+
+    # check args & dependencies
+    # target should be a file that exists and is relative to the project root
+    if target.startswith('MANIFEST') or target.startswith('META'):
+        suggested_name = target.replace('MANIFEST/', '').replace('META/', '').replace('.dvc', '')
+        click.secho(f'{target} starts with a reserved name. Perhaps you meant {suggested_name}?', fg=INFO_COLOR,
+                    file=sys.stderr)
+        return None
+
+    if f"MANIFEST/{target}.dvc" in files_already_in_repo:
+        click.secho(f'{target} is already in the repository. updating.', fg=INFO_COLOR, file=sys.stderr)
+        #
+        # flag the file for update
+        #
+        updates.append(target)
+
+    if entry:
+        assert pathlib.Path(entry.realpath).is_relative_to(pathlib.Path.cwd()), 'Target should be relative to the project root.'
+        return copy.deepcopy(metadata), target, entry
+
+    target_path = pathlib.Path(target)
+    # assert not target_path.is_dir(), 'Adding directories are not supported. Please supply a file.'
+    if target_path.is_dir():
+        return None
+
+    # final checks
+    # assert target_path.resolve().exists(), f'{pathlib.Path(target).resolve()} does not exist.'
+    assert target_path.resolve().is_relative_to(pathlib.Path.cwd()), 'Target should be relative to the project root.'
+
+    return copy.deepcopy(metadata), target, None
+
+
+def write_file_dvcs(config: Config, jobs: typing.Iterable[tuple[dict, str, typing.Optional[WalkEntry]]], worker_count: int = 1,
+                    hash_types: typing.Sequence[str] = ('md5',), etag_part_size: int = DEFAULT_ETAG_PART_SIZE,
+                    fingerprint_size: int = 0, checkpoint: AddCheckpoint = None) -> list[pathlib.Path]:
+    """Stat and hash the (metadata, target, entry) jobs, write their dvc files and .gitignore, return the changed files.
+    Dvc files are written as results arrive, each one is recorded in the checkpoint, if any."""
     all_changed_files = []  # new and updates
-    for target in targets:
-
-        # check args & dependencies
-        # target should be a file that exists and is relative to the project root
-        if target.startswith('MANIFEST') or target.startswith('META'):
-            suggested_name = target.replace('MANIFEST/', '').replace('META/', '').replace('.dvc', '')
-            click.secho(f'{target} starts with a reserved name. Perhaps you meant {suggested_name}?', fg=INFO_COLOR,
-                        file=sys.stderr)
-            continue
-
-        if f"MANIFEST/{target}.dvc" in files_already_in_repo:
-            click.secho(f'{target} is already in the repository. updating.', fg=INFO_COLOR, file=sys.stderr)
-            #
-            # flag the file for update
-            #
-            updates.append(target)
-
-        target_path = pathlib.Path(target)
-        # assert not target_path.is_dir(), 'Adding directories are not supported. Please supply a file.'
-        if target_path.is_dir():
-            continue
-
-        # final checks
-        # assert target_path.resolve().exists(), f'{pathlib.Path(target).resolve()} does not exist.'
-        assert target_path.resolve().is_relative_to(pathlib.Path.cwd()), 'Target should be relative to the project root.'
-
-        # create reference to the file
-        # convert --arguments to metadata
-        _args = ctx.args
-        metadata = {'meta': dict(map(lambda i: (_args[i].replace('--', ''), _args[i + 1]), range(len(_args) - 1)[::2]))}
-        if '--no-bucket' in _args or '--no_bucket' in _args:
-            metadata['meta']['no_bucket'] = True
-
-        if 'hash' in metadata['meta']:
-            hash_type = metadata['meta']['hash']
-            assert hash_type in ACCEPTABLE_HASHES.keys(), f'hash should be one of {", ".join(ACCEPTABLE_HASHES.keys())}'
-            hash_value = metadata['meta'][hash_type]
-            assert hash_value, f'{hash_type} should be provided.'
-            hash_regex = ACCEPTABLE_HASHES[hash_type]
-            assert hash_regex(hash_value), f'{hash_value} is not a valid {hash_type} hash.'
+    target_roots = []
+    if checkpoint:
+        for target, dvc_file in checkpoint.done:
+            all_changed_files.append(dvc_file)
+            target_root = f'/{pathlib.Path(target).parts[0]}\n'
+            if target_root not in target_roots:
+                target_roots.append(target_root)
+    hash_cache = HashCache.default()
+    with hash_cache or contextlib.nullcontext():
+        dvcs = create_dvcs(jobs, worker_count=worker_count, hash_cache=hash_cache, hash_types=hash_types, etag_part_size=etag_part_size,
+                           fingerprint_size=fingerprint_size)
+        for target, target_metadata, yaml_data in dvcs:
+            yaml_data.update(target_metadata)
+            yaml_data['project_id'] = config.gen3.project_id
+            _ = DVC(**yaml_data).model_dump()
+            assert _['outs'][0]['object_id'], 'object_id should be in dvc created from files.'
+            dvc_file = write_dvc_file(target, _)
+            all_changed_files.append(dvc_file)
+            if checkpoint:
+                checkpoint.record(target, dvc_file)
+            target_root = f'/{pathlib.Path(target).parts[0]}\n'
+            if target_root not in target_roots:
+                target_roots.append(target_root)
+
+    # add the target roots to the gitignore
+    git_ignore_path = pathlib.Path.cwd() / '.gitignore'
+    if not target_roots:
+        return all_changed_files
+    ignores = []
+    if not git_ignore_path.exists():
+        all_changed_files.append(git_ignore_path)
+    else:
+        with open(git_ignore_path) as f:
+            ignores = f.readlines()
+    with open(git_ignore_path, 'a+') as f:
+        for target_root in target_roots:
+            if target_root not in ignores:
+                f.write(target_root)
+    return all_changed_files
+
 
-        yaml_data = create_dvc(metadata, target_path)
-        yaml_data.update(metadata)
-        yaml_data['project_id'] = config.gen3.project_id
-        _ = DVC(**yaml_data).model_dump()
-        assert _['outs'][0]['object_id'], 'object_id should be in dvc created from files.'
-        dvc_file = write_dvc_file(target, _)
-
-        # add the target root to the gitignore
-        git_ignore_path = pathlib.Path.cwd() / '.gitignore'
-        all_changed_files.append(dvc_file)
-        ignores = []
-        if not git_ignore_path.exists():
-            all_changed_files.append(git_ignore_path)
+MANIFEST_TARGET_KEYS = ['path', 'url', 'target']
+"""Column names of the file path or url in a bulk add manifest."""
+
+
+def read_add_manifest(manifest_path: typing.Union[str, pathlib.Path]) -> typing.Iterator[dict]:
+    """Stream rows of a tsv, csv or ndjson manifest, drop empty values."""
+    manifest_path = pathlib.Path(manifest_path)
+    with open(manifest_path, newline='') as f:
+        if manifest_path.suffix in ['.ndjson', '.jsonl']:
+            rows = (orjson.loads(line) for line in f if line.strip())
         else:
-            with open(git_ignore_path) as f:
-                ignores = f.readlines()
+            rows = csv.DictReader(f, delimiter=',' if manifest_path.suffix == '.csv' else '\t')
+        for row in rows:
+            yield {k.strip(): v for k, v in row.items() if k and v is not None and v != ''}
 
-        target_root = f'/{target_path.parts[0]}\n'
-        if target_root not in ignores:
-            with open(git_ignore_path, 'a+') as f:
-                f.write(target_root)
 
+def add_manifest(ctx, manifest_path: typing.Union[str, pathlib.Path], worker_count: int = 1, hash_types: typing.Sequence[str] = ('md5',),
+                 etag_part_size: int = DEFAULT_ETAG_PART_SIZE, fingerprint_size: int = 0) -> tuple[list[pathlib.Path], list[str]]:
+    """Add the files and urls listed in a manifest, in one process.
+
+    Each row has a path or url, optionally size, modified, mime, <hash type> and patient, specimen, observation, task ...
+    Row values override the --key value arguments. Urls require size, modified and a hash.
+    """
+    from gen3_tracker.git import git_files
+
+    default_metadata = args_to_metadata(ctx.args)
+    files_already_in_repo = set(git_files())
+    all_changed_files = []
+    updates = []
+    jobs = []
+    for line_number, row in enumerate(read_add_manifest(manifest_path), start=1):
+        targets = [row.pop(k) for k in MANIFEST_TARGET_KEYS if k in row]
+        assert len(targets) == 1, f'{manifest_path}:{line_number} should have one of {MANIFEST_TARGET_KEYS}'
+        target = str(targets[0])
+        metadata = copy.deepcopy(default_metadata)
+        for k, v in row.items():
+            if k in ['no_bucket', 'no-bucket']:
+                metadata['meta']['no_bucket'] = str(v).lower() in ['true', '1', 'yes']
+                continue
+            metadata['meta'][k] = str(v)
+        try:
+            if is_url(target) and not target.startswith('file://'):
+                changed_files, url_updates = add_url(ctx, target, metadata=metadata, files_already_in_repo=files_already_in_repo)
+                all_changed_files.extend(changed_files)
+                updates.extend(url_updates)
+            else:
+                check_hash_metadata(metadata)
+                job = file_job(target, metadata, files_already_in_repo, updates)
+                if job:
+                    jobs.append(job)
+        except AssertionError as e:
+            raise AssertionError(f'{manifest_path}:{line_number} {e}')
+
+    all_changed_files.extend(
+        write_file_dvcs(ctx.obj, jobs, worker_count=worker_count, hash_types=hash_types, etag_part_size=etag_part_size, fingerprint_size=fingerprint_size)
+    )
     return all_changed_files, updates
 
 
+def _create_dvc_job(job: tuple[dict, str, dict, typing.Optional[WalkEntry]], hash_types: typing.Sequence[str] = ('md5',),
+                    etag_part_size: int = DEFAULT_ETAG_PART_SIZE, fingerprint_size: int = 0) -> tuple[str, dict, dict]:
+    """Stat and hash a single target, return the target, its (consumed) metadata and the dvc dict."""
+    metadata, target, known_hashes, entry = job
+    yaml_data = create_dvc(metadata, pathlib.Path(target), hash_types=hash_types, etag_part_size=etag_part_size, known_hashes=known_hashes,
+                           entry=entry, fingerprint_size=fingerprint_size)
+    return target, metadata, yaml_data
+
+
+def _batched(iterable: typing.Iterable, batch_size: int) -> typing.Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
+
+
+CREATE_DVCS_BATCH_SIZE = 1024
+"""Jobs are read, and the hash cache consulted, this many at a time; so large walks stream through the pool."""
+
+
+def create_dvcs(jobs: typing.Iterable[tuple[dict, str, typing.Optional[WalkEntry]]], worker_count: int = 1, hash_cache: HashCache = None,
+                hash_types: typing.Sequence[str] = ('md5',), etag_part_size: int = DEFAULT_ETAG_PART_SIZE,
+                batch_size: int = CREATE_DVCS_BATCH_SIZE, fingerprint_size: int = 0) -> typing.Iterator[tuple[str, dict, dict]]:
+    """Create dvc dicts for (metadata, target, entry) jobs, in order.
+
+    If worker_count > 1, the targets are stat'ed and hashed concurrently by a process pool,
+    results are yielded in the same order as the serial path.
+    If a hash_cache is provided, unchanged files are not re-read, new hashes are saved to it.
+    """
+
+    def _consult_cache(batch, misses):
+        for i, (metadata, target, entry) in enumerate(batch):
+            known_hashes = {}
+            if hash_cache and 'hash' not in metadata['meta'] and not any(k in metadata['meta'] for k in ACCEPTABLE_HASHES):
+                try:
+                    stat_result = entry.stat if entry else os.stat(target)
+                    for hash_type in hash_types:
+                        hash_value = hash_cache.get(stat_result, cache_hash_type(hash_type, etag_part_size))
+                        if hash_value:
+                            known_hashes[hash_type] = hash_value
+                    missing = [_ for _ in hash_types if _ not in known_hashes]
+                    if missing:
+                        misses[i] = (stat_result, missing)
+                except OSError:
+                    pass
+            yield metadata, target, known_hashes, entry
+
+    job = functools.partial(_create_dvc_job, hash_types=hash_types, etag_part_size=etag_part_size, fingerprint_size=fingerprint_size)
+    pool = None
+    pool_size = 0
+    try:
+        for batch in _batched(jobs, batch_size):
+            misses = {}  # batch index -> (stat, hash types) of targets we need to hash
+            if worker_count <= 1 or (pool is None and len(batch) <= 1):
+                results = map(job, _consult_cache(batch, misses))
+            else:
+                if pool is None:
+                    pool_size = min(worker_count, len(batch))
+                    pool = multiprocessing.Pool(processes=pool_size)
+                chunksize = max(1, min(64, len(batch) // (pool_size * 4)))
+                # the pool's feeder thread can't share the cache connection, consult it here
+                results = pool.imap(job, list(_consult_cache(batch, misses)), chunksize=chunksize)
+
+            for i, result in enumerate(results):
+                if i in misses:
+                    target, _, yaml_data = result
+                    stat_result, missing = misses.pop(i)
+                    for hash_type in missing:
+                        if yaml_data['outs'][0][hash_type] is None:
+                            continue  # fingerprinted, deferred
+                        hash_cache.put(stat_result, cache_hash_type(hash_type, etag_part_size), yaml_data['outs'][0][hash_type], os.path.abspath(target))
+                yield result
+    finally:
+        if pool:
+            pool.terminate()
+
+
 def write_dvc_file(target, yaml_data):
     # write the dvc file
     manifest_path = pathlib.Path('MANIFEST')
@@ -237,35 +457,46 @@ def write_dvc_file(target, yaml_data):
     manifest_target_path.parent.mkdir(parents=True, exist_ok=True)
     dvc_file = manifest_target_path.parent / (manifest_target_path.name + ".dvc")
     if dvc_file.exists():
-        with open(dvc_file) as f:
-            existing_yaml_data = yaml.load(f, Loader=yaml.SafeLoader)
-            # don't overwrite existing metadata with empty metadata
-            for k, v in existing_yaml_data['meta'].items():
-                if v is None:
-                    continue
-                if k in yaml_data['meta'] and yaml_data['meta'][k] is not None:
-                    continue
-                yaml_data['meta'][k] = v
-    with open(dvc_file, 'w') as yaml_file:
-        yaml.dump(yaml_data, yaml_file, default_flow_style=False)
+        existing_yaml_data = load_dvc(dvc_file)
+        # don't overwrite existing metadata with empty metadata
+        for k, v in existing_yaml_data['meta'].items():
+            if v is None:
+                continue
+            if k in yaml_data['meta'] and yaml_data['meta'][k] is not None:
+                continue
+            yaml_data['meta'][k] = v
+        # don't discard the calculated hashes of an unchanged, fingerprinted file
+        out, existing_out = yaml_data['outs'][0], existing_yaml_data['outs'][0]
+        if out.get('fingerprint') and existing_out.get('fingerprint'):
+            new_fingerprint, existing_fingerprint = Fingerprint.parse(out['fingerprint']), Fingerprint.parse(existing_out['fingerprint'])
+            if new_fingerprint._replace(mtime_ns=0) == existing_fingerprint._replace(mtime_ns=0):
+                for k in ACCEPTABLE_HASHES:
+                    if out.get(k) is None and existing_out.get(k):
+                        out[k] = existing_out[k]
+    dump_dvc(yaml_data, dvc_file)
     return dvc_file
 
 
-def create_dvc(metadata: dict, target_path: pathlib.Path) -> dict:
+def create_dvc(metadata: dict, target_path: pathlib.Path, hash_types: typing.Sequence[str] = ('md5',),
+               etag_part_size: int = DEFAULT_ETAG_PART_SIZE, known_hashes: dict = None, entry: WalkEntry = None, fingerprint_size: int = 0) -> dict:
     from gen3_tracker.common import ACCEPTABLE_HASHES
 
-    """Create a dvc file for a file in the repository."""
-    from gen3_tracker.git import calculate_hash, get_mime_type
+    """Create a dvc file for a file in the repository.
+    If the user did not provide a hash, calculate hash_types in a single read, the first one is the primary `hash`.
+    known_hashes (i.e. from the cache) are not re-calculated, the stat and realpath of a walker entry are not repeated.
+    Files larger than 3 * fingerprint_size are fingerprinted instead, hashes not already known are left for push."""
+    from gen3_tracker.git import get_mime_type
 
     target = str(target_path)
+    stat_result = entry.stat if entry else target_path.stat()
 
     info = {
-        'size': metadata['meta'].get('size', None) or target_path.stat().st_size,
+        'size': metadata['meta'].get('size', None) or stat_result.st_size,
         'path': target,
         'mime': metadata['meta'].get('mime', get_mime_type(target)),
-        'modified': metadata['meta'].get('modified', None) or datetime.fromtimestamp(target_path.stat().st_mtime, tz=pytz.utc).isoformat(),
-        'realpath': str(target_path.resolve()),
-        'is_symlink': target_path.is_symlink()
+        'modified': metadata['meta'].get('modified', None) or datetime.fromtimestamp(stat_result.st_mtime, tz=pytz.utc).isoformat(),
+        'realpath': entry.realpath if entry else str(target_path.resolve()),
+        'is_symlink': entry.is_symlink if entry else target_path.is_symlink()
     }
     if 'realpath' in metadata['meta']:
         info['realpath'] = metadata['meta']['realpath']
@@ -279,10 +510,17 @@ def create_dvc(metadata: dict, target_path: pathlib.Path) -> dict:
             del metadata['meta'][k]
             if 'hash' in metadata['meta']:
                 del metadata['meta']['hash']
-    # no?, use md5
+    # no?, calculate them, default md5
     if 'hash' not in info:
-        info['hash'] = 'md5'
-        info['md5'] = calculate_hash('md5', target)
+        hashes = dict(known_hashes or {})
+        missing = [_ for _ in hash_types if _ not in hashes]
+        if fingerprint_size and stat_result.st_size > 3 * fingerprint_size:
+            info['fingerprint'] = str(fingerprint(target, stat_result, sample_size=fingerprint_size))
+        elif missing:
+            hashes.update(calculate_hashes(missing, target, etag_part_size=etag_part_size))
+        info['hash'] = hash_types[0]
+        for hash_type in hash_types:
+            info[hash_type] = hashes.get(hash_type)
     # we follow this convention for the dvc file
     # see https://dvc.org/doc/user-guide/project-structure/dvc-files#dvc-files
     yaml_data = {
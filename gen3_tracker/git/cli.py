@@ -1,4 +1,3 @@
-import glob
 import json
 import logging
 import multiprocessing
@@ -11,9 +10,9 @@ import orjson
 import re
 import shutil
 import subprocess
-import requests
 import sys
 import time
+import typing
 import zipfile
 from datetime import datetime
 from pytz import UTC
@@ -28,22 +27,31 @@ from fhir.resources.bundle import Bundle, BundleEntry, BundleEntryRequest
 
 from gen3.auth import Gen3AuthError
 from gen3.file import Gen3File
-from gen3.index import Gen3Index
 from halo import Halo
 from tqdm import tqdm
 
 import gen3_tracker
 from gen3_tracker import Config
 from gen3_tracker.common import CLIOutput, INFO_COLOR, ERROR_COLOR, is_url, filter_dicts, SUCCESS_COLOR, \
-    read_ndjson_file
+    read_ndjson_file, ACCEPTABLE_HASHES
 from gen3_tracker.config import init as config_init, ensure_auth
 from gen3_tracker.gen3.buckets import get_buckets
-from gen3_tracker.git import git_files, to_indexd, to_remote, dvc_data, \
+from gen3_tracker.gen3.indexd import delete_indexd
+from gen3_tracker.gen3.session import curl, gen3_index, session
+from gen3_tracker.git import git_files, to_indexd, to_indexd_async, to_remote, dvc_data, \
     data_file_changes, modified_date, git_status, DVC, MISSING_G3T_MESSAGE
-from gen3_tracker.git import run_command, \
-    MISSING_GIT_MESSAGE, git_repository_exists
+from gen3_tracker.git import run_command, git_add, committed_dvc_data, complete_pending_hashes, to_dvc, \
+    MISSING_GIT_MESSAGE, git_repository_exists, ordered_map
 from gen3_tracker.git.adder import url_path, write_dvc_file
-from gen3_tracker.git.cloner import ls
+from gen3_tracker.git.compact import CompactManifest
+from gen3_tracker.git.hasher import HashCache
+from gen3_tracker.git.indexd_mirror import IndexdMirror
+from gen3_tracker.git.manifest_cache import ManifestCache
+from gen3_tracker.git.process import command_log_path, command_text, summarize
+from gen3_tracker.git.push_state import ManifestDiff, changed_since_push, save_push_state
+from gen3_tracker.git.status import StatusSnapshot, head_commit, scan_status, select_dvc_files
+from gen3_tracker.git.watcher import DEFAULT_POLL_INTERVAL, DirtySet
+from gen3_tracker.git.tracker import TrackedFiles
 from gen3_tracker.git.initializer import initialize_project_server_side
 from gen3_tracker.git.snapshotter import push_snapshot
 from gen3_tracker.meta.skeleton import meta_index, get_data_from_meta
@@ -117,7 +125,7 @@ def init(config: Config, project_id: str, approve: bool, no_server: bool, debug:
             logs.extend(init_logs)
 
             if approve and approval_needed:
-                run_command('g3t collaborator approve --all', dry_run=config.dry_run, no_capture=True)
+                run_command(['g3t', 'collaborator', 'approve', '--all'], dry_run=config.dry_run, no_capture=True)
             elif approval_needed and not approve:
                 click.secho("Approval needed. to approve the project, a privileged user must run `g3t collaborator approve --all`", fg=INFO_COLOR, file=sys.stderr)
             else:
@@ -139,7 +147,7 @@ def ensure_git_repo(config):
         return
 
     if not pathlib.Path('.git').exists():
-        command = 'git init'
+        command = ['git', 'init']
         run_command(command, dry_run=config.dry_run, no_capture=True)
     else:
         click.secho('Git repository already exists.', fg=INFO_COLOR, file=sys.stderr)
@@ -153,8 +161,8 @@ def ensure_git_repo(config):
         f.write('This directory contains metadata files for the data files in the MANIFEST directory.\n')
     with open('MANIFEST/README.md', 'w') as f:
         f.write('This directory contains dvc files that reference the data files.\n')
-    run_command('git add MANIFEST META .gitignore .g3t', dry_run=config.dry_run, no_capture=True)
-    run_command('git commit -m "initialized" MANIFEST META .gitignore .g3t', dry_run=config.dry_run, no_capture=True)
+    git_add(['MANIFEST', 'META', '.gitignore', '.g3t'], dry_run=config.dry_run)
+    run_command(['git', 'commit', '-m', 'initialized', 'MANIFEST', 'META', '.gitignore', '.g3t'], dry_run=config.dry_run, no_capture=True)
 
 
 # Note: The commented code below is an example of how to use context settings to allow extra arguments.
@@ -165,10 +173,23 @@ def ensure_git_repo(config):
 
 
 @cli.command(context_settings=dict(ignore_unknown_options=True, allow_extra_args=True))
-@click.argument('target')
+@click.argument('target', required=False)
+@click.option('--from-manifest', 'from_manifest', default=None, type=click.Path(exists=True, dir_okay=False),
+              help='Add all the files and urls listed in a tsv, csv or ndjson manifest.')
 @click.option('--no-git-add', default=False, is_flag=True, hidden=True)
+@click.option('--worker_count', '--workers', '-w', default=(multiprocessing.cpu_count() - 1), show_default=True,
+              type=int,
+              help='Number of processes used to hash files when wildcards or --from-manifest are used.')
+@click.option('--digests', default='md5', show_default=True,
+              help='Comma separated hashes to calculate in a single read of each file, the first is the primary hash.')
+@click.option('--etag-part-size', default=8, show_default=True, type=int,
+              help='(etag): S3 multipart chunk size in MiB.')
+@click.option('--fingerprint', 'fingerprint_size', default=0, show_default=True, type=int,
+              help='Sample size in MiB. Fingerprint files larger than 3 samples, defer their hash to push.')
+@click.option('--update', is_flag=True, default=False, show_default=True,
+              help='Instead of a TARGET, update all the data files `g3t status` reports as changed.')
 @click.pass_context
-def add(ctx, target, no_git_add: bool):
+def add(ctx, target, from_manifest: str, no_git_add: bool, worker_count: int, digests: str, etag_part_size: int, fingerprint_size: int, update: bool):
     """
     Update references to data files to the repository.
 
@@ -181,17 +202,28 @@ def add(ctx, target, no_git_add: bool):
         - You can specify those values with the --<hash>, --size, --modified and --mime options
         - As a convenience, you can use wildcards to add multiple files at once.
           If wildcards are used, the hash, size, modified and mime type parameters are ignored.
+        - '<dir>/**' (or '<dir>/**/<pattern>') is streamed, files are added as they are found.
+          If interrupted, re-run the same command to resume where it stopped.
     \b
     If the TARGET is a url:
         - You must specify the hash, size, modified and mime type
         - Wildcards are not supported
     \b
+    --from-manifest <file>: Add many files and urls in one process, instead of a TARGET.
+        One row per file or url, columns: path or url, [size, modified, mime, <hash>, patient, specimen, observation, task ...]
+        Row values override --<key> <value> options. Rows are written to MANIFEST, then staged with a single `git add`.
+    \b
     --<hash> <value>: Valid options are: ['md5', 'sha1', 'sha256', 'sha512', 'crc', 'etag']
                       Value must conform to the hash type.
     --modified: A variety of date formats are supported, see https://tinyurl.com/ysad3rj7
     --mime: If not specified, it will be inferred from the file extension.
     --no-bucket: If specified, the file will not be uploaded to the bucket, and user will access via scp or symlink.
     --no-git-add: If specified, the file will not be automatically added to git. Avoids locking, useful for parallel adds .
+    --workers: Number of processes used to hash files matched by wildcards.
+    --digests: Hashes to calculate e.g. md5,sha256,crc,etag; each file is read once.
+    --fingerprint <MiB>: For very large files, record size, mtime and a digest of the first, middle and last <MiB>.
+                         `g3t status` compares fingerprints, the full hash is calculated by `g3t push` (or `g3t cache warm`).
+    --update: Re-hash every data file modified since it was added, every digest it has. Only the files it saw change if `g3t watch` is running.
     \b
     Identifiers:
     In order to link a file with associated Patient, Specimen, Observation or Task, you can use one of the following identifiers:
@@ -202,7 +234,7 @@ def add(ctx, target, no_git_add: bool):
     The <value> is a user defined string that will be used to link the data file with the associated resource.  Do not use PHI in the value.
     See `g3t meta` for more
     """
-    from gen3_tracker.git.adder import add_file, add_url
+    from gen3_tracker.git.adder import add_file, add_url, add_manifest
 
     config: Config = ctx.obj
     try:
@@ -210,14 +242,36 @@ def add(ctx, target, no_git_add: bool):
         assert git_repository_exists(config.debug), MISSING_GIT_MESSAGE
         assert not config.no_config_found, MISSING_G3T_MESSAGE
 
+        if update:
+            assert not (target or from_manifest), 'Specify either a target, --from-manifest or --update.'
+            dvc_files, _, _ = select_dvc_files('MANIFEST')
+            changes = data_file_changes('MANIFEST', update=not config.dry_run, hash_worker_count=max(1, worker_count), dvc_files=dvc_files,
+                                        etag_part_size=etag_part_size * 1024 * 1024)
+            click.secho(f"Updated {len(changes)} data files.", fg=INFO_COLOR, file=sys.stderr)
+            return
+
         # needs to have a target
-        assert target, 'No targets specified.'
+        if from_manifest and target and target.startswith('--'):
+            # not a target, an unknown --<key> consumed by the optional argument
+            ctx.args.insert(0, target)
+            target = None
+        assert target or from_manifest, 'No targets specified.'
+        assert not (target and from_manifest), 'Specify either a target or --from-manifest, not both.'
+
+        hash_types = [_.strip() for _ in digests.split(',') if _.strip()]
+        assert hash_types, '--digests should list at least one hash type.'
+        for _ in hash_types:
+            assert _ in ACCEPTABLE_HASHES, f'--digests should be one of {", ".join(ACCEPTABLE_HASHES.keys())}'
 
         # Expand wildcard paths
-        if is_url(target) and not target.startswith('file://'):
+        if from_manifest:
+            all_changed_files, updates = add_manifest(ctx, from_manifest, worker_count=worker_count, hash_types=hash_types,
+                                                      etag_part_size=etag_part_size * 1024 * 1024, fingerprint_size=fingerprint_size * 1024 * 1024)
+        elif is_url(target) and not target.startswith('file://'):
             all_changed_files, updates = add_url(ctx, target)
         else:
-            all_changed_files, updates = add_file(ctx, target)
+            all_changed_files, updates = add_file(ctx, target, worker_count=worker_count, hash_types=hash_types,
+                                                  etag_part_size=etag_part_size * 1024 * 1024, fingerprint_size=fingerprint_size * 1024 * 1024)
 
         #
         # if it is an update, we do not need to add the file to git
@@ -225,7 +279,7 @@ def add(ctx, target, no_git_add: bool):
         adds = [str(_) for _ in all_changed_files if _ not in updates]
         if adds and not no_git_add:
             adds.append('.gitignore')
-            run_command(f'git add {" ".join([str(_) for _ in adds])}', dry_run=config.dry_run, no_capture=True)
+            git_add(adds, dry_run=config.dry_run)
 
     except Exception as e:
         click.secho(str(e), fg=ERROR_COLOR, file=sys.stderr)
@@ -247,46 +301,44 @@ def commit(ctx, targets, message, all):
     command = [
         "git",
         "commit",
-        "-m",
-        f'"{message}"',
-    ] + list(targets)
+    ] + (["-m", message] if message else []) + list(targets)
 
     if all:
         command.append("-a")
 
-    run_command(" ".join(command), dry_run=config.dry_run, no_capture=True)
+    run_command(command, dry_run=config.dry_run, no_capture=True)
 
 
 @cli.command()
+@click.option('--since', default=None, metavar='COMMIT',
+              help="Only inspect .dvc files changed since COMMIT (git diff --name-only), plus untracked ones.")
+@click.option('--incremental', is_flag=True, default=False, show_default=True,
+              help="Only inspect .dvc files changed since the last `g3t status`.")
+@click.option('--full', is_flag=True, default=False, show_default=True,
+              help="Check every data file, even if `g3t watch` is running.")
 @click.pass_obj
-def status(config):
-    """Show changed files."""
+def status(config, since, incremental, full):
+    """Show changed files.
+
+    A full status checks every data file, --since and --incremental only the data files of changed .dvc files.
+    Data files modified in place are only noticed by a full status, or while `g3t watch` is running.
+    """
     soft_error = False
     try:
         with Halo(text='Scanning', spinner='line', placement='right', color='white'):
-            manifest_path = pathlib.Path('MANIFEST')
-            changes = data_file_changes(manifest_path)
-            # Get a list of all files in the MANIFEST directory and its subdirectories
-            files = glob.glob('MANIFEST/**/*.dvc', recursive=True)
-            # Filter out directories, keep only files
-            files = [f for f in files if os.path.isfile(f)]
-        if not files:
-            click.secho("No files have been added.", fg=INFO_COLOR, file=sys.stderr)
+            snapshot = scan_status('MANIFEST', since=since, incremental=incremental, watched=not full)
+        changes = snapshot.changes
+        if not snapshot.latest_file:
+            if snapshot.incremental:
+                click.secho("No .dvc files changed.", fg=INFO_COLOR, file=sys.stderr)
+            else:
+                click.secho("No files have been added.", fg=INFO_COLOR, file=sys.stderr)
         else:
-            # Find the most recently changed file
-            latest_file = max(files, key=os.path.getmtime)
-
-            document_reference_mtime = 0
-
-            if pathlib.Path('META/DocumentReference.ndjson').exists():
-                # Get the modification time
-                document_reference_mtime = os.path.getmtime('META/DocumentReference.ndjson')
-
-            latest_file_mtime = os.path.getmtime(latest_file)
-            if document_reference_mtime < latest_file_mtime:
-                document_reference_mtime = datetime.fromtimestamp(document_reference_mtime).isoformat()
-                latest_file_mtime = datetime.fromtimestamp(latest_file_mtime).isoformat()
-                click.secho(f"WARNING: DocumentReference.ndjson is out of date {document_reference_mtime}. The most recently changed file is {latest_file} {latest_file_mtime}.  Please check DocumentReferences.ndjson", fg=INFO_COLOR, file=sys.stderr)
+            if snapshot.document_reference_out_of_date:
+                document_reference_mtime = datetime.fromtimestamp(snapshot.document_reference_mtime).isoformat()
+                latest_file_mtime = datetime.fromtimestamp(snapshot.latest_mtime).isoformat()
+                click.secho(f"WARNING: DocumentReference.ndjson is out of date {document_reference_mtime}. "
+                            f"The most recently changed file is {snapshot.latest_file} {latest_file_mtime}.  Please check DocumentReferences.ndjson", fg=INFO_COLOR, file=sys.stderr)
                 soft_error = True
 
             if changes:
@@ -296,10 +348,11 @@ def status(config):
                     data_path = str(_.data_path).replace(str(cwd) + '/', "")
                     click.secho(f'  g3t add {data_path} # changed: {modified_date(_.data_path)},  last added: {modified_date(_.dvc_path)}', fg=INFO_COLOR, file=sys.stderr)
                     soft_error = True
+                click.secho("# Or update them all via `g3t add --update`", fg=INFO_COLOR, file=sys.stderr)
             else:
                 click.secho("No data file changes.", fg=INFO_COLOR, file=sys.stderr)
 
-        _ = run_command('git status')
+        _ = run_command(['git', 'status'])
         print(_.stdout)
         if soft_error:
             exit(1)
@@ -309,6 +362,48 @@ def status(config):
             raise
 
 
+@cli.command()
+@click.option('--interval', default=DEFAULT_POLL_INTERVAL, show_default=True, type=float,
+              help='Seconds between polls, or between updates of the dirty set when using watchdog.')
+@click.option('--polling', is_flag=True, default=False, show_default=True, help='Poll even if watchdog is installed.')
+@click.pass_obj
+def watch(config, interval, polling):
+    """Track changes to data files, MANIFEST and META, until stopped.
+
+    \b
+    While running, `g3t status`, `g3t add --update` and `g3t push` only inspect the files it saw change,
+    instead of every data file in the project. Run a `g3t status` after starting it, to provide the baseline.
+    Uses inotify (or the platform's equivalent) if watchdog is installed: pip install gen3_tracker[watch]
+    otherwise stats every file each --interval; changes made less than an interval ago may be reported by the next status.
+    Run it in the background, e.g. `g3t watch &`, stop it with Ctrl-C or kill.
+    """
+    import signal
+    import threading
+    from gen3_tracker.git.watcher import ProjectWatcher
+
+    try:
+        assert git_repository_exists(config.debug), MISSING_GIT_MESSAGE
+        dirty_set = DirtySet.default()
+        assert dirty_set, MISSING_G3T_MESSAGE
+        with dirty_set:
+            running = dirty_set.watcher()
+            assert not running, f"Already watching, pid {running['pid']}"
+            stop = threading.Event()
+            signal.signal(signal.SIGTERM, lambda *_: stop.set())
+            project_watcher = ProjectWatcher(dirty_set)
+            click.secho(f"Watching {pathlib.Path.cwd()}", fg=INFO_COLOR, file=sys.stderr)
+            try:
+                mode = project_watcher.run(interval=interval, stop=stop, polling=polling,
+                                           on_change=lambda _: _ and config.debug and click.secho(f"{_} changed", fg=INFO_COLOR, file=sys.stderr))
+            except KeyboardInterrupt:
+                mode = None
+            click.secho(f"Stopped watching{f' ({mode})' if mode else ''}.", fg=INFO_COLOR, file=sys.stderr)
+    except Exception as e:
+        click.secho(str(e), fg=ERROR_COLOR, file=sys.stderr)
+        if config.debug:
+            raise
+
+
 @cli.command()
 @click.option('--step',
               type=click.Choice(['index', 'upload', 'publish', 'all', 'fhir']),
@@ -329,8 +424,15 @@ def status(config):
 @click.option('--fhir-server', show_default=True, default=False, is_flag=True, help='Push data in META directory to FHIR Server. Whatever FHIR data that exists in META dir will be upserted into the fhir server')
 @click.option('--debug', is_flag=True)
 @click.option('--skip_validate', is_flag=True, help='Skip validation of the metadata')
+@click.option('--incremental', is_flag=True, default=False, show_default=True,
+              help='(index, upload): Only the .dvc files added, modified or deleted since the last push. Without it, every committed file is reconciled with indexd.')
+@click.option('--worker_count', '--workers', '-w', default=8, show_default=True, type=int,
+              help='(index): Number of concurrent indexd requests, each is retried on 429 and 5xx responses.')
+@click.option('--async', 'use_async', is_flag=True, default=False, show_default=True,
+              help='(index): Send the indexd requests with asyncio from one thread, --worker_count of them in flight, e.g. -w 256.')
 @click.pass_context
-def push(ctx, step: str, transfer_method: str, overwrite: bool, re_run: bool, wait: bool, dry_run: bool, fhir_server: bool, debug: bool, skip_validate: bool):
+def push(ctx, step: str, transfer_method: str, overwrite: bool, re_run: bool, wait: bool, dry_run: bool, fhir_server: bool, debug: bool, skip_validate: bool,
+         incremental: bool, worker_count: int, use_async: bool):
     """Push changes to the remote repository.
     \b
     steps:
@@ -343,12 +445,20 @@ def push(ctx, step: str, transfer_method: str, overwrite: bool, re_run: bool, wa
         no-bucket - indexd only symlink to/from local
         s3 - (admin) s3 to/from local
         s3-map - (admin) s3 index only external s3
+    incremental: only index and upload the .dvc files changed (git diff-tree) since the last complete push,
+        remove the indexd records of the deleted ones.
+        Run without it from time to time to reconcile every committed file with indexd.
     """
     from gen3_tracker.gen3.jobs import publish_commits
     from gen3_tracker.gen3.buckets import get_program_bucket
 
     config = ctx.obj
 
+    def _save_push_state():
+        """Once every step of `--step all` succeeded, record the commit as the starting point of the next incremental push."""
+        if step == 'all' and not (dry_run or config.dry_run):
+            save_push_state(config.gen3.project_id, checked.head, incremental=checked.diff is not None)
+
     try:
 
         if re_run:
@@ -357,9 +467,7 @@ def push(ctx, step: str, transfer_method: str, overwrite: bool, re_run: bool, wa
 
         try:
             with Halo(text='Checking', spinner='line', placement='right', color='white'):
-                run_command("g3t status")
-                if not skip_validate:
-                    run_command("g3t meta validate", no_capture=True)
+                checked = pre_push_checks(config.gen3.project_id, skip_validate=skip_validate, incremental=incremental)
 
         except Exception as e:
             click.secho("Please correct issues before pushing.", fg=ERROR_COLOR, file=sys.stderr)
@@ -370,36 +478,52 @@ def push(ctx, step: str, transfer_method: str, overwrite: bool, re_run: bool, wa
 
         with Halo(text='Scanning', spinner='line', placement='right', color='white'):
 
-            # check git status
-            branch, uncommitted = git_status()
-            assert not uncommitted, "Uncommitted changes found.  Please commit or stash them first."
-
-            # check dvc vs external files
-            changes = data_file_changes(pathlib.Path('MANIFEST'))
-            assert not changes, f"# There are {len(changes)} data files that you need to update.  See `g3t status`"
+            # the committed manifest, full dvc objects are only materialized for the files sent
+            committed = checked.manifest
 
-            # initialize dvc objects with this project_id
-            committed_files, dvc_objects = manifest(config.gen3.project_id)
-
-            # initialize gen3 client
+            # initialize gen3 client, with a connection for each indexing worker
             auth = gen3_tracker.config.ensure_auth(config=config)
+            session(min_pool_size=worker_count)
             bucket_name = get_program_bucket(config=config, auth=auth)
 
-            # check for new files
-            records = ls(config, metadata={'project_id': config.gen3.project_id}, auth=auth)['records']
-            dids = {_['did']: _['updated_date'] for _ in records}
-            new_dvc_objects = [_ for _ in dvc_objects if _.object_id not in dids]
-            updated_dvc_objects = [_ for _ in dvc_objects if _.object_id in dids and _.out.modified > dids[_.object_id]]
+            # the files deleted since the last push, unless they were added again
+            deleted_ids = []
+            if checked.diff and checked.diff.deleted:
+                deleted_ids = sorted(set(CompactManifest.from_objects(config.gen3.project_id, checked.diff.deleted).object_ids) - set(committed.object_ids))
+
+            # check for new files, against the local mirror of the project's indexd records,
+            # only the committed (or changed) and deleted files are looked up, not the project's listing
+            with IndexdMirror.default() as mirror:
+                mirror.refresh(config.gen3.project_id, committed.object_ids + deleted_ids, auth=auth, use_async=use_async)
+                dids = mirror.dids(config.gen3.project_id, committed.object_ids + deleted_ids)
+            new_rows = [i for i, object_id in enumerate(committed.object_ids) if object_id not in dids]
+            updated_rows = [i for i, object_id in enumerate(committed.object_ids) if object_id in dids and committed.modified[i] > dids[object_id]]
+            deleted_ids = [_ for _ in deleted_ids if _ in dids]
+            del dids
+            dvc_objects = []
             if step not in ["publish", "fhir"]:
                 if not overwrite:
-                    dvc_objects = new_dvc_objects + updated_dvc_objects
-                    assert dvc_objects, "No new files to index.  Use --overwrite to force"
-
-        click.secho(f'Scanned new: {len(new_dvc_objects)}, updated: {len(updated_dvc_objects)} files', fg=INFO_COLOR, file=sys.stderr)
-        if updated_dvc_objects:
-            click.secho(f'Found {len(updated_dvc_objects)} updated files. overwriting', fg=INFO_COLOR, file=sys.stderr)
+                    assert new_rows or updated_rows or deleted_ids, "No new files to index.  Use --overwrite to force"
+                    dvc_objects = committed.materialize(new_rows + updated_rows)
+                else:
+                    dvc_objects = committed.materialize()
+
+        if checked.diff:
+            click.secho(f'Changed since the last push ({checked.diff.since[:8]}): {len(checked.diff.changed)} files', fg=INFO_COLOR, file=sys.stderr)
+            if checked.diff.deleted:
+                click.secho(f'Deleted since the last push: {len(checked.diff.deleted)} files, {len(deleted_ids)} indexd records to remove', fg=INFO_COLOR, file=sys.stderr)
+        elif incremental:
+            click.secho('No previous push of this commit history, pushing every file', fg=INFO_COLOR, file=sys.stderr)
+        click.secho(f'Scanned new: {len(new_rows)}, updated: {len(updated_rows)} files', fg=INFO_COLOR, file=sys.stderr)
+        if updated_rows:
+            click.secho(f'Found {len(updated_rows)} updated files. overwriting', fg=INFO_COLOR, file=sys.stderr)
             overwrite = True
 
+        pending = [_ for _ in dvc_objects if _.out.hash_pending]
+        if pending and not dry_run and step in ['index', 'upload', 'all']:
+            click.secho(f'Calculating deferred hashes of {len(pending)} fingerprinted files', fg=INFO_COLOR, file=sys.stderr)
+            complete_pending_hashes(pending, worker_count=multiprocessing.cpu_count())
+
         if step in ['index', 'all']:
             # send to index
 
@@ -407,26 +531,55 @@ def push(ctx, step: str, transfer_method: str, overwrite: bool, re_run: bool, wa
                 click.secho("Dry run: not indexing files", fg=INFO_COLOR, file=sys.stderr)
                 yaml.dump(
                     {
-                        'new': [_.model_dump() for _ in new_dvc_objects],
-                        'updated': [_.model_dump() for _ in updated_dvc_objects],
+                        'new': [_.model_dump() for _ in committed.materialize(new_rows)],
+                        'updated': [_.model_dump() for _ in committed.materialize(updated_rows)],
+                        'deleted': deleted_ids,
                     },
                     sys.stdout
                 )
                 return
 
-            for _ in tqdm(
-                    to_indexd(
+            if use_async:
+                with tqdm(desc='Indexing', unit='file', leave=False, total=len(dvc_objects)) as progress:
+                    to_indexd_async(
                         dvc_objects=dvc_objects,
                         auth=auth,
                         project_id=config.gen3.project_id,
                         bucket_name=bucket_name,
                         overwrite=overwrite,
-                        restricted_project_id=None
-
-                    ),
-                    desc='Indexing', unit='file', leave=False, total=len(committed_files)):
-                pass
-            click.secho(f'Indexed {len(committed_files)} files.', fg=INFO_COLOR, file=sys.stderr)
+                        restricted_project_id=None,
+                        concurrency=worker_count,
+                        on_saved=lambda _: progress.update()
+                    )
+            else:
+                for _ in tqdm(
+                        to_indexd(
+                            dvc_objects=dvc_objects,
+                            auth=auth,
+                            project_id=config.gen3.project_id,
+                            bucket_name=bucket_name,
+                            overwrite=overwrite,
+                            restricted_project_id=None,
+                            worker_count=worker_count
+                        ),
+                        desc='Indexing', unit='file', leave=False, total=len(dvc_objects)):
+                    pass
+            click.secho(f'Indexed {len(dvc_objects)} files.', fg=INFO_COLOR, file=sys.stderr)
+            if deleted_ids:
+                # the records of deleted files, like `g3t rm`
+                if use_async:
+                    from gen3_tracker.gen3.async_indexd import delete_records
+                    delete_records(auth, deleted_ids, concurrency=worker_count)
+                else:
+                    index_client = gen3_index(auth)
+                    for _ in tqdm(ordered_map(lambda did: delete_indexd(index_client, did), deleted_ids, worker_count),
+                                  desc='Deleting', unit='file', leave=False, total=len(deleted_ids)):
+                        pass
+                click.secho(f'Deleted {len(deleted_ids)} indexd records.', fg=INFO_COLOR, file=sys.stderr)
+            # the mirror gets the records as the server wrote them
+            with IndexdMirror.default() as mirror:
+                mirror.refresh(config.gen3.project_id, [_.object_id for _ in dvc_objects], auth=auth, use_async=use_async)
+                mirror.remove(deleted_ids)
 
         if step in ['upload', 'all']:
             click.secho(f'Checking {len(dvc_objects)} files for upload via {transfer_method}', fg=INFO_COLOR, file=sys.stderr)
@@ -450,14 +603,15 @@ def push(ctx, step: str, transfer_method: str, overwrite: bool, re_run: bool, wa
                         json_string = file.read()
                     bundle_data = orjson.loads(json_string)
                     headers = {"Authorization": f"{auth._access_token}"}
-                    result = requests.delete(url=f'{auth.endpoint}/Bundle', data=orjson.dumps(bundle_data, default=_default_json_serializer,
-                                                                                              option=orjson.OPT_APPEND_NEWLINE).decode(), headers=headers)
+                    result = session().delete(url=f'{auth.endpoint}/Bundle', data=orjson.dumps(bundle_data, default=_default_json_serializer,
+                                                                                               option=orjson.OPT_APPEND_NEWLINE).decode(), headers=headers)
 
                 with open("logs/publish.log", 'a') as f:
                     log_msg = {'timestamp': datetime.now(pytz.UTC).isoformat(), "result": f"{result}"}
                     click.secho('Published project. See logs/publish.log', fg=SUCCESS_COLOR, file=sys.stderr)
                     f.write(json.dumps(log_msg, separators=(',', ':')))
                     f.write('\n')
+                _save_push_state()
                 return
 
             project_id = config.gen3.project_id
@@ -478,14 +632,15 @@ def push(ctx, step: str, transfer_method: str, overwrite: bool, re_run: bool, wa
             headers = {"Authorization": f"{auth._access_token}"}
             bundle_dict = bundle.dict()
             with Halo(text='Sending to FHIR Server', spinner='line', placement='right', color='white'):
-                result = requests.put(url=f'{auth.endpoint}/Bundle', data=orjson.dumps(bundle_dict, default=_default_json_serializer,
-                                                                                       option=orjson.OPT_APPEND_NEWLINE).decode(), headers=headers)
+                result = session().put(url=f'{auth.endpoint}/Bundle', data=orjson.dumps(bundle_dict, default=_default_json_serializer,
+                                                                                        option=orjson.OPT_APPEND_NEWLINE).decode(), headers=headers)
 
             with open("logs/publish.log", 'a') as f:
                 log_msg = {'timestamp': datetime.now(pytz.UTC).isoformat(), "result": f"{result}"}
                 click.secho('Published project. See logs/publish.log', fg=SUCCESS_COLOR, file=sys.stderr)
                 f.write(json.dumps(log_msg, separators=(',', ':')))
                 f.write('\n')
+            _save_push_state()
             return
 
         if step in ['publish', 'all'] and not fhir_server:
@@ -505,6 +660,7 @@ def push(ctx, step: str, transfer_method: str, overwrite: bool, re_run: bool, wa
                     f.write('\n')
             else:
                 click.secho(f'Auto-publishing not supported for {transfer_method}. Please use --step publish after uploading', fg=ERROR_COLOR, file=sys.stderr)
+            _save_push_state()
 
     except Exception as e:
         click.secho(str(e), fg=ERROR_COLOR, file=sys.stderr)
@@ -513,15 +669,67 @@ def push(ctx, step: str, transfer_method: str, overwrite: bool, re_run: bool, wa
         exit(1)
 
 
+def find_committed(project_id, **criteria) -> list[DVC]:
+    """Look up committed dvc objects by object_id, path, data_path, hash_value or meta identifiers, see ManifestCache.find."""
+    manifest_cache = ManifestCache.default()
+    if not manifest_cache:
+        committed_files, dvc_objects = manifest(project_id)
+        assert set(criteria) == {'object_id'}, f'Without a manifest cache, only object_id lookups are supported. {criteria}'
+        return [_ for _ in dvc_objects if _.object_id == criteria['object_id']]
+    committed_files = set(git_files())
+    with manifest_cache:
+        return [dvc for path, dvc in manifest_cache.find(project_id=project_id, **criteria) if path in committed_files]
+
+
 def manifest(project_id) -> tuple[list[str], list[DVC]]:
-    """Get the committed files and their dvc objects. Initialize dvc objects with this project_id"""
-    committed_files = [_ for _ in git_files() if _.endswith('.dvc')]
-    dvc_objects = [_ for _ in dvc_data(committed_files)]
+    """Get the committed files and their dvc objects, as committed. Initialize dvc objects with this project_id"""
+    committed_files, dvc_objects = committed_dvc_data()
     for _ in dvc_objects:
         _.project_id = project_id
     return committed_files, dvc_objects
 
 
+class PushSnapshot(typing.NamedTuple):
+    """What the pre-push checks read, shared with the rest of push so MANIFEST and META are scanned once."""
+    status: StatusSnapshot
+    manifest: CompactManifest
+    """The committed files, or only the ones changed since the last push, initialized with the project_id."""
+    validation: typing.Optional[typing.Any] = None
+    """The META ValidateDirectoryResult, None if skipped."""
+    head: typing.Optional[str] = None
+    """The commit checked."""
+    diff: typing.Optional[ManifestDiff] = None
+    """The changes since the last push, None if every committed file is in the manifest."""
+
+
+def pre_push_checks(project_id: str, skip_validate: bool = False, incremental: bool = False) -> PushSnapshot:
+    """Check, in this process, what `g3t status` and `g3t meta validate` would: raise an AssertionError describing the first problem.
+
+    Returns the status, the committed manifest initialized with project_id and the validation result.
+    incremental: the manifest only has the .dvc files changed since the last push, if there is a usable one, see changed_since_push.
+    """
+    branch, uncommitted = git_status()
+    assert not uncommitted, "Uncommitted changes found.  Please commit or stash them first."
+
+    # check dvc vs external files, only the ones that changed if `g3t watch` is running
+    snapshot = scan_status('MANIFEST')
+    assert not snapshot.changes, f"# There are {len(snapshot.changes)} data files that you need to update.  See `g3t status`"
+    assert not snapshot.document_reference_out_of_date, \
+        f"DocumentReference.ndjson is out of date. The most recently changed file is {snapshot.latest_file}.  See `g3t status`"
+
+    validation = None
+    if not skip_validate:
+        from gen3_tracker.meta.validator import validate as validate_dir
+        validation = validate_dir('META', project_id=project_id)
+        errors = [f"{_.path}:{_.offset} {_.exception}" for _ in validation.exceptions]
+        assert not errors, "META is not valid, see `g3t meta validate`:\n" + "\n".join(errors)
+
+    head = head_commit()
+    diff = changed_since_push(project_id) if incremental else None
+    committed = CompactManifest.from_objects(project_id, diff.changed) if diff else CompactManifest.committed(project_id)
+    return PushSnapshot(snapshot, committed, validation, head, diff)
+
+
 @cli.command()
 @click.option('--remote',
               type=click.Choice(['gen3', 's3', 'ln', 'scp']),
@@ -557,33 +765,36 @@ def pull(config: Config, remote: str, worker_count: int, data_only: bool):
                     zip_ref.extractall('.')
             click.secho(f"Pulled {snapshot['file_name']}", fg=INFO_COLOR, file=sys.stderr)
 
-        manifest_files, dvc_objects = manifest(config.gen3.project_id)
+        committed = CompactManifest.committed(config.gen3.project_id)
         if remote == 'gen3':
             # download the files
             with Halo(text='Pulling from gen3', spinner='line', placement='right', color='white'):
-                object_ids = [{'object_id': _.object_id} for _ in dvc_objects]  # if not _.out.source_url
+                object_ids = [{'object_id': _} for _ in committed.object_ids]  # if not _.out.source_url
                 current_time = datetime.now().strftime("%Y%m%d%H%M%S")  # Format datetime as you need
                 manifest_file = pathlib.Path(config.work_dir) / f'manifest-{current_time}.json'
                 with open(manifest_file, 'w') as fp:
                     json.dump(object_ids, fp)
-            cmd = f'gen3-client download-multiple --no-prompt --profile {config.gen3.profile}  --manifest {manifest_file} --numparallel {worker_count}'
-            print(cmd)
+            cmd = ['gen3-client', 'download-multiple', '--no-prompt', '--profile', config.gen3.profile,
+                   '--manifest', str(manifest_file), '--numparallel', str(worker_count)]
+            print(command_text(cmd))
             run_command(cmd, no_capture=True)
         elif remote == 's3':
             with Halo(text='Pulling from s3', spinner='line', placement='right', color='white'):
                 if not auth:
                     auth = gen3_tracker.config.ensure_auth(config=config)
-                results = ls(config, metadata={'project_id': config.gen3.project_id}, auth=auth)
-                object_ids = [_.object_id for _ in dvc_objects]
-            for _ in results['records']:
-                if _['did'] in object_ids:
-                    print('aws s3 cp ', _['urls'][0], _['file_name'])
+                object_ids = set(committed.object_ids)
+            with IndexdMirror.default() as mirror:
+                # only the committed files' records, not the project's listing
+                mirror.refresh(config.gen3.project_id, committed.object_ids, auth=auth)
+                for _ in mirror.records(config.gen3.project_id):
+                    if _['did'] in object_ids:
+                        print('aws s3 cp ', _['urls'][0], _['file_name'])
         elif remote == 'ln':
-            for _ in dvc_objects:
-                print(f"ln -s {_.out.realpath} {_.out.path}")
+            for realpath, path in zip(committed.realpaths, committed.data_paths):
+                print(f"ln -s {realpath} {path}")
         elif remote == 'scp':
-            for _ in dvc_objects:
-                print(f"scp USER@HOST:{_.out.realpath} {_.out.path}")
+            for realpath, path in zip(committed.realpaths, committed.data_paths):
+                print(f"scp USER@HOST:{realpath} {path}")
 
         else:
             raise NotImplementedError(f"Remote {remote} not supported.")
@@ -629,7 +840,7 @@ def clone(config, project_id):
                 for _ in meta_files.glob('*.ndjson'):
                     shutil.move(_, 'META/')
                 # add to git
-                run_command('git add META/*.*')
+                git_add(pathlib.Path('META').glob('*.*'))
                 # migrate DocumentReferences to MANIFEST
                 references = meta_index()
                 manifest_files = []
@@ -643,12 +854,12 @@ def clone(config, project_id):
                 # Update the access and modification times of the file
                 os.utime('META/DocumentReference.ndjson', (current_time, current_time))
 
-                run_command('git add MANIFEST/')
-                run_command('git commit -m "migrated from legacy" MANIFEST/ META/ .gitignore')
+                git_add(['MANIFEST'])
+                run_command(['git', 'commit', '-m', 'migrated from legacy', 'MANIFEST/', 'META/', '.gitignore'])
                 shutil.move(zip_filepath, config.work_dir / zip_filepath.name)
 
         click.secho(f"Cloned {snapshot['file_name']}", fg=INFO_COLOR, file=sys.stderr)
-        run_command("git status", no_capture=True)
+        run_command(['git', 'status'], no_capture=True)
 
     except Exception as e:
         click.secho(str(e), fg=ERROR_COLOR, file=sys.stderr)
@@ -690,8 +901,7 @@ def file_name_or_guid(config, object_id) -> (str, pathlib.Path):
             raise ValueError(
                 f"{object_id} was not found in the MANIFEST and does not appear to be an object identifier (GUID).")
     else:
-        committed_files, dvc_objects = manifest(config.gen3.project_id)
-        dvc_objects = [dvc_object for dvc_object in dvc_objects if dvc_object.object_id == object_id]
+        dvc_objects = find_committed(config.gen3.project_id, object_id=object_id)
         assert dvc_objects, f"{object_id} not found in MANIFEST."
         path = pathlib.Path('MANIFEST') / (dvc_objects[0].out.path + ".dvc")
 
@@ -701,35 +911,41 @@ def file_name_or_guid(config, object_id) -> (str, pathlib.Path):
 
 @cli.command("ls")
 @click.option('--long', '-l', 'long_flag', default=False, is_flag=True, help='Long listing format.', show_default=True)
+@click.option('--cached', default=False, is_flag=True, show_default=True,
+              help='List the bucket from the local mirror of indexd, without contacting the server, see `g3t cache sync`.')
+@click.option('--full', default=False, is_flag=True, show_default=True,
+              help="Re-read the project's whole indexd listing. Without it, only the committed files' records are re-read, unless the last full read is over a day old.")
 @click.argument('target', default=None, required=False)
 @click.pass_obj
-def ls_cli(config: Config, long_flag: bool, target: str):
+def ls_cli(config: Config, long_flag: bool, cached: bool, full: bool, target: str):
     """List files in the repository.
     \b
     TARGET wild card match of guid, path or hash.
+    The bucket is every indexd record of the project, listed from the local mirror of indexd, see `g3t cache sync`.
     """
     try:
 
-        with Halo(text='Pulling file list', spinner='line', placement='right', color='white'):
-            auth = gen3_tracker.config.ensure_auth(config=config)
-            results = ls(config, metadata={'project_id': config.gen3.project_id}, auth=auth)
-            indexd_records = results['records']
-            committed_files, dvc_objects = manifest(config.gen3.project_id)
+        mirror = IndexdMirror.default()
+        assert mirror, MISSING_G3T_MESSAGE
+        with Halo(text='Pulling file list', spinner='line', placement='right', color='white'), mirror:
+            committed = CompactManifest.committed(config.gen3.project_id)
+            if cached:
+                assert mirror.state(config.gen3.project_id), "No local mirror of indexd, run `g3t cache sync` first."
+            else:
+                auth = gen3_tracker.config.ensure_auth(config=config)
+                if full or not mirror.synced(config.gen3.project_id):
+                    # every record of the project, e.g. snapshots, META and files pushed by others
+                    mirror.sync(config.gen3.project_id, auth=auth)
+                else:
+                    mirror.refresh(config.gen3.project_id, committed.object_ids, auth=auth)
+            indexd_records = mirror.records(config.gen3.project_id)
             # list all data files
-            dvc_objects = {_.object_id: _ for _ in dvc_objects}
+            rows = {object_id: i for i, object_id in enumerate(committed.object_ids)}
 
-            def _dvc_meta(dvc_object, full=False) -> dict:
-                if not dvc_object:
+            def _dvc_meta(row) -> dict:
+                if row is None:
                     return {}
-                _ = {}
-                if not full and dvc_object.meta:
-                    for k, v in dvc_object.meta.model_dump(exclude_none=True).items():
-                        if v:
-                            _[k] = v
-                else:
-                    _ = dvc_object.model_dump(exclude_none=True)
-                _['object_id'] = dvc_object.object_id
-                return _
+                return {**committed.meta(row), 'object_id': committed.object_ids[row]}
 
             if not long_flag:
                 indexd_records = [
@@ -737,21 +953,25 @@ def ls_cli(config: Config, long_flag: bool, target: str):
                         'did': _['did'],
                         'file_name': _['file_name'],
                         'indexd_created_date': _['created_date'],
-                        'meta': _dvc_meta(dvc_objects.get(_['did'], None)),
+                        'meta': _dvc_meta(rows.get(_['did'], None)),
                         'urls': _['urls']
                     } for _ in indexd_records
                 ]
+            else:
+                indexd_records = list(indexd_records)
 
         bucket_ids = {_['did'] for _ in indexd_records}
 
         uncommitted = pathlib.Path('MANIFEST').glob('**/*.dvc')
         uncommitted = [str(_) for _ in uncommitted]
+        committed_files = set(committed.paths)
         uncommitted = [str(_) for _ in uncommitted if _ not in committed_files]
         uncommitted = [_.model_dump(exclude_none=True) for _ in dvc_data(uncommitted)]
 
         _ = {
             'bucket': indexd_records,
-            'committed': [_dvc_meta(v, full=True) for k, v in dvc_objects.items() if k not in bucket_ids],
+            'committed': [{**_.model_dump(exclude_none=True), 'object_id': _.object_id}
+                          for _ in committed.materialize(i for k, i in rows.items() if k not in bucket_ids)],
             'uncommitted': uncommitted
         }
 
@@ -778,8 +998,10 @@ def ls_cli(config: Config, long_flag: bool, target: str):
 
 @cli.command()
 @click.argument('object_id', metavar='<name>')
+@click.option('--async', 'use_async', is_flag=True, default=False, show_default=True,
+              help='Delete the indexd record with asyncio, see push --async.')
 @click.pass_obj
-def rm(config: Config, object_id: str):
+def rm(config: Config, object_id: str, use_async: bool):
     """Remove a single file from the server index, and MANIFEST. Does not alter META.
     \b
     <name> is a GUID or a data file name.
@@ -791,18 +1013,22 @@ def rm(config: Config, object_id: str):
 
         with Halo(text='Deleting from server', spinner='line', placement='right', color='white'):
             auth = gen3_tracker.config.ensure_auth(config=config)
-            index = Gen3Index(auth)
-            result = index.delete_record(object_id)
+            if use_async:
+                from gen3_tracker.gen3.async_indexd import delete_records
+                result = delete_records(auth, [object_id])[0]
+            else:
+                result = gen3_index(auth).delete_record(object_id)
         if not result:
             if not path:
                 path = ''
             click.secho(f"Failed to delete {object_id} from server. {path}", fg=ERROR_COLOR, file=sys.stderr)
         else:
             click.secho(f"Deleted {object_id} from server. {path}", fg=INFO_COLOR, file=sys.stderr)
+            with IndexdMirror.default() as mirror:
+                mirror.remove([object_id])
 
         with Halo(text='Scanning', spinner='line', placement='right', color='white'):
-            committed_files, dvc_objects = manifest(config.gen3.project_id)
-            dvc_objects = [dvc_object for dvc_object in dvc_objects if dvc_object.object_id == object_id]
+            dvc_objects = find_committed(config.gen3.project_id, object_id=object_id)
             assert dvc_objects, f"{object_id} not found in MANIFEST."
             dvc_object = dvc_objects[0]
             path = pathlib.Path('MANIFEST') / (dvc_object.out.path + ".dvc")
@@ -860,7 +1086,7 @@ def ping(config: Config):
         _ = {'msg': _ + ', '.join(msgs)}
         if auth:
             _['endpoint'] = auth.endpoint
-            user_info = auth.curl('/user/user').json()
+            user_info = curl(auth, '/user/user').json()
             _['username'] = user_info['username']
             buckets = get_buckets(config=config)
             bucket_info = {}
@@ -889,6 +1115,86 @@ def ping(config: Config):
         output.update(_)
 
 
+@cli.group(name="cache")
+def cache_group():
+    """Manage local caches in .g3t/state."""
+    pass
+
+
+@cache_group.command(name="info")
+@click.pass_obj
+def cache_info(config: Config):
+    """Show hash cache entries, hits and misses; manifest cache entries; indexd mirror records; `g3t watch` changes; time spent per command."""
+    with CLIOutput(config=config) as output:
+        hash_cache = HashCache.default()
+        assert hash_cache, MISSING_G3T_MESSAGE
+        with hash_cache, ManifestCache.default() as manifest_cache, IndexdMirror.default() as mirror:
+            output.update({'hash_cache': hash_cache.info(), 'manifest_cache': manifest_cache.info(), 'indexd_mirror': mirror.info()})
+        dirty_set = DirtySet.default()
+        if dirty_set.exists():
+            with dirty_set:
+                output.update({'dirty_set': dirty_set.info()})
+        _ = command_log_path()
+        if _ and _.exists():
+            output.update({'commands': {'path': str(_), 'programs': summarize(_)}})
+
+
+@cache_group.command(name="warm")
+@click.option('--worker_count', '--workers', '-w', default=multiprocessing.cpu_count(), show_default=True, type=int,
+              help='Number of files read concurrently.')
+@click.pass_obj
+def cache_warm(config: Config, worker_count: int):
+    """Calculate the deferred hashes of fingerprinted files, so push does not have to. May be run in the background."""
+    with CLIOutput(config=config) as output:
+        assert HashCache.default(), MISSING_G3T_MESSAGE
+        dvc_objects = [to_dvc(_) for _ in pathlib.Path('MANIFEST').rglob('*.dvc')]
+        completed = complete_pending_hashes(dvc_objects, worker_count=worker_count)
+        output.update({'msg': f"Calculated {len(completed)} deferred hashes."})
+
+
+@cache_group.command(name="sync")
+@click.option('--full', is_flag=True, default=False, show_default=True,
+              help="Re-read the project's whole indexd listing, forgetting records removed from the server. Without it, only the committed files' records.")
+@click.option('--async', 'use_async', is_flag=True, default=False, show_default=True, help='Read the records with asyncio, see push --async.')
+@click.pass_obj
+def cache_sync(config: Config, full: bool, use_async: bool):
+    """Update the local mirror of the project's indexd records, used by push, ls and pull."""
+    with CLIOutput(config=config) as output:
+        mirror = IndexdMirror.default()
+        assert mirror, MISSING_G3T_MESSAGE
+        auth = gen3_tracker.config.ensure_auth(config=config)
+        with mirror:
+            if full:
+                count = mirror.sync(config.gen3.project_id, auth=auth, use_async=use_async)
+            else:
+                count = mirror.refresh(config.gen3.project_id, CompactManifest.committed(config.gen3.project_id).object_ids, auth=auth, use_async=use_async)
+            output.update({'msg': f"Synced {count} indexd records.", 'indexd_mirror': mirror.info()})
+
+
+@cache_group.command(name="compact")
+@click.option('--clear', is_flag=True, default=False, show_default=True, help='Remove all entries, the tracked file index, the manifest cache, the indexd mirror and the command log.')
+@click.pass_obj
+def cache_compact(config: Config, clear: bool):
+    """Evict stale hash cache entries, reclaim space."""
+    with CLIOutput(config=config) as output:
+        hash_cache = HashCache.default()
+        assert hash_cache, MISSING_G3T_MESSAGE
+        with hash_cache:
+            if clear:
+                evicted = hash_cache.clear()
+                TrackedFiles.default().clear()
+                with ManifestCache.default() as manifest_cache:
+                    manifest_cache.clear()
+                with IndexdMirror.default() as mirror:
+                    mirror.clear()
+                _ = command_log_path()
+                if _:
+                    _.unlink(missing_ok=True)
+            else:
+                evicted = hash_cache.compact()
+            output.update({'msg': f"Evicted {evicted} entries.", 'hash_cache': hash_cache.info()})
+
+
 # @cli.command()
 # @click.argument('targets', nargs=-1)
 # @click.pass_obj
@@ -1,37 +1,143 @@
+import asyncio
+import functools
 import logging
+import queue
+import threading
+import typing
 
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_PREFETCH = 4
 
-def ls(config, object_id: str = None, metadata: dict = {}, auth=None):
-    """List files."""
-    from gen3_tracker import Config
-    config: Config = config
-    from gen3.index import Gen3Index
-    index_client = Gen3Index(auth_provider=auth)
 
-    if object_id:
-        if ',' in object_id:
-            object_ids = object_id.split(',')
-        else:
-            object_ids = [object_id]
-        records = index_client.client.bulk_request(dids=object_ids)
-        return {'records': [_.to_json() for _ in records]}
-
-    params = {}
-    project_id = metadata.get('project_id', None)
-    if 'project_id' in metadata:
-        program, project = project_id.split('-')
-        params = {'authz': f"/programs/{program}/projects/{project}"}
-        metadata.pop('project_id')
-    params['metadata'] = metadata
+async def _ls_async(auth, object_ids: list[str] = None, params: dict = None, endpoint: str = None) -> list[dict]:
+    """The records of object_ids, or matching params, see AsyncIndexd."""
+    from gen3_tracker.gen3.async_indexd import AsyncIndexd
+    if object_ids is not None and not object_ids:
+        return []
+    async with AsyncIndexd(auth, endpoint=endpoint) as client:
+        if object_ids is not None:
+            return await client.bulk(object_ids)
+        return [_ async for _ in client.list(params)]
 
-    records = index_client.client.list_with_params(params=params)
+
+def _query(params: dict) -> list[tuple[str, str]]:
+    """indexd's query parameters, metadata and hashes as key:value, see IndexClient.list_with_params."""
+    params = dict(params or {})
+    query = [('metadata', f'{k}:{v}') for k, v in params.pop('metadata', {}).items()]
+    query += [('hash', f'{k}:{v}') for k, v in params.pop('hashes', {}).items()]
+    return query + [(k, str(v)) for k, v in params.items()]
+
+
+def iter_records(auth=None, project_id: str = None, metadata: dict = None, object_ids: list[str] = None,
+                 page_size: int = DEFAULT_PAGE_SIZE, prefetch: int = DEFAULT_PREFETCH, use_async: bool = False,
+                 index_client=None) -> typing.Iterator[dict]:
+    """The indexd records of object_ids, or of a project with metadata, as json, a page at a time.
+
+    The did keyspace is split in prefetch ranges, each read by cursor in parallel up to 2 pages ahead of the consumer,
+    so about 3 * prefetch pages are held, however many records there are.
+    use_async: read them with asyncio instead, see AsyncIndexd, all of them are held.
+    """
+    from gen3_tracker.gen3.async_indexd import BULK_SIZE
+    from gen3_tracker.gen3.indexd import with_retries
+    from gen3_tracker.gen3.session import gen3_index
+    from gen3_tracker.git import ordered_map
+    index_client = index_client or gen3_index(auth)
+
+    if object_ids is not None:
+        if use_async:
+            yield from asyncio.run(_ls_async(auth, object_ids=object_ids, endpoint=index_client.endpoint))
+            return
+        chunks = [object_ids[i:i + BULK_SIZE] for i in range(0, len(object_ids), BULK_SIZE)]
+        for documents in ordered_map(lambda _: with_retries(index_client.client.bulk_request, dids=_), chunks, prefetch):
+            yield from (_.to_json() for _ in documents or [])
+        return
+
+    params = {'metadata': dict(metadata or {})}
+    if project_id:
+        program, project = project_id.split('-')
+        params['authz'] = f"/programs/{program}/projects/{project}"
 
     def _ensure_project_id(record):
         if 'project_id' not in record['metadata'] and project_id:
             record['metadata']['project_id'] = project_id
         return record
 
-    records = [_ensure_project_id(_.to_json()) for _ in records]
+    if use_async:
+        yield from map(_ensure_project_id, asyncio.run(_ls_async(auth, params=params, endpoint=index_client.endpoint)))
+        return
+
+    query = _query(params) + [('limit', str(page_size))]
+
+    def _pages(start: str, end: typing.Optional[str]) -> typing.Iterator[list[dict]]:
+        """The pages of the records with start < did < end, by cursor."""
+        while True:
+            records = with_retries(index_client.client._get, 'index', params=query + ([('start', start)] if start else [])).json()['records']
+            in_range = [_ for _ in records if end is None or _['did'] < end]
+            if in_range:
+                yield [_ensure_project_id(_) for _ in in_range]
+            if len(records) < page_size or len(in_range) < len(records):
+                return
+            start = records[-1]['did']
+
+    # split the did keyspace, e.g. '' < '40' < '80' < 'c0', one cursor per range
+    starts = [''] + [format(i * 256 // prefetch, '02x') for i in range(1, max(1, prefetch))]
+    ranges = [functools.partial(_pages, start, end) for start, end in zip(starts, starts[1:] + [None])]
+    for records in read_ahead(ranges, depth=2):
+        yield from records
+
+
+def read_ahead(sources: list[typing.Callable[[], typing.Iterator]], depth: int) -> typing.Iterator:
+    """The items of each source in order, every source read by its own thread up to depth items ahead of the consumer."""
+    from concurrent.futures import ThreadPoolExecutor
+    done = object()
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=depth) for _ in sources]
+
+    def _put(q: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _read(source, q: queue.Queue):
+        try:
+            for item in source():
+                if not _put(q, item):
+                    return
+            _put(q, done)
+        except BaseException as e:
+            _put(q, e)
+
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        for source, q in zip(sources, queues):
+            executor.submit(_read, source, q)
+        try:
+            for q in queues:
+                while (item := q.get()) is not done:
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+        finally:
+            stop.set()
+
+
+def ls(config, object_id: str = None, metadata: dict = {}, auth=None, use_async: bool = False):
+    """List files, see iter_records to read them a page at a time.
+
+    use_async: read the records with asyncio, the bulk requests of many object_ids are sent together.
+    """
+    from gen3_tracker import Config
+    config: Config = config
+
+    if object_id:
+        return {'records': list(iter_records(auth, object_ids=object_id.split(','), use_async=use_async))}
+
+    metadata = dict(metadata)
+    project_id = metadata.pop('project_id', None)
+    records = list(iter_records(auth, project_id=project_id, metadata=metadata, use_async=use_async))
 
     return {
         'records': records,
@@ -47,28 +153,25 @@ def find_latest_snapshot(auth, config):
         * the latest SNAPSHOT.zip created by the fhir-import-export job on output
         * the latest meta.zip created by the fhir-import-export client on input
     """
-    results = ls(config=config, metadata={'project_id': config.gen3.project_id}, auth=auth)
-    records = 'records' in results and results['records'] or []
-    file_names = [_['file_name'] for _ in records]
-    git_records = [r for r in records if 'git' in r['file_name']]
-    git_records = sorted(git_records, key=lambda d: d['file_name'])
-    download_meta = None
-    if len(git_records) > 0:
-        # most recent metadata, file_name has a timestamp
-        download_meta = git_records[-1]
-    else:
-        logger = logging.getLogger(__name__)
+    # the latest of each kind, the records are read a page at a time
+    latest = {}
+    file_names = []
+    for record in iter_records(auth, project_id=config.gen3.project_id):
+        file_name = record['file_name']
+        if len(file_names) < 100:
+            file_names.append(file_name)
+        for kind in ['git', 'SNAPSHOT.zip', 'meta.zip']:
+            if kind in file_name and (kind not in latest or file_name >= latest[kind]['file_name']):
+                latest[kind] = record
+    logger = logging.getLogger(__name__)
+    # most recent metadata, file_name has a timestamp
+    download_meta = latest.get('git')
+    if not download_meta:
         logger.info(f"No git snapshot found for {config.gen3.project_id}")
-        snapshot_records = [r for r in records if 'SNAPSHOT.zip' in r['file_name']]
-        snapshot_records = sorted(snapshot_records, key=lambda d: d['file_name'])
-        if len(snapshot_records) > 0:
-            download_meta = snapshot_records[-1]
-        else:
+        download_meta = latest.get('SNAPSHOT.zip')
+        if not download_meta:
             logger.info(f"No SNAPSHOT found for {config.gen3.project_id}")
-            meta_records = [r for r in records if 'meta.zip' in r['file_name']]
-            meta_records = sorted(meta_records, key=lambda d: d['file_name'])
-            if len(meta_records) > 0:
-                download_meta = meta_records[-1]
+            download_meta = latest.get('meta.zip')
 
     assert download_meta, f"No git, snapshot or meta files found for {config.gen3.project_id}, file_names: {file_names}"
     return download_meta
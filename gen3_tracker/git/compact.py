@@ -0,0 +1,100 @@
+import array
+import sys
+import typing
+
+import orjson
+
+from gen3_tracker.common import create_object_id, parse_iso_tz_date
+from gen3_tracker.git import DVC, committed_content, committed_objects
+
+
+class ManifestRecord(typing.NamedTuple):
+    """One row of a CompactManifest."""
+    path: str
+    """The .dvc file."""
+    oid: str
+    """The .dvc file's git blob id."""
+    object_id: str
+    data_path: str
+    realpath: typing.Optional[str]
+    size: int
+    hash_type: str
+    hash_value: typing.Optional[str]
+    modified: str
+    meta: dict
+    """The meta identifiers that are set, e.g. patient."""
+
+
+class CompactManifest:
+    """The committed manifest as columns of strings and ints, for diffing million-file projects.
+
+    A pydantic DVC costs a few KB, a row here a few hundred bytes. Full DVC objects are only materialized
+    for the rows that are sent, see materialize. Hash types are interned, meta identifiers are kept as json.
+    """
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.paths: list[str] = []
+        self.oids: list[str] = []
+        self.object_ids: list[str] = []
+        self.data_paths: list[str] = []
+        self.realpaths: list[typing.Optional[str]] = []
+        self.sizes = array.array('q')
+        self.hash_types: list[str] = []
+        self.hash_values: list[typing.Optional[str]] = []
+        self.modified: list[str] = []
+        self.metas: list[typing.Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @classmethod
+    def committed(cls, project_id: str) -> 'CompactManifest':
+        """The committed .dvc files, read from git objects, see committed_content."""
+        return cls.from_objects(project_id, committed_objects())
+
+    @classmethod
+    def from_objects(cls, project_id: str, objects: list[tuple[str, str]]) -> 'CompactManifest':
+        """The .dvc files of (path, blob id)s, e.g. the ones changed between two commits."""
+        manifest = cls(project_id)
+        for (path, oid), yaml_data in zip(objects, committed_content(objects)):
+            manifest.append(path, oid, yaml_data)
+        return manifest
+
+    def append(self, path: str, oid: str, yaml_data: dict):
+        """Add the validated content of a .dvc file."""
+        out = yaml_data['outs'][0]
+        hash_type = out['hash']
+        meta = {k: v for k, v in (yaml_data.get('meta') or {}).items() if v}
+        self.paths.append(path)
+        self.oids.append(oid)
+        self.object_ids.append(out.get('object_id') or (create_object_id(out['path'], self.project_id) if self.project_id else None))
+        self.data_paths.append(out['path'])
+        self.realpaths.append(out.get('realpath'))
+        self.sizes.append(out['size'])
+        self.hash_types.append(sys.intern(hash_type))
+        self.hash_values.append(out.get(hash_type))
+        self.modified.append(parse_iso_tz_date(out['modified']))
+        # orjson's bytes over-allocate, a str is exactly sized
+        self.metas.append(orjson.dumps(meta).decode() if meta else None)
+
+    def record(self, i: int) -> ManifestRecord:
+        """The i-th row."""
+        return ManifestRecord(self.paths[i], self.oids[i], self.object_ids[i], self.data_paths[i], self.realpaths[i], self.sizes[i],
+                              self.hash_types[i], self.hash_values[i], self.modified[i], self.meta(i))
+
+    def meta(self, i: int) -> dict:
+        """The meta identifiers of the i-th row that are set."""
+        return orjson.loads(self.metas[i]) if self.metas[i] else {}
+
+    def __iter__(self) -> typing.Iterator[ManifestRecord]:
+        return (self.record(i) for i in range(len(self)))
+
+    def materialize(self, indices: typing.Iterable[int] = None) -> list[DVC]:
+        """The full DVC objects of the rows, all of them by default, initialized with the project_id."""
+        indices = range(len(self)) if indices is None else list(indices)
+        objects = [(self.paths[i], self.oids[i]) for i in indices]
+        dvc_objects = [DVC.from_trusted(_) for _ in committed_content(objects)]
+        for _ in dvc_objects:
+            _.project_id = self.project_id
+        return dvc_objects
@@ -0,0 +1,368 @@
+import hashlib
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+import typing
+import zlib
+
+from gen3_tracker.common import state_dir, ACCEPTABLE_HASHES
+
+HASH_CACHE_NAME = 'hash-cache.sqlite'
+DEFAULT_ETAG_PART_SIZE = 8 * 1024 * 1024
+"""The default multipart chunk size of the aws cli and boto3."""
+DEFAULT_BUFFER_SIZE = 4 * 1024 * 1024
+"""Large reads amortize the syscall and, on Lustre/NFS, the round trip per read."""
+FINGERPRINT_VERSION = 'fp1'
+DEFAULT_FINGERPRINT_SAMPLE_SIZE = 4 * 1024 * 1024
+
+
+class _CRC:
+    """hashlib-like wrapper around zlib.crc32."""
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self) -> str:
+        return f"{self.value & 0xffffffff:08x}"
+
+
+class _ETag:
+    """hashlib-like S3 multipart ETag: md5 of the concatenated part md5s, suffixed with the part count.
+
+    A file that fits in a single part has the plain md5 as its ETag.
+    """
+
+    def __init__(self, part_size: int = DEFAULT_ETAG_PART_SIZE):
+        assert part_size > 0, f'Invalid etag part size {part_size}'
+        self.part_size = part_size
+        self.part = hashlib.md5()
+        self.part_remaining = part_size
+        self.part_digests = []
+
+    def update(self, data):
+        view = memoryview(data)
+        while len(view) > 0:
+            if self.part_remaining == 0:
+                self.part_digests.append(self.part.digest())
+                self.part = hashlib.md5()
+                self.part_remaining = self.part_size
+            chunk = view[:self.part_remaining]
+            self.part.update(chunk)
+            self.part_remaining -= len(chunk)
+            view = view[len(chunk):]
+
+    def hexdigest(self) -> str:
+        if not self.part_digests:
+            return self.part.hexdigest()
+        digests = self.part_digests + [self.part.digest()]
+        return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+
+def _new_hasher(hash_type: str, etag_part_size: int = DEFAULT_ETAG_PART_SIZE):
+    """Create a hashlib-like object for an acceptable hash type."""
+    assert hash_type in ACCEPTABLE_HASHES, f'Hash type {hash_type} is not supported, should be one of {", ".join(ACCEPTABLE_HASHES)}'
+    if hash_type == 'crc':
+        return _CRC()
+    if hash_type == 'etag':
+        return _ETag(etag_part_size)
+    return hashlib.new(hash_type)
+
+
+def read_blocks(file_name: typing.Union[str, pathlib.Path], buffer_size: int = DEFAULT_BUFFER_SIZE,
+                read_ahead: bool = True) -> typing.Iterator[memoryview]:
+    """Read a file into large reusable buffers, yield a view of each filled block.
+
+    With read_ahead, a thread fills the next buffer while the caller consumes the current one,
+    so I/O overlaps hashing (hashlib and zlib release the GIL) even for a single file.
+    A yielded view is only valid until the next block is requested.
+    """
+    with open(file_name, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if not read_ahead or size <= buffer_size:
+            buffer = bytearray(min(buffer_size, max(size, 1)))
+            view = memoryview(buffer)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    return
+                yield view[:n]
+
+        buffers = [bytearray(buffer_size), bytearray(buffer_size)]
+        free = queue.Queue()
+        filled = queue.Queue()
+        for i in range(len(buffers)):
+            free.put(i)
+        stop = threading.Event()
+
+        def _reader():
+            try:
+                while not stop.is_set():
+                    i = free.get()
+                    if i is None:
+                        break
+                    n = f.readinto(buffers[i])
+                    filled.put((i, n))
+                    if not n:
+                        break
+            except Exception as e:  # noqa: surface read errors to the consumer
+                filled.put((None, e))
+
+        reader = threading.Thread(target=_reader, daemon=True)
+        reader.start()
+        try:
+            while True:
+                i, n = filled.get()
+                if i is None:
+                    raise n
+                if not n:
+                    break
+                yield memoryview(buffers[i])[:n]
+                free.put(i)
+        finally:
+            stop.set()
+            free.put(None)
+            reader.join()
+
+
+def calculate_hashes(hash_types: typing.Iterable[str], file_name: typing.Union[str, pathlib.Path],
+                     etag_part_size: int = DEFAULT_ETAG_PART_SIZE, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                     read_ahead: bool = True) -> dict[str, str]:
+    """Read the file once, feed every requested hash from the same buffer. Return {hash_type: value}."""
+    hashers = {hash_type: _new_hasher(hash_type, etag_part_size) for hash_type in hash_types}
+    assert hashers, 'At least one hash type is required'
+    for block in read_blocks(file_name, buffer_size=buffer_size, read_ahead=read_ahead):
+        for hasher in hashers.values():
+            hasher.update(block)
+    return {hash_type: hasher.hexdigest() for hash_type, hasher in hashers.items()}
+
+
+class Fingerprint(typing.NamedTuple):
+    """A cheap identity of a large file: its size, mtime and a digest of its first, middle and last sample_size bytes."""
+    sample_size: int
+    size: int
+    mtime_ns: int
+    digest: str
+
+    def __str__(self):
+        return f"{FINGERPRINT_VERSION}:{self.sample_size}:{self.size}:{self.mtime_ns}:{self.digest}"
+
+    @classmethod
+    def parse(cls, value: str) -> 'Fingerprint':
+        version, sample_size, size, mtime_ns, digest = value.split(':')
+        assert version == FINGERPRINT_VERSION, f'Unsupported fingerprint {value}'
+        return cls(int(sample_size), int(size), int(mtime_ns), digest)
+
+
+def _sample_digest(file_name: typing.Union[str, pathlib.Path], size: int, sample_size: int) -> str:
+    """blake2b of the first, middle and last sample_size bytes, or of the whole file if it is smaller than three samples."""
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(file_name, 'rb', buffering=0) as f:
+        if size <= 3 * sample_size:
+            offsets = [0]
+            sample_size = size
+        else:
+            offsets = [0, (size - sample_size) // 2, size - sample_size]
+        for offset in offsets:
+            hasher.update(os.pread(f.fileno(), sample_size, offset))
+    return hasher.hexdigest()
+
+
+def fingerprint(file_name: typing.Union[str, pathlib.Path], stat_result: os.stat_result = None,
+                sample_size: int = DEFAULT_FINGERPRINT_SAMPLE_SIZE) -> Fingerprint:
+    """Fingerprint a file, reads at most 3 * sample_size bytes."""
+    assert sample_size > 0, f'Invalid fingerprint sample size {sample_size}'
+    if stat_result is None:
+        stat_result = os.stat(file_name)
+    return Fingerprint(sample_size, stat_result.st_size, stat_result.st_mtime_ns, _sample_digest(file_name, stat_result.st_size, sample_size))
+
+
+def fingerprint_changed(value: str, file_name: typing.Union[str, pathlib.Path], stat_result: os.stat_result = None) -> bool:
+    """True if the file no longer matches the fingerprint.
+
+    A different size is a change, the same mtime is not; if only the mtime differs (i.e. touch, copy) the samples decide.
+    """
+    expected = Fingerprint.parse(value)
+    if stat_result is None:
+        stat_result = os.stat(file_name)
+    if stat_result.st_size != expected.size:
+        return True
+    if stat_result.st_mtime_ns == expected.mtime_ns:
+        return False
+    return _sample_digest(file_name, stat_result.st_size, expected.sample_size) != expected.digest
+
+
+def cache_hash_type(hash_type: str, etag_part_size: int = DEFAULT_ETAG_PART_SIZE) -> str:
+    """The hash type name used as a cache key, etags depend on the part size."""
+    if hash_type == 'etag':
+        return f'etag:{etag_part_size}'
+    return hash_type
+
+
+def stat_key(stat_result: os.stat_result) -> tuple[int, int, int, int]:
+    """The cache key of a file: (device, inode, size, mtime_ns)."""
+    return stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns
+
+
+class HashCache:
+    """Persistent cache of file hashes, keyed by (device, inode, size, mtime_ns).
+
+    An unchanged file keeps its key, so it is never re-read.  Changing the file's content or
+    replacing it changes the key; stale rows are removed by `compact`.
+    """
+
+    def __init__(self, db_name: typing.Union[str, pathlib.Path]):
+        self.db_name = db_name
+        self.connection = None
+        self.hits = 0
+        self.misses = 0
+
+    def connect(self) -> sqlite3.Connection:
+        """Establish database connection if not established, return connection."""
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.db_name, timeout=30)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS hashes (
+                    device INTEGER,
+                    inode INTEGER,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    hash_type TEXT,
+                    hash_value TEXT,
+                    path TEXT,
+                    PRIMARY KEY (device, inode, size, mtime_ns, hash_type)
+                )
+            """)
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER
+                )
+            """)
+        return self.connection
+
+    def disconnect(self) -> None:
+        """Flush counters, clean up database connection."""
+        if self.connection:
+            self._flush_counters()
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disconnect()
+
+    @classmethod
+    def default(cls) -> typing.Optional['HashCache']:
+        """The project's cache in the state directory, None if not in a project root."""
+        _ = state_dir()
+        if not _:
+            return None
+        return cls(_ / HASH_CACHE_NAME)
+
+    def get(self, stat_result: os.stat_result, hash_type: str) -> typing.Optional[str]:
+        """Return the cached hash for this stat, or None."""
+        row = self.connect().execute(
+            "SELECT hash_value FROM hashes WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ? AND hash_type = ?",
+            (*stat_key(stat_result), hash_type)
+        ).fetchone()
+        if row:
+            self.hits += 1
+            return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, stat_result: os.stat_result, hash_type: str, hash_value: str, path: typing.Union[str, pathlib.Path] = None):
+        """Save the hash for this stat."""
+        connection = self.connect()
+        connection.execute(
+            "INSERT OR REPLACE INTO hashes (device, inode, size, mtime_ns, hash_type, hash_value, path) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*stat_key(stat_result), hash_type, hash_value, str(path) if path else None)
+        )
+        connection.commit()
+
+    def hash(self, hash_type: str, file_name: typing.Union[str, pathlib.Path], stat_result: os.stat_result = None) -> str:
+        """Return the hash of the file, read it only if the cache misses."""
+        return self.hashes([hash_type], file_name, stat_result)[hash_type]
+
+    def hashes(self, hash_types: typing.Iterable[str], file_name: typing.Union[str, pathlib.Path], stat_result: os.stat_result = None,
+               etag_part_size: int = DEFAULT_ETAG_PART_SIZE) -> dict[str, str]:
+        """Return the hashes of the file, read it once for all the hash types the cache misses."""
+        if stat_result is None:
+            stat_result = os.stat(file_name)
+        hashes = {}
+        for hash_type in hash_types:
+            hash_value = self.get(stat_result, cache_hash_type(hash_type, etag_part_size))
+            if hash_value is not None:
+                hashes[hash_type] = hash_value
+        missing = [_ for _ in hash_types if _ not in hashes]
+        if missing:
+            calculated = calculate_hashes(missing, file_name, etag_part_size)
+            for hash_type, hash_value in calculated.items():
+                self.put(stat_result, cache_hash_type(hash_type, etag_part_size), hash_value, os.path.abspath(file_name))
+            hashes.update(calculated)
+        return {hash_type: hashes[hash_type] for hash_type in hash_types}
+
+    def _flush_counters(self):
+        """Add this session's hits and misses to the persisted counters."""
+        for name, value in [('hits', self.hits), ('misses', self.misses)]:
+            if not value:
+                continue
+            self.connection.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, value)
+            )
+        self.hits = self.misses = 0
+
+    def info(self) -> dict:
+        """Summary of the cache: entry count, persisted hits and misses."""
+        connection = self.connect()
+        self._flush_counters()
+        connection.commit()
+        counters = dict(connection.execute("SELECT name, value FROM counters").fetchall())
+        entries = connection.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        return {
+            'path': str(self.db_name),
+            'entries': entries,
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+        }
+
+    def compact(self) -> int:
+        """Evict entries whose file no longer exists or has changed, reclaim space. Return the number evicted."""
+        connection = self.connect()
+        stale = []
+        for row in connection.execute("SELECT device, inode, size, mtime_ns, hash_type, path FROM hashes"):
+            key, hash_type, path = tuple(row[:4]), row[4], row[5]
+            try:
+                if not path or stat_key(os.stat(path)) != key:
+                    stale.append((*key, hash_type))
+            except OSError:
+                stale.append((*key, hash_type))
+        connection.executemany(
+            "DELETE FROM hashes WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ? AND hash_type = ?",
+            stale
+        )
+        connection.commit()
+        connection.execute('VACUUM')
+        return len(stale)
+
+    def clear(self) -> int:
+        """Remove all entries and counters. Return the number removed."""
+        connection = self.connect()
+        count = connection.execute("DELETE FROM hashes").rowcount
+        connection.execute("DELETE FROM counters")
+        self.hits = self.misses = 0
+        connection.commit()
+        connection.execute('VACUUM')
+        return count
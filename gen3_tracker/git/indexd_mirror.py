@@ -0,0 +1,169 @@
+import pathlib
+import sqlite3
+import time
+import typing
+
+import orjson
+
+from gen3_tracker.common import state_dir
+from gen3_tracker.git.cloner import iter_records
+
+INDEXD_MIRROR_NAME = 'indexd.sqlite'
+BATCH_SIZE = 1000
+"""Records per insert, dids per query."""
+SYNC_MAX_AGE_NS = 24 * 60 * 60 * 10 ** 9
+"""A sync older than this is repeated by `g3t ls`."""
+
+
+class IndexdMirror:
+    """Local copy of a project's indexd records, so push, ls and pull do not re-read the whole listing.
+
+    refresh re-reads only the records of some dids, e.g. the committed files or the ones push indexed.
+    sync re-reads the project's whole listing, a page at a time, and replaces the copy, see `g3t cache sync --full`;
+    `g3t ls` syncs a mirror that was never synced, or not within SYNC_MAX_AGE_NS, and refreshes the committed files otherwise.
+    indexd's listing has no updated_date filter, so records of other files changed on the server by others are found by the next sync.
+    A sync or refresh that fails leaves the copy as it was.
+    """
+
+    def __init__(self, db_name: typing.Union[str, pathlib.Path]):
+        self.db_name = db_name
+        self.connection = None
+
+    def connect(self) -> sqlite3.Connection:
+        """Establish database connection if not established, return connection."""
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.db_name, timeout=30)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS record (
+                    did TEXT PRIMARY KEY,
+                    project_id TEXT,
+                    updated_date TEXT,
+                    file_name TEXT,
+                    content BLOB,
+                    generation INTEGER
+                )
+            """)
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS state (
+                    project_id TEXT PRIMARY KEY,
+                    generation INTEGER,
+                    synced_ns INTEGER,
+                    refreshed_ns INTEGER
+                )
+            """)
+            for column in ['project_id', 'file_name']:
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS record_{column} ON record ({column})")
+        return self.connection
+
+    def disconnect(self) -> None:
+        """Clean up database connection."""
+        if self.connection:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type and self.connection:
+            # a failed sync or refresh leaves the mirror as it was
+            self.connection.rollback()
+        self.disconnect()
+
+    @classmethod
+    def default(cls) -> typing.Optional['IndexdMirror']:
+        """The project's mirror in the state directory, None if not in a project root."""
+        _ = state_dir()
+        if not _:
+            return None
+        return cls(_ / INDEXD_MIRROR_NAME)
+
+    def _put(self, project_id: str, records: typing.Iterable[dict], generation: int) -> int:
+        """Save records, a batch at a time, return the number saved."""
+        connection = self.connect()
+        count = 0
+        batch = []
+        for record in records:
+            batch.append((record['did'], project_id, record.get('updated_date'), record.get('file_name'), orjson.dumps(record), generation))
+            if len(batch) == BATCH_SIZE:
+                connection.executemany("INSERT OR REPLACE INTO record VALUES (?, ?, ?, ?, ?, ?)", batch)
+                count += len(batch)
+                batch = []
+        connection.executemany("INSERT OR REPLACE INTO record VALUES (?, ?, ?, ?, ?, ?)", batch)
+        return count + len(batch)
+
+    def state(self, project_id: str) -> typing.Optional[dict]:
+        """When the project was last synced and refreshed, None if it never was."""
+        row = self.connect().execute("SELECT generation, synced_ns, refreshed_ns FROM state WHERE project_id = ?", (project_id,)).fetchone()
+        return dict(zip(['generation', 'synced_ns', 'refreshed_ns'], row)) if row else None
+
+    def synced(self, project_id: str, max_age_ns: int = SYNC_MAX_AGE_NS) -> bool:
+        """True if the project's whole listing was read within max_age_ns."""
+        synced_ns = (self.state(project_id) or {}).get('synced_ns')
+        return bool(synced_ns) and time.time_ns() - synced_ns < max_age_ns
+
+    def sync(self, project_id: str, auth=None, use_async: bool = False, index_client=None) -> int:
+        """Replace the project's records with its listing, see iter_records, return the number of records."""
+        connection = self.connect()
+        state = self.state(project_id) or {'generation': 0, 'refreshed_ns': None}
+        generation = state['generation'] + 1
+        with connection:
+            count = self._put(project_id, iter_records(auth, project_id=project_id, use_async=use_async, index_client=index_client), generation)
+            # records not listed were removed from the server
+            connection.execute("DELETE FROM record WHERE project_id = ? AND generation < ?", (project_id, generation))
+            connection.execute("INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)", (project_id, generation, time.time_ns(), state['refreshed_ns']))
+        return count
+
+    def refresh(self, project_id: str, object_ids: list[str], auth=None, use_async: bool = False, index_client=None) -> int:
+        """Re-read the records of object_ids, forget the ones that are not on the server, return the number found."""
+        object_ids = list(object_ids)
+        if not object_ids:
+            return 0
+        connection = self.connect()
+        state = self.state(project_id) or {'generation': 0, 'synced_ns': None}
+        with connection:
+            connection.executemany("DELETE FROM record WHERE did = ?", [(_,) for _ in object_ids])
+            count = self._put(project_id, iter_records(auth, object_ids=object_ids, use_async=use_async, index_client=index_client), state['generation'])
+            connection.execute("INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)", (project_id, state['generation'], state['synced_ns'], time.time_ns()))
+        return count
+
+    def remove(self, object_ids: typing.Iterable[str]):
+        """Forget the records of object_ids, e.g. after they were deleted from the server."""
+        with self.connect() as connection:
+            connection.executemany("DELETE FROM record WHERE did = ?", [(_,) for _ in object_ids])
+
+    def dids(self, project_id: str, object_ids: list[str] = None) -> dict[str, str]:
+        """The updated_date of the project's records, or of the records of object_ids, by did."""
+        connection = self.connect()
+        if object_ids is None:
+            return dict(connection.execute("SELECT did, updated_date FROM record WHERE project_id = ?", (project_id,)))
+        dids = {}
+        for i in range(0, len(object_ids), BATCH_SIZE):
+            batch = object_ids[i:i + BATCH_SIZE]
+            dids.update(connection.execute(f"SELECT did, updated_date FROM record WHERE did IN ({', '.join('?' * len(batch))})", batch))
+        return dids
+
+    def records(self, project_id: str) -> typing.Iterator[dict]:
+        """The project's records, as indexd returned them, in did order."""
+        for content, in self.connect().execute("SELECT content FROM record WHERE project_id = ? ORDER BY did", (project_id,)):
+            yield orjson.loads(content)
+
+    def info(self) -> dict:
+        """Summary of the mirror."""
+        connection = self.connect()
+        projects = {}
+        for project_id, generation, synced_ns, refreshed_ns in connection.execute("SELECT project_id, generation, synced_ns, refreshed_ns FROM state"):
+            count = connection.execute("SELECT COUNT(*) FROM record WHERE project_id = ?", (project_id,)).fetchone()[0]
+            projects[project_id] = {'records': count, 'synced_ns': synced_ns, 'refreshed_ns': refreshed_ns}
+        return {'path': str(self.db_name), 'projects': projects}
+
+    def clear(self) -> int:
+        """Remove all records, return the number removed."""
+        with self.connect() as connection:
+            count = connection.execute("DELETE FROM record").rowcount
+            connection.execute("DELETE FROM state")
+        return count
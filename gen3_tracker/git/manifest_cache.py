@@ -0,0 +1,220 @@
+import os
+import pathlib
+import sqlite3
+import time
+import typing
+
+import orjson
+
+from gen3_tracker.common import state_dir
+from gen3_tracker.git import DVC
+from gen3_tracker.git.objects import GitObjectReader
+from gen3_tracker.git.serializer import load_dvc, loads_dvc
+
+MANIFEST_CACHE_NAME = 'manifest.sqlite'
+META_IDENTIFIERS = ['patient', 'specimen', 'observation', 'task']
+BLOB_BATCH_SIZE = 512
+"""Blob ids per query, below sqlite's limit on host parameters."""
+RACY_NS = 2 * 10 ** 9
+"""A file modified this close to when it was cached may have changed again within the filesystem's timestamp resolution, re-read it."""
+
+
+class ManifestCache:
+    """Persistent cache of parsed .dvc files, keyed by path and invalidated by (size, mtime_ns).
+
+    Content is validated once, when it is cached; cached content is trusted, see DVC.from_trusted.
+
+    Only new or changed .dvc files are read and parsed; rows are indexed by object_id, data path, hash and meta identifiers.
+    Like git's index, a row is only trusted if the file was last modified well before the row was written.
+    """
+
+    def __init__(self, db_name: typing.Union[str, pathlib.Path], manifest_path: typing.Union[str, pathlib.Path] = 'MANIFEST'):
+        self.db_name = db_name
+        self.manifest_path = pathlib.Path(manifest_path)
+        self.connection = None
+        self.parsed = 0
+
+    def connect(self) -> sqlite3.Connection:
+        """Establish database connection if not established, return connection."""
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.db_name, timeout=30)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS dvc (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    object_id TEXT,
+                    data_path TEXT,
+                    hash_type TEXT,
+                    hash_value TEXT,
+                    source_url TEXT,
+                    patient TEXT,
+                    specimen TEXT,
+                    observation TEXT,
+                    task TEXT,
+                    content BLOB,
+                    cached_ns INTEGER
+                )
+            """)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS blob (oid TEXT PRIMARY KEY, content BLOB)")
+            for column in ['object_id', 'data_path', 'hash_value'] + META_IDENTIFIERS:
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS dvc_{column} ON dvc ({column})")
+        return self.connection
+
+    def disconnect(self) -> None:
+        """Clean up database connection."""
+        if self.connection:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disconnect()
+
+    @classmethod
+    def default(cls) -> typing.Optional['ManifestCache']:
+        """The project's cache in the state directory, None if not in a project root."""
+        _ = state_dir()
+        if not _:
+            return None
+        return cls(_ / MANIFEST_CACHE_NAME)
+
+    def _put(self, path: str, stat_result: os.stat_result) -> dict:
+        """Parse a .dvc file, save its row, return the parsed content."""
+        yaml_data = load_dvc(path)
+        dvc = DVC.model_validate(yaml_data)
+        meta = dvc.meta.model_dump() if dvc.meta else {}
+        self.connect().execute(
+            "INSERT OR REPLACE INTO dvc VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, stat_result.st_size, stat_result.st_mtime_ns, dvc.out.object_id, dvc.out.path, dvc.out.hash, dvc.out.hash_value, dvc.out.source_url,
+             *[meta.get(_) for _ in META_IDENTIFIERS], orjson.dumps(yaml_data), time.time_ns())
+        )
+        self.parsed += 1
+        return yaml_data
+
+    def load(self, paths: typing.Iterable[typing.Union[str, pathlib.Path]],
+             stat_results: typing.Iterable[os.stat_result] = None) -> typing.Iterator[DVC]:
+        """Yield the DVC of each .dvc path, in order, parsing only the files that changed since they were cached.
+        stat_results: the paths' stat, if the caller already has them."""
+        connection = self.connect()
+        paths = list(paths)
+        stat_results = list(stat_results) if stat_results is not None else [None] * len(paths)
+        for path, stat_result in zip(paths, stat_results):
+            path = os.path.normpath(path)
+            if stat_result is None:
+                stat_result = os.stat(path)
+            row = connection.execute("SELECT size, mtime_ns, cached_ns, content FROM dvc WHERE path = ?", (path,)).fetchone()
+            if row and _fresh(row[:3], stat_result):
+                yaml_data = orjson.loads(row[3])
+            else:
+                yaml_data = self._put(path, stat_result)
+            yield DVC.from_trusted(yaml_data)
+        connection.commit()
+
+    def committed_content(self, objects: typing.Iterable[tuple[str, str]], reader: GitObjectReader,
+                          batch_size: int = BLOB_BATCH_SIZE) -> typing.Iterator[dict]:
+        """Yield the validated content of each committed (path, blob id), in order, a batch at a time.
+        Blobs are immutable, so parsed and validated content is cached by id, only new blobs are read and parsed."""
+        connection = self.connect()
+        objects = list(objects)
+        for i in range(0, len(objects), batch_size):
+            batch = objects[i:i + batch_size]
+            oids = list(dict.fromkeys(oid for _, oid in batch))
+            cached = dict(connection.execute(f"SELECT oid, content FROM blob WHERE oid IN ({', '.join('?' * len(oids))})", oids).fetchall())
+            misses = {oid: path for path, oid in batch if oid not in cached}
+            for oid, content in reader.read_many(misses):
+                assert content is not None, f"Missing git object {oid} {misses[oid]}"
+                yaml_data = loads_dvc(content)
+                DVC.model_validate(yaml_data)
+                cached[oid] = orjson.dumps(yaml_data)
+                connection.execute("INSERT OR REPLACE INTO blob VALUES (?, ?)", (oid, cached[oid]))
+                self.parsed += 1
+            if misses:
+                connection.commit()
+            for _, oid in batch:
+                yield orjson.loads(cached[oid])
+
+    def refresh(self) -> int:
+        """Bring the cache up to date with the MANIFEST directory: parse new and changed files, forget removed ones. Return the number parsed."""
+        connection = self.connect()
+        cached = {_[0]: _[1:] for _ in connection.execute("SELECT path, size, mtime_ns, cached_ns FROM dvc")}
+        parsed = self.parsed
+        for path, stat_result in scan_dvc_files(str(self.manifest_path)):
+            row = cached.pop(path, None)
+            if not (row and _fresh(row, stat_result)):
+                self._put(path, stat_result)
+        connection.executemany("DELETE FROM dvc WHERE path = ?", [(_,) for _ in cached])
+        connection.commit()
+        return self.parsed - parsed
+
+    def find(self, object_id: str = None, path: str = None, data_path: str = None, hash_value: str = None,
+             project_id: str = None, refresh: bool = True, **meta) -> list[tuple[str, DVC]]:
+        """Return the (.dvc path, DVC) matching all the criteria, in path order.
+
+        meta: patient, specimen, observation or task identifiers.
+        project_id: initializes the DVC, and finds legacy files that do not record their object_id.
+        """
+        assert all(_ in META_IDENTIFIERS for _ in meta), f'Unknown criteria {list(meta)}, expected one of {META_IDENTIFIERS}'
+        if refresh:
+            self.refresh()
+        criteria = {'path': path, 'data_path': data_path, 'hash_value': hash_value, **meta}
+        criteria = {k: v for k, v in criteria.items() if v is not None}
+        where = [f"{k} = ?" for k in criteria]
+        params = list(criteria.values())
+        if object_id:
+            if project_id:
+                where.append("(object_id = ? OR object_id IS NULL)")
+            else:
+                where.append("object_id = ?")
+            params.append(object_id)
+        sql = "SELECT path, content FROM dvc"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        results = []
+        for _path, content in self.connect().execute(sql + " ORDER BY path", params):
+            dvc = DVC.from_trusted(orjson.loads(content))
+            if project_id:
+                dvc.project_id = project_id
+            if object_id and dvc.object_id != object_id:
+                continue
+            results.append((_path, dvc))
+        return results
+
+    def info(self) -> dict:
+        """Summary of the cache."""
+        entries = self.connect().execute("SELECT COUNT(*) FROM dvc").fetchone()[0]
+        blobs = self.connect().execute("SELECT COUNT(*) FROM blob").fetchone()[0]
+        return {'path': str(self.db_name), 'entries': entries, 'blobs': blobs}
+
+    def clear(self) -> int:
+        """Remove all entries, return the number removed."""
+        connection = self.connect()
+        count = connection.execute("DELETE FROM dvc").rowcount
+        connection.execute("DELETE FROM blob")
+        connection.commit()
+        return count
+
+
+def _fresh(row: tuple[int, int, int], stat_result: os.stat_result) -> bool:
+    """True if the cached (size, mtime_ns, cached_ns) row is still valid for the file."""
+    size, mtime_ns, cached_ns = row
+    return size == stat_result.st_size and mtime_ns == stat_result.st_mtime_ns and mtime_ns < cached_ns - RACY_NS
+
+
+def scan_dvc_files(directory: str) -> typing.Iterator[tuple[str, os.stat_result]]:
+    """Yield (path, stat) of the .dvc files under directory, one stat per file."""
+    if not os.path.isdir(directory):
+        return
+    with os.scandir(directory) as it:
+        entries = list(it)
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from scan_dvc_files(entry.path)
+        elif entry.name.endswith('.dvc'):
+            yield entry.path, entry.stat()
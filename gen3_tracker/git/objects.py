@@ -0,0 +1,88 @@
+import subprocess
+import threading
+import typing
+
+
+class GitObjectReader:
+    """A long-lived `git cat-file --batch`, reads committed content by object id or `<rev>:<path>`, one process for all reads.
+
+    Reads do not depend on the working tree. Use as a context manager, or call close().
+    """
+
+    def __init__(self, cwd: str = None):
+        self.cwd = cwd
+        self.process = None
+        self.lock = threading.Lock()
+
+    def start(self) -> subprocess.Popen:
+        """Start the git process if not started, return it."""
+        if self.process is None:
+            self.process = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=self.cwd,
+                                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return self.process
+
+    def close(self):
+        if self.process:
+            self.process.stdin.close()
+            self.process.stdout.close()
+            self.process.wait()
+            self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _request(name: str) -> bytes:
+        assert '\n' not in name, f"Object names can not contain a newline {name!r}"
+        return name.encode() + b'\n'
+
+    def _response(self) -> typing.Optional[bytes]:
+        """Read one response, None if the object does not exist."""
+        stdout = self.process.stdout
+        header = stdout.readline()
+        assert header, "git cat-file exited"
+        parts = header.split()
+        if parts[-1] in (b'missing', b'ambiguous'):
+            # <name> missing, <name> ambiguous, the name may contain spaces
+            return None
+        content = stdout.read(int(parts[-1]))
+        stdout.read(1)  # the newline after the content
+        return content
+
+    def read(self, name: str) -> typing.Optional[bytes]:
+        """The content of an object id or `<rev>:<path>`, None if it does not exist."""
+        with self.lock:
+            process = self.start()
+            process.stdin.write(self._request(name))
+            process.stdin.flush()
+            return self._response()
+
+    def read_many(self, names: typing.Iterable[str]) -> typing.Iterator[tuple[str, typing.Optional[bytes]]]:
+        """Yield (name, content) in order; requests are streamed by a writer thread while responses are read.
+        Other reads wait until the iteration completes."""
+        names = list(names)
+        with self.lock:
+            process = self.start()
+
+            def write():
+                for name in names:
+                    process.stdin.write(self._request(name))
+                process.stdin.flush()
+
+            writer = threading.Thread(target=write, daemon=True)
+            writer.start()
+            count = 0
+            try:
+                for name in names:
+                    content = self._response()
+                    count += 1
+                    yield name, content
+            finally:
+                # keep the stream in sync if the caller stopped early
+                for _ in names[count:]:
+                    self._response()
+                writer.join()
@@ -0,0 +1,145 @@
+import os
+import pathlib
+import shlex
+import subprocess
+import tempfile
+import time
+import typing
+
+import orjson
+
+from gen3_tracker.common import state_dir
+
+COMMAND_LOG_NAME = 'commands.ndjson'
+COMMAND_LOG_ENV = 'G3T_COMMAND_LOG'
+"""Overrides the command log path, set to an empty string to disable the log."""
+SHELL_OPERATORS = ('|', '&', ';', '<', '>', '$', '`', '*', '?')
+"""A command string containing any of these needs a shell."""
+STREAM_BUFFER_SIZE = 1024 * 1024
+
+
+class ProcessResult(typing.NamedTuple):
+    """The outcome of one command; stdout and stderr are None when not captured."""
+    argv: list[str]
+    return_code: int
+    stdout: typing.Optional[bytes]
+    stderr: typing.Optional[bytes]
+    elapsed: float
+
+
+def to_argv(command: typing.Union[str, typing.Sequence[str]]) -> tuple[typing.Union[str, list[str]], bool]:
+    """Split a command string into argv, return (args, shell). Strings using shell operators are left to a shell."""
+    if not isinstance(command, str):
+        return [str(_) for _ in command], False
+    if not command.strip() or any(_ in command for _ in SHELL_OPERATORS):
+        # blank commands are a no-op for the shell
+        return command, True
+    return shlex.split(command), False
+
+
+def command_text(args: typing.Union[str, typing.Sequence[str]]) -> str:
+    """A readable, shell-quoted rendering of a command."""
+    return args if isinstance(args, str) else shlex.join(args)
+
+
+def command_log_path() -> typing.Optional[pathlib.Path]:
+    """The ndjson command log: $G3T_COMMAND_LOG, else in the state directory. None if disabled or not in a project root."""
+    if COMMAND_LOG_ENV in os.environ:
+        _ = os.environ[COMMAND_LOG_ENV]
+        return pathlib.Path(_) if _ else None
+    _ = state_dir()
+    return _ / COMMAND_LOG_NAME if _ else None
+
+
+def log_command(args: typing.Union[str, typing.Sequence[str]], started: float, elapsed: float, return_code: int,
+                stdout_bytes: typing.Optional[int], stderr_bytes: typing.Optional[int], shell: bool = False, streamed: bool = False):
+    """Append one record per command to the command log; one write per line, so concurrent processes do not interleave."""
+    path = command_log_path()
+    if not path:
+        return
+    words = args.split() if shell else args
+    record = {
+        'command': command_text(args),
+        'program': os.path.basename(words[0]) if words else None,
+        'started': started,
+        'elapsed': round(elapsed, 6),
+        'return_code': return_code,
+        'stdout_bytes': stdout_bytes,
+        'stderr_bytes': stderr_bytes,
+        'shell': shell,
+        'streamed': streamed,
+        'pid': os.getpid(),
+    }
+    try:
+        with open(path, 'ab') as fp:
+            fp.write(orjson.dumps(record) + b'\n')
+    except OSError:
+        # the log is advisory, never fail a command because of it
+        pass
+
+
+def run(command: typing.Union[str, typing.Sequence[str]], input: bytes = None, env: dict = None, capture: bool = True) -> ProcessResult:
+    """Run a command without a shell unless it needs one, wait for it and log it. Does not raise on a non-zero exit."""
+    args, shell = to_argv(command)
+    started = time.time()
+    start = time.perf_counter()
+    if capture:
+        process = subprocess.run(args, input=input, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=shell, env=env)
+    else:
+        process = subprocess.run(args, input=input, shell=shell, env=env)
+    elapsed = time.perf_counter() - start
+    stdout, stderr = process.stdout, process.stderr
+    log_command(args, started, elapsed, process.returncode,
+                len(stdout) if stdout is not None else None, len(stderr) if stderr is not None else None, shell=shell)
+    return ProcessResult(args if isinstance(args, list) else [args], process.returncode, stdout, stderr, elapsed)
+
+
+def stream(command: typing.Union[str, typing.Sequence[str]], separator: bytes = b'\n', env: dict = None,
+           check: bool = True) -> typing.Iterator[bytes]:
+    """Yield the records of a command's stdout as they are produced, without the separator, never buffering the whole output.
+
+    Raise subprocess.CalledProcessError after the last record if check and the command failed.
+    A consumer that stops early terminates the command.
+    stderr goes to a temporary file, so a command writing more than a pipe buffer of warnings does not block while stdout is read.
+    """
+    args, shell = to_argv(command)
+    started = time.time()
+    start = time.perf_counter()
+    stdout_bytes = 0
+    stderr = b''
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=stderr_file, shell=shell, env=env)
+    try:
+        pending = b''
+        while chunk := process.stdout.read1(STREAM_BUFFER_SIZE):
+            stdout_bytes += len(chunk)
+            *records, pending = (pending + chunk).split(separator)
+            yield from records
+        if pending:
+            yield pending
+        return_code = process.wait()
+        stderr_file.seek(0)
+        stderr = stderr_file.read()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        stderr_file.close()
+        log_command(args, started, time.perf_counter() - start, process.returncode, stdout_bytes, len(stderr), shell=shell, streamed=True)
+    if check and return_code != 0:
+        raise subprocess.CalledProcessError(return_code, args, stderr=stderr)
+
+
+def summarize(path: typing.Union[str, pathlib.Path]) -> dict:
+    """Totals of the command log by program: count, failures, elapsed seconds and stdout bytes."""
+    summary = {}
+    with open(path, 'rb') as fp:
+        for line in fp:
+            record = orjson.loads(line)
+            _ = summary.setdefault(record['program'], {'count': 0, 'failures': 0, 'elapsed': 0.0, 'stdout_bytes': 0})
+            _['count'] += 1
+            _['failures'] += record['return_code'] != 0
+            _['elapsed'] = round(_['elapsed'] + record['elapsed'], 6)
+            _['stdout_bytes'] += record['stdout_bytes'] or 0
+    return summary
@@ -0,0 +1,77 @@
+import os
+import time
+import typing
+
+import orjson
+
+from gen3_tracker.common import state_dir
+from gen3_tracker.git import process
+from gen3_tracker.git.status import head_commit
+
+PUSH_STATE_NAME = 'push.json'
+
+
+class ManifestDiff(typing.NamedTuple):
+    """The .dvc files changed between two commits, from `git diff-tree`."""
+    since: str
+    head: str
+    changed: list[tuple[str, str]]
+    """(path, blob id) of the added and modified .dvc files."""
+    deleted: list[tuple[str, str]]
+    """(path, blob id) of the deleted .dvc files, their content before the delete."""
+
+
+def is_ancestor(commit: str, head: str) -> bool:
+    """True if commit exists and is head or one of its ancestors."""
+    return process.run(['git', 'merge-base', '--is-ancestor', commit, head]).return_code == 0
+
+
+def manifest_diff(since: str, head: str, manifest_path: str = 'MANIFEST') -> ManifestDiff:
+    """The .dvc files added, modified and deleted between two commits, renames are a delete and an add."""
+    changed, deleted = [], []
+    records = process.stream(['git', 'diff-tree', '-r', '-z', '--no-renames', since, head, '--', manifest_path], separator=b'\0')
+    # :<old mode> <new mode> <old blob> <new blob> <status> NUL <path> NUL
+    for info, path in zip(records, records):
+        path = path.decode()
+        if not path.endswith('.dvc'):
+            continue
+        _, _, old_oid, oid, status = info.decode().split(' ')
+        if status == 'D':
+            deleted.append((path, old_oid))
+        else:
+            changed.append((path, oid))
+    return ManifestDiff(since, head, changed, deleted)
+
+
+def load_push_state() -> typing.Optional[dict]:
+    """The record of the last successful push, None if there is none."""
+    _ = state_dir()
+    if not _ or not (_ / PUSH_STATE_NAME).is_file():
+        return None
+    with open(_ / PUSH_STATE_NAME, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def save_push_state(project_id: str, commit: str, incremental: bool):
+    """Record the commit whose MANIFEST was indexed and uploaded, the starting point of the next incremental push."""
+    _ = state_dir()
+    if not _:
+        return
+    state = load_push_state() or {}
+    state.update({'project_id': project_id, 'commit': commit, 'pushed_ns': time.time_ns()})
+    if not incremental:
+        state['reconciled_ns'] = state['pushed_ns']
+    tmp_path = _ / f'{PUSH_STATE_NAME}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(state))
+    os.replace(tmp_path, _ / PUSH_STATE_NAME)
+
+
+def changed_since_push(project_id: str, manifest_path: str = 'MANIFEST') -> typing.Optional[ManifestDiff]:
+    """The .dvc files changed since the last push of this project, None if there is no usable last push:
+    none recorded, another project, or a commit that is not in HEAD's history (e.g. after a reset or rebase)."""
+    state = load_push_state()
+    head = head_commit()
+    if not state or not head or state.get('project_id') != project_id or not is_ancestor(state['commit'], head):
+        return None
+    return manifest_diff(state['commit'], head, manifest_path)
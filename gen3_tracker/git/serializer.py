@@ -0,0 +1,58 @@
+import os
+import pathlib
+import typing
+
+import orjson
+import yaml
+
+# the libyaml bindings parse an order of magnitude faster than the pure-Python implementation
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper
+
+PathLike = typing.Union[str, os.PathLike]
+
+
+def is_compact(content: bytes) -> bool:
+    """True if content is in the compact canonical form: one line of JSON with sorted keys.
+
+    JSON is a subset of YAML, so dvc and other YAML readers still understand it, we parse it with orjson.
+    """
+    return content.lstrip()[:1] == b'{'
+
+
+def loads_dvc(content: typing.Union[bytes, str]) -> dict:
+    """Parse the content of a .dvc file, either form."""
+    if isinstance(content, str):
+        content = content.encode()
+    if is_compact(content):
+        return orjson.loads(content)
+    return yaml.load(content, Loader=SafeLoader)
+
+
+def load_dvc(path: PathLike) -> dict:
+    """Read a .dvc file, either form."""
+    with open(path, 'rb') as f:
+        return loads_dvc(f.read())
+
+
+def dumps_dvc(data: dict, compact: bool = False) -> bytes:
+    """Serialize a .dvc file, block style YAML or the compact form."""
+    if compact:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return yaml.dump(data, Dumper=SafeDumper, default_flow_style=False, encoding='utf-8')
+
+
+def dump_dvc(data: dict, path: PathLike, compact: typing.Optional[bool] = None) -> pathlib.Path:
+    """Write a .dvc file. compact=None keeps the form of an existing file, new files are YAML."""
+    path = pathlib.Path(path)
+    if compact is None:
+        compact = False
+        if path.is_file():
+            with open(path, 'rb') as f:
+                compact = is_compact(f.read(64))
+    content = dumps_dvc(data, compact=compact)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
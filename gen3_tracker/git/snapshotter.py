@@ -2,7 +2,6 @@ import urllib
 from os import stat
 import tempfile
 import pathlib
-import requests
 from gen3.auth import Gen3Auth
 from gen3.file import Gen3File
 from zipfile import ZipFile
@@ -12,6 +11,7 @@ import gen3_tracker
 from gen3_tracker import Config
 from gen3_tracker.gen3.buckets import get_program_bucket
 from gen3_tracker.gen3.indexd import write_indexd
+from gen3_tracker.gen3.session import session
 from gen3_tracker.git import calculate_hash, DVC, DVCMeta, DVCItem, git_archive, modified_date
 
 
@@ -95,7 +95,7 @@ def push_snapshot(config: Config, auth: Gen3Auth, project_id: str = None, from_:
     with open(zipfile_path, 'rb') as f:
         files = {'file': (str(zipfile_path), f)}
         # this needs to be a PUT
-        response = requests.put(signed_url, files=files)
+        response = session().put(signed_url, files=files)
         response.raise_for_status()
 
     return {"msg": str(response), "object_id": my_dvc.object_id}
@@ -0,0 +1,174 @@
+import os
+import pathlib
+import subprocess
+import time
+import typing
+
+import orjson
+
+from gen3_tracker.common import state_dir
+from gen3_tracker.git import ManifestChange, data_file_changes, process
+from gen3_tracker.git.manifest_cache import scan_dvc_files
+from gen3_tracker.git.watcher import DirtySet
+
+STATUS_STATE_NAME = 'status.json'
+DOCUMENT_REFERENCE_PATH = 'META/DocumentReference.ndjson'
+
+
+class StatusSnapshot(typing.NamedTuple):
+    """The result of one scan of the MANIFEST directory."""
+    dvc_count: int
+    """Number of .dvc files in the project, or inspected by an incremental scan."""
+    changes: list[ManifestChange]
+    """Data files modified after their .dvc file was written."""
+    latest_file: typing.Optional[str]
+    """The most recently changed .dvc file."""
+    latest_mtime: float
+    document_reference_mtime: float
+    incremental: bool
+    watched: bool = False
+    """Only the files `g3t watch` saw change were inspected."""
+
+    @property
+    def document_reference_out_of_date(self) -> bool:
+        return self.latest_file is not None and self.document_reference_mtime < self.latest_mtime
+
+
+def _git_paths(*args: str) -> list[str]:
+    """Run a git command that lists NUL terminated paths."""
+    try:
+        return [_.decode() for _ in process.stream(['git', *args], separator=b'\0') if _]
+    except subprocess.CalledProcessError as e:
+        raise AssertionError(f"git {' '.join(args)} failed: {e.stderr.decode().strip()}")
+
+
+def head_commit() -> typing.Optional[str]:
+    """The id of the HEAD commit, None if there are no commits."""
+    result = process.run(['git', 'rev-parse', '--verify', '-q', 'HEAD'])
+    return result.stdout.decode().strip() or None
+
+
+def changed_dvc_files(since: str, manifest_path: str = 'MANIFEST') -> list[str]:
+    """The .dvc files added or modified since a commit, committed or not, plus the untracked ones."""
+    paths = _git_paths('diff', '--name-only', '--no-renames', '--diff-filter=d', '-z', since, '--', manifest_path)
+    paths += _git_paths('ls-files', '--others', '--exclude-standard', '-z', '--', manifest_path)
+    return [_ for _ in paths if _.endswith('.dvc')]
+
+
+def _stat(path: str) -> typing.Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def load_status_state() -> typing.Optional[dict]:
+    """The record of the last status run, None if there is none."""
+    _ = state_dir()
+    if not _ or not (_ / STATUS_STATE_NAME).is_file():
+        return None
+    with open(_ / STATUS_STATE_NAME, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def save_status_state(snapshot: StatusSnapshot, started_ns: int, head: typing.Optional[str]):
+    """Record a status run, the starting point of the next incremental run."""
+    _ = state_dir()
+    if not _:
+        return
+    state = {
+        'started_ns': started_ns,
+        'head': head,
+        'changes': [str(change.dvc_path) for change in snapshot.changes],
+        'latest_file': snapshot.latest_file,
+    }
+    tmp_path = _ / f'{STATUS_STATE_NAME}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(state))
+    os.replace(tmp_path, _ / STATUS_STATE_NAME)
+
+
+def watched_dvc_files(state: typing.Optional[dict]) -> typing.Optional[set[str]]:
+    """The .dvc files changed since the last status run according to a running `g3t watch`, None if it cannot tell.
+
+    The watcher only knows what changed after it started, so a status run since then provides the baseline.
+    """
+    dirty_set = DirtySet.default()
+    if not state or not dirty_set or not dirty_set.exists():
+        return None
+    with dirty_set:
+        watcher = dirty_set.watcher()
+        if not watcher or watcher['started_ns'] > state['started_ns']:
+            return None
+        return set(dirty_set.paths())
+
+
+def select_dvc_files(manifest_path: str = 'MANIFEST', since: str = None, incremental: bool = False,
+                     watched: bool = True) -> tuple[list[tuple[str, os.stat_result]], str, typing.Optional[dict]]:
+    """The (path, stat) of the .dvc files to inspect, how they were selected: full, incremental or watched, and the last status run."""
+    state = load_status_state() if (since or incremental or watched) else None
+    if incremental and not since and state:
+        since = state['head']
+    mode = 'incremental' if since or (incremental and state) else 'full'
+    watched_paths = watched_dvc_files(state) if watched and mode == 'full' else None
+    if watched_paths is not None:
+        mode = 'watched'
+
+    if mode == 'full':
+        return sorted(scan_dvc_files(manifest_path)), mode, state
+
+    candidates = set(state['changes']) if state else set()
+    if state and state.get('latest_file'):
+        candidates.add(state['latest_file'])
+    if mode == 'watched':
+        candidates.update(watched_paths)
+    else:
+        if since:
+            candidates.update(changed_dvc_files(since, manifest_path))
+        if state:
+            # catch files written since the last run that git cannot tell from HEAD, e.g. an add not yet committed
+            candidates.update(path for path, stat_result in scan_dvc_files(manifest_path) if stat_result.st_mtime_ns >= state['started_ns'])
+    dvc_files = sorted((os.path.normpath(path), stat_result) for path in candidates if (stat_result := _stat(path)))
+    return dvc_files, mode, state
+
+
+def scan_status(manifest_path: typing.Union[str, pathlib.Path] = 'MANIFEST', since: str = None,
+                incremental: bool = False, watched: bool = True, save: bool = True) -> StatusSnapshot:
+    """Collect everything `g3t status` reports in a single pass over the MANIFEST directory.
+
+    A full scan stats every .dvc file once, the same stat results give the most recently changed file.
+    since: only inspect the .dvc files changed since this commit (git diff --name-only), the untracked ones,
+    and the ones reported as changed by the previous run.
+    incremental: since defaults to HEAD at the last status run, and .dvc files modified after that run are also inspected.
+    Without a previous run, an incremental scan is a full scan.
+    Data files modified in place under an unchanged .dvc file are only noticed by a full scan, or by `g3t watch`.
+    watched: instead of a full scan, inspect the files a running `g3t watch` saw change.
+    """
+    manifest_path = str(manifest_path)
+    started_ns = time.time_ns()
+    head = head_commit()
+    dvc_files, mode, _ = select_dvc_files(manifest_path, since=since, incremental=incremental, watched=watched)
+
+    changes = data_file_changes(manifest_path, dvc_files=dvc_files) if dvc_files else []
+    latest_file, latest_mtime = None, 0
+    if dvc_files:
+        latest_file, stat_result = max(dvc_files, key=lambda _: _[1].st_mtime)
+        latest_mtime = stat_result.st_mtime
+    document_reference = _stat(DOCUMENT_REFERENCE_PATH)
+    snapshot = StatusSnapshot(
+        dvc_count=len(dvc_files),
+        changes=changes,
+        latest_file=latest_file,
+        latest_mtime=latest_mtime,
+        document_reference_mtime=document_reference.st_mtime if document_reference else 0,
+        incremental=mode != 'full',
+        watched=mode == 'watched',
+    )
+    if save:
+        save_status_state(snapshot, started_ns, head)
+        dirty_set = DirtySet.default()
+        if mode in ['full', 'watched'] and dirty_set and dirty_set.exists():
+            # inspected, outstanding changes are carried by the status state
+            with dirty_set:
+                dirty_set.prune(started_ns)
+    return snapshot
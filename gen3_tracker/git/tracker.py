@@ -0,0 +1,113 @@
+import os
+import pathlib
+import subprocess
+import typing
+
+import orjson
+
+from gen3_tracker.common import state_dir
+from gen3_tracker.git import process
+
+TRACKED_FILES_NAME = 'tracked-files.json'
+MANIFEST_PATHSPEC = 'MANIFEST'
+
+
+def _git_dir() -> typing.Optional[pathlib.Path]:
+    """The .git directory of the current project, None if absent or a worktree link file."""
+    path = pathlib.Path('.git')
+    return path if path.is_dir() else None
+
+
+def git_stamp(git_dir: pathlib.Path) -> list:
+    """Identify the state of the index and the current commit by the (size, mtime_ns) of the files git rewrites when they change.
+
+    .git/index changes on add/rm/commit/checkout, HEAD on checkout, the branch ref (or packed-refs) on commit/reset/pull.
+    """
+    paths = [git_dir / 'index', git_dir / 'HEAD', git_dir / 'packed-refs']
+    head = git_dir / 'HEAD'
+    if head.is_file():
+        content = head.read_text().strip()
+        if content.startswith('ref: '):
+            paths.append(git_dir / content[len('ref: '):])
+    stamp = []
+    for path in paths:
+        try:
+            _ = os.stat(path)
+            stamp.append([str(path), _.st_size, _.st_mtime_ns])
+        except FileNotFoundError:
+            stamp.append([str(path), None, None])
+    return stamp
+
+
+class TrackedFiles:
+    """Answer "which files under MANIFEST are tracked" from a single git call, cached in the state directory.
+
+    The cache is keyed by `git_stamp`, so any commit, checkout, add or rm invalidates it.
+    """
+
+    def __init__(self, cache_path: typing.Optional[pathlib.Path] = None, pathspec: str = MANIFEST_PATHSPEC):
+        self.cache_path = cache_path
+        self.pathspec = pathspec
+        self.git_dir = _git_dir()
+        self._cache = None
+
+    @classmethod
+    def default(cls) -> 'TrackedFiles':
+        """The project's index, cached in the state directory when in a project root."""
+        _ = state_dir()
+        return cls(_ / TRACKED_FILES_NAME if _ else None)
+
+    def _load(self) -> dict:
+        """Read the cache, discard it if git has changed since it was written."""
+        if self._cache is not None:
+            return self._cache
+        stamp = git_stamp(self.git_dir) if self.git_dir else None
+        cache = {}
+        if stamp and self.cache_path and self.cache_path.is_file():
+            try:
+                cache = orjson.loads(self.cache_path.read_bytes())
+            except orjson.JSONDecodeError:
+                cache = {}
+            if cache.get('stamp') != stamp or cache.get('pathspec') != self.pathspec:
+                cache = {}
+        cache['stamp'] = stamp
+        cache['pathspec'] = self.pathspec
+        self._cache = cache
+        return cache
+
+    def _save(self):
+        if self.cache_path and self._cache.get('stamp'):
+            tmp_path = self.cache_path.with_suffix('.tmp')
+            tmp_path.write_bytes(orjson.dumps(self._cache))
+            os.replace(tmp_path, self.cache_path)
+
+    def _files(self, key: str, command: list[str]) -> list[str]:
+        cache = self._load()
+        if key not in cache:
+            try:
+                cache[key] = [_.decode() for _ in process.stream(command, separator=b'\0') if _]
+            except subprocess.CalledProcessError:
+                # no commits yet, or not a repository
+                cache[key] = []
+            self._save()
+        return cache[key]
+
+    def committed(self) -> list[str]:
+        """Files in the HEAD commit."""
+        return self._files('committed', ['git', 'ls-tree', '-r', '-z', '--name-only', 'HEAD', '--', self.pathspec])
+
+    def committed_objects(self) -> list[tuple[str, str]]:
+        """(path, blob id) of the files in the HEAD commit."""
+        entries = self._files('committed_objects', ['git', 'ls-tree', '-r', '-z', 'HEAD', '--', self.pathspec])
+        # <mode> SP <type> SP <object> TAB <file>
+        return [(path, info.split(' ')[2]) for info, path in (_.split('\t', 1) for _ in entries)]
+
+    def staged(self) -> list[str]:
+        """Files in the git index, i.e. committed plus staged."""
+        return self._files('staged', ['git', 'ls-files', '-z', '--', self.pathspec])
+
+    def clear(self):
+        """Remove the cache."""
+        self._cache = None
+        if self.cache_path and self.cache_path.exists():
+            self.cache_path.unlink()
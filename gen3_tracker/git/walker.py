@@ -0,0 +1,121 @@
+import fnmatch
+import os
+import pathlib
+import re
+import typing
+
+import orjson
+
+from gen3_tracker.common import state_dir
+
+ADD_CHECKPOINT_NAME = 'add-checkpoint.ndjson'
+RESERVED_DIRECTORIES = ['MANIFEST', 'META']
+_MAGIC = re.compile('[*?[]')
+
+
+class WalkEntry(typing.NamedTuple):
+    """A file found by the walker, with the stat result and realpath it already paid for."""
+    path: str
+    stat: os.stat_result
+    realpath: str
+    is_symlink: bool
+
+
+def split_recursive_pattern(target: str) -> typing.Optional[tuple[str, typing.Optional[str]]]:
+    """Split `<dir>/**` or `<dir>/**/<name pattern>` into (dir, name pattern), None if target is not of that form."""
+    parts = pathlib.PurePosixPath(target).parts
+    if '**' not in parts:
+        return None
+    i = parts.index('**')
+    root_parts, rest = parts[:i], parts[i + 1:]
+    if any(_MAGIC.search(_) for _ in root_parts) or len(rest) > 1 or '**' in rest:
+        return None
+    root = str(pathlib.PurePosixPath(*root_parts)) if root_parts else '.'
+    return root, rest[0] if rest else None
+
+
+def walk_files(root: str, pattern: typing.Optional[str] = None, after: typing.Optional[str] = None) -> typing.Iterator[WalkEntry]:
+    """Stream the files under root, like glob(f'{root}/**/{pattern}', recursive=True), without materializing the list.
+
+    Hidden entries are skipped, as glob does, and so are the reserved MANIFEST and META directories of the project root.
+    Directories are listed with os.scandir in name order, so the walk is deterministic and can resume after a path.
+    Each file costs one stat (DirEntry.stat), symlinks an additional realpath.
+    """
+    after_parts = tuple(pathlib.PurePosixPath(after).parts) if after else None
+    root_parts = () if root == '.' else tuple(pathlib.PurePosixPath(root).parts)
+    yield from _walk(root, root_parts, os.path.realpath(root), pattern, after_parts)
+
+
+def _walk(dir_path: str, dir_parts: tuple, dir_realpath: str, pattern: typing.Optional[str],
+          after_parts: typing.Optional[tuple]) -> typing.Iterator[WalkEntry]:
+    with os.scandir(dir_path) as it:
+        entries = sorted((_ for _ in it if not _.name.startswith('.')), key=lambda _: _.name)
+    for entry in entries:
+        parts = dir_parts + (entry.name,)
+        if not dir_parts and entry.name in RESERVED_DIRECTORIES:
+            continue
+        path = entry.path[2:] if dir_path == '.' else entry.path
+        if entry.is_dir():
+            # skip sub trees that sort before the checkpoint
+            if after_parts and parts < after_parts[:len(parts)]:
+                continue
+            realpath = os.path.realpath(path) if entry.is_symlink() else os.path.join(dir_realpath, entry.name)
+            yield from _walk(path, parts, realpath, pattern, after_parts)
+            continue
+        if after_parts and parts <= after_parts:
+            continue
+        if pattern and not fnmatch.fnmatch(entry.name, pattern):
+            continue
+        is_symlink = entry.is_symlink()
+        realpath = os.path.realpath(path) if is_symlink else os.path.join(dir_realpath, entry.name)
+        yield WalkEntry(path, entry.stat(), realpath, is_symlink)
+
+
+class AddCheckpoint:
+    """Record the progress of `g3t add <dir>/**` in the state directory, so an interrupted add resumes where it stopped.
+
+    The first line identifies the add (target and arguments), each following line a target whose dvc file was written.
+    Targets are written in walk order, so the last one is where to resume.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.done = []  # (target, dvc file) written by a previous, interrupted, run
+        self._file = None
+
+    @classmethod
+    def default(cls) -> typing.Optional['AddCheckpoint']:
+        """The project's checkpoint in the state directory, None if not in a project root."""
+        _ = state_dir()
+        if not _:
+            return None
+        return cls(_ / ADD_CHECKPOINT_NAME)
+
+    def start(self, target: str, args: list[str]) -> typing.Optional[str]:
+        """Start or resume an add, return the last target written by an interrupted add of the same target and arguments."""
+        header = {'target': target, 'args': list(args)}
+        self.done = []
+        if self.path.is_file():
+            with open(self.path, 'rb') as f:
+                lines = [orjson.loads(_) for _ in f if _.strip()]
+            if lines and lines[0] == header:
+                self.done = [(_['target'], pathlib.Path(_['dvc'])) for _ in lines[1:]]
+        self._file = open(self.path, 'ab' if self.done else 'wb')
+        if not self.done:
+            self._file.write(orjson.dumps(header, option=orjson.OPT_APPEND_NEWLINE))
+            return None
+        return self.done[-1][0]
+
+    def record(self, target: str, dvc_file: pathlib.Path):
+        """Record a written dvc file."""
+        self._file.write(orjson.dumps({'target': target, 'dvc': str(dvc_file)}, option=orjson.OPT_APPEND_NEWLINE))
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def finish(self):
+        """The add completed, remove the checkpoint."""
+        self.close()
+        self.path.unlink(missing_ok=True)
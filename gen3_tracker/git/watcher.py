@@ -0,0 +1,305 @@
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+import typing
+
+from gen3_tracker.common import state_dir
+from gen3_tracker.git import dvc_data, to_dvc
+from gen3_tracker.git.manifest_cache import scan_dvc_files
+
+DIRTY_SET_NAME = 'dirty.sqlite'
+DEFAULT_POLL_INTERVAL = 2.0
+MIN_HEARTBEAT_TIMEOUT = 10.0
+"""A watcher that has not written a heartbeat for max(3 intervals, this many seconds) is considered gone."""
+
+
+class DirtySet:
+    """The paths `g3t watch` saw change, shared with status, add --update and push through the state directory.
+
+    Entries are .dvc paths, kind 'dvc' if the .dvc file changed, 'data' if the data file it references did, and META paths, kind 'meta'.
+    The running watcher registers itself with its pid and a heartbeat; readers only trust the set while it is alive.
+    """
+
+    def __init__(self, db_name: typing.Union[str, pathlib.Path]):
+        self.db_name = db_name
+        self.connection = None
+
+    def connect(self) -> sqlite3.Connection:
+        """Establish database connection if not established, return connection."""
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.db_name, timeout=30)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS dirty (
+                    path TEXT PRIMARY KEY,
+                    kind TEXT,
+                    changed_ns INTEGER
+                )
+            """)
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS watcher (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    pid INTEGER,
+                    mode TEXT,
+                    interval REAL,
+                    started_ns INTEGER,
+                    heartbeat_ns INTEGER
+                )
+            """)
+        return self.connection
+
+    def disconnect(self) -> None:
+        """Clean up database connection."""
+        if self.connection:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disconnect()
+
+    @classmethod
+    def default(cls) -> typing.Optional['DirtySet']:
+        """The project's dirty set in the state directory, None if not in a project root."""
+        _ = state_dir()
+        if not _:
+            return None
+        return cls(_ / DIRTY_SET_NAME)
+
+    def exists(self) -> bool:
+        """True if a watcher ever ran in this project."""
+        return pathlib.Path(self.db_name).is_file()
+
+    def mark(self, paths: typing.Iterable[str], kind: str) -> int:
+        """Record changed paths, return the number recorded."""
+        now = time.time_ns()
+        rows = [(path, kind, now) for path in paths]
+        connection = self.connect()
+        connection.executemany("INSERT OR REPLACE INTO dirty VALUES (?, ?, ?)", rows)
+        connection.commit()
+        return len(rows)
+
+    def paths(self, kinds: typing.Iterable[str] = ('dvc', 'data')) -> list[str]:
+        """The changed paths of these kinds."""
+        kinds = list(kinds)
+        sql = f"SELECT path FROM dirty WHERE kind IN ({', '.join('?' * len(kinds))}) ORDER BY path"
+        return [_[0] for _ in self.connect().execute(sql, kinds)]
+
+    def prune(self, before_ns: int) -> int:
+        """Forget the changes recorded before a point in time, e.g. the start of a status that inspected them."""
+        connection = self.connect()
+        count = connection.execute("DELETE FROM dirty WHERE changed_ns < ?", (before_ns,)).rowcount
+        connection.commit()
+        return count
+
+    def register(self, pid: int, mode: str, interval: float):
+        """Record the running watcher."""
+        now = time.time_ns()
+        connection = self.connect()
+        connection.execute("INSERT OR REPLACE INTO watcher VALUES (0, ?, ?, ?, ?, ?)", (pid, mode, interval, now, now))
+        connection.commit()
+
+    def heartbeat(self):
+        connection = self.connect()
+        connection.execute("UPDATE watcher SET heartbeat_ns = ? WHERE pid = ?", (time.time_ns(), os.getpid()))
+        connection.commit()
+
+    def unregister(self, pid: int):
+        connection = self.connect()
+        connection.execute("DELETE FROM watcher WHERE pid = ?", (pid,))
+        connection.commit()
+
+    def watcher(self) -> typing.Optional[dict]:
+        """The running watcher, None if there is none or it stopped without unregistering."""
+        row = self.connect().execute("SELECT pid, mode, interval, started_ns, heartbeat_ns FROM watcher").fetchone()
+        if not row:
+            return None
+        _ = dict(zip(['pid', 'mode', 'interval', 'started_ns', 'heartbeat_ns'], row))
+        timeout_ns = max(3 * _['interval'], MIN_HEARTBEAT_TIMEOUT) * 1e9
+        if _['heartbeat_ns'] < time.time_ns() - timeout_ns or not _pid_exists(_['pid']):
+            return None
+        return _
+
+    def info(self) -> dict:
+        """Summary of the dirty set."""
+        connection = self.connect()
+        counts = dict(connection.execute("SELECT kind, COUNT(*) FROM dirty GROUP BY kind").fetchall())
+        return {'path': str(self.db_name), 'entries': counts, 'watcher': self.watcher()}
+
+
+def _pid_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ProjectWatcher:
+    """Watch the MANIFEST and META directories and the data files referenced by MANIFEST, record changes in a DirtySet.
+
+    Uses watchdog (inotify, FSEvents, ...) if it is installed, otherwise polls: one stat per file every interval.
+    """
+
+    def __init__(self, dirty_set: DirtySet, manifest_path: str = 'MANIFEST', meta_path: str = 'META'):
+        self.dirty_set = dirty_set
+        self.manifest_path = manifest_path
+        self.manifest_abspath = os.path.abspath(manifest_path)
+        self.meta_path = meta_path
+        self.meta_abspath = os.path.abspath(meta_path)
+        self.data_paths = {}  # data file realpath -> dvc path
+        self.dvc_paths = {}  # dvc path -> data file realpath
+        self.new_directories = set()  # directories of data files tracked since last asked
+        self._stats = None
+
+    def load(self):
+        """Map the data files referenced by MANIFEST to their .dvc files."""
+        dvc_files = sorted(scan_dvc_files(self.manifest_path))
+        for (dvc_path, _), dvc in zip(dvc_files, dvc_data([path for path, _ in dvc_files], [stat_result for _, stat_result in dvc_files])):
+            self._map(os.path.normpath(dvc_path), dvc)
+
+    def _map(self, dvc_path: str, dvc):
+        old = self.dvc_paths.pop(dvc_path, None)
+        if old:
+            self.data_paths.pop(old, None)
+        if dvc is None or not dvc.out.realpath or dvc.out.source_url:
+            return
+        realpath = os.path.abspath(dvc.out.realpath)
+        self.data_paths[realpath] = dvc_path
+        self.dvc_paths[dvc_path] = realpath
+        self.new_directories.add(os.path.dirname(realpath))
+
+    def _track(self, dvc_path: str):
+        """A .dvc file changed, update the data file it references."""
+        dvc = None
+        if os.path.isfile(dvc_path):
+            try:
+                dvc = to_dvc(dvc_path)
+            except Exception:  # noqa - partially written, the next event will re-read it
+                pass
+        self._map(dvc_path, dvc)
+
+    def changed(self, paths: typing.Iterable[str]) -> int:
+        """Classify changed paths and record them, return the number recorded."""
+        dvc_paths, data_paths, meta_paths = set(), set(), set()
+        for path in paths:
+            abspath = os.path.abspath(path)
+            if abspath.startswith(self.manifest_abspath + os.sep):
+                if abspath.endswith('.dvc'):
+                    dvc_path = os.path.relpath(abspath)
+                    self._track(dvc_path)
+                    dvc_paths.add(dvc_path)
+            elif abspath.startswith(self.meta_abspath + os.sep):
+                meta_paths.add(os.path.relpath(abspath))
+            elif abspath in self.data_paths:
+                data_paths.add(self.data_paths[abspath])
+        return self.dirty_set.mark(dvc_paths, 'dvc') + self.dirty_set.mark(data_paths - dvc_paths, 'data') + self.dirty_set.mark(meta_paths, 'meta')
+
+    def _snapshot(self) -> dict[str, tuple[int, int]]:
+        stats = {path: (_.st_size, _.st_mtime_ns) for path, _ in scan_dvc_files(self.manifest_path)}
+        if os.path.isdir(self.meta_path):
+            with os.scandir(self.meta_path) as it:
+                for entry in it:
+                    if entry.is_file():
+                        _ = entry.stat()
+                        stats[entry.path] = (_.st_size, _.st_mtime_ns)
+        for realpath in list(self.data_paths):
+            try:
+                _ = os.stat(realpath)
+                stats[realpath] = (_.st_size, _.st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        return stats
+
+    def poll(self) -> int:
+        """Stat everything once, record what changed since the previous poll. The first poll only takes the baseline."""
+        stats = self._snapshot()
+        previous, self._stats = self._stats, stats
+        if previous is None:
+            return 0
+        changed = [path for path, _ in stats.items() if previous.get(path) != _]
+        changed += [path for path in previous if path not in stats]
+        return self.changed(changed)
+
+    def run(self, interval: float = DEFAULT_POLL_INTERVAL, stop: threading.Event = None, polling: bool = False,
+            on_change: typing.Callable[[int], None] = None) -> str:
+        """Watch until stop is set, return the mode used: watchdog or polling."""
+        stop = stop or threading.Event()
+        on_change = on_change or (lambda _: None)
+        mode = 'polling'
+        if not polling:
+            try:
+                import watchdog  # noqa: F401
+                mode = 'watchdog'
+            except ImportError:
+                pass
+        self.load()
+        try:
+            # register once watching, readers only trust changes after the watcher started
+            if mode == 'watchdog':
+                self._run_watchdog(interval, stop, on_change, lambda: self.dirty_set.register(os.getpid(), mode, interval))
+            else:
+                self.poll()
+                self.dirty_set.register(os.getpid(), mode, interval)
+                while not stop.wait(interval):
+                    on_change(self.poll())
+                    self.dirty_set.heartbeat()
+        finally:
+            self.dirty_set.unregister(os.getpid())
+        return mode
+
+    def _run_watchdog(self, interval: float, stop: threading.Event, on_change: typing.Callable[[int], None], started: typing.Callable[[], None]):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        events = queue.SimpleQueue()
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                events.put(event.src_path)
+                if getattr(event, 'dest_path', None):
+                    events.put(event.dest_path)
+
+        handler = Handler()
+        observer = Observer()
+        scheduled = set()
+
+        def schedule_data_directories():
+            # data files of new .dvc files may live in directories not watched yet
+            for directory in self.new_directories - scheduled:
+                if os.path.isdir(directory):
+                    observer.schedule(handler, directory, recursive=False)
+                scheduled.add(directory)
+            self.new_directories.clear()
+
+        for path, recursive in [(self.manifest_abspath, True), (self.meta_abspath, False)]:
+            os.makedirs(path, exist_ok=True)
+            observer.schedule(handler, path, recursive=recursive)
+            scheduled.add(path)
+        schedule_data_directories()
+        observer.start()
+        started()
+        try:
+            while not stop.wait(min(interval, 1.0)):
+                paths = set()
+                while not events.empty():
+                    paths.add(events.get())
+                if paths:
+                    on_change(self.changed(paths))
+                schedule_data_directories()
+                self.dirty_set.heartbeat()
+        finally:
+            observer.stop()
+            observer.join()
@@ -21,7 +21,7 @@ from fhir.resources.task import Task, TaskOutput, TaskInput
 
 from gen3_tracker import ACED_NAMESPACE
 from gen3_tracker.common import create_resource_id, EmitterContextManager
-from gen3_tracker.git import DVC, run_command, dvc_data
+from gen3_tracker.git import DVC, dvc_data, git_add
 
 
 def _get_system(identifier: str, project_id: str):
@@ -325,6 +325,6 @@ def update_meta_files(dry_run=False, project_id=None) -> list[str]:
     new_meta_files = [str(_) for _ in after_meta_files if _ not in before_meta_files]
 
     if new_meta_files:
-        run_command(f'git add {" ".join(new_meta_files)}', dry_run=dry_run, no_capture=True)
+        git_add(new_meta_files, dry_run=dry_run)
 
     return after_meta_files
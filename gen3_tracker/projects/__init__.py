@@ -5,6 +5,7 @@ from gen3.auth import Gen3Auth
 from pydantic import BaseModel
 
 from gen3_tracker.config import ensure_auth, Config
+from gen3_tracker.gen3.session import curl
 
 
 class ProjectSummary(BaseModel):
@@ -31,7 +32,7 @@ def get_user(config: Config = None, auth: Gen3Auth = None) -> dict:
     if not auth:
         assert config
         auth = ensure_auth(config=config)
-    return auth.curl('/user/user').json()
+    return curl(auth, '/user/user').json()
 
 
 def recursive_defaultdict():
@@ -26,6 +26,7 @@ setup(
     },
     extras_require={
         'dtale': ['dtale'],
+        'watch': ['watchdog'],
     },
     entry_points={
         'console_scripts': [
@@ -0,0 +1,64 @@
+"""Benchmark: peak memory of holding the committed manifest during push.
+
+    python -m tests.benchmarks.bench_compact_manifest --count 1000000
+
+Compares a list of DVC objects (before) with a CompactManifest (after), plus the indexd updated_date dict both diff against.
+"""
+import time
+import tracemalloc
+
+import click
+
+from gen3_tracker.git import DVC
+from gen3_tracker.git.compact import CompactManifest
+
+PROJECT_ID = 'bench-project'
+
+
+def _yaml_data(i: int) -> dict:
+    return {
+        'meta': {'patient': f'P{i % 1000}', 'specimen': f'S{i}', 'no_bucket': False},
+        'outs': [{
+            'hash': 'md5', 'md5': f'{i:032x}', 'is_symlink': False, 'mime': 'text/plain',
+            'modified': '2024-04-30T17:46:30.819143+00:00', 'path': f'data/file-{i:07d}.txt',
+            'realpath': f'/home/user/project/data/file-{i:07d}.txt', 'size': i,
+            'object_id': f'{i:08x}-0000-0000-0000-000000000000',
+        }]
+    }
+
+
+def _dvc_objects(count: int) -> list[DVC]:
+    dvc_objects = [DVC.from_trusted(_yaml_data(i)) for i in range(count)]
+    for _ in dvc_objects:
+        _.project_id = PROJECT_ID
+    return dvc_objects
+
+
+def _compact(count: int) -> CompactManifest:
+    manifest = CompactManifest(PROJECT_ID)
+    for i in range(count):
+        manifest.append(f'MANIFEST/data/file-{i:07d}.txt.dvc', f'{i:040x}', _yaml_data(i))
+    return manifest
+
+
+def _measure(label, fn, count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(count)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    click.echo(f"{label:<24} {elapsed:8.2f}s  held {current / 2 ** 20:9,.1f} MiB  peak {peak / 2 ** 20:9,.1f} MiB  {current / count:7,.0f} bytes/file")
+    return result
+
+
+@click.command()
+@click.option('--count', default=1_000_000, show_default=True, help='Number of committed files.')
+def main(count):
+    _measure("list[DVC] (before)", _dvc_objects, count)
+    _measure("CompactManifest (after)", _compact, count)
+    _measure("indexd dids", lambda n: {f'{i:08x}-0000-0000-0000-000000000000': '2024-04-30T17:46:30.819143+00:00' for i in range(n)}, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark: constructing DVC objects from parsed .dvc content.
+
+    python -m tests.benchmarks.bench_dvc_models --count 1000000
+
+Compares full validation (DVC.model_validate) with the trusted path used for manifest cache content (DVC.from_trusted),
+and the iso date fast path of parse_iso_tz_date with dateutil.
+"""
+import time
+
+import click
+import orjson
+from dateutil import parser as dateutil_parser
+
+from gen3_tracker.common import parse_iso_tz_date
+from gen3_tracker.git import DVC
+
+
+def _yaml_data(i: int) -> dict:
+    return {
+        'meta': {'patient': f'P{i % 1000}', 'specimen': f'S{i}', 'no_bucket': False},
+        'outs': [{
+            'hash': 'md5', 'md5': f'{i:032x}', 'is_symlink': False, 'mime': 'text/plain',
+            'modified': '2024-04-30T17:46:30.819143+00:00', 'path': f'data/file-{i:07d}.txt',
+            'realpath': f'/home/user/project/data/file-{i:07d}.txt', 'size': i,
+            'object_id': f'{i:08x}-0000-0000-0000-000000000000',
+        }]
+    }
+
+
+def _time(label, fn, items, count):
+    start = time.perf_counter()
+    for _ in items:
+        fn(_)
+    elapsed = time.perf_counter() - start
+    click.echo(f"{label:<32} {elapsed:8.2f}s {count / elapsed:10,.0f} objects/s")
+
+
+@click.command()
+@click.option('--count', default=1_000_000, show_default=True, help='Number of DVC objects.')
+def main(count):
+    contents = [orjson.dumps(_yaml_data(i)) for i in range(count)]
+    trusted = [DVC.from_trusted(orjson.loads(_)) for _ in contents[:1000]]
+    assert trusted == [DVC.model_validate(orjson.loads(_)) for _ in contents[:1000]], "trusted and validated objects differ"
+
+    _time("orjson.loads", orjson.loads, contents, count)
+    _time("DVC.model_validate", lambda _: DVC.model_validate(orjson.loads(_)), contents, count)
+    _time("DVC.from_trusted", lambda _: DVC.from_trusted(orjson.loads(_)), contents, count)
+
+    dates = ['2024-04-30T17:46:30.819143+00:00'] * count
+    _time("dateutil parse", lambda _: dateutil_parser.parse(_).isoformat(), dates, count)
+    _time("parse_iso_tz_date", parse_iso_tz_date, dates, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark: dumping and loading a synthetic MANIFEST of .dvc files.
+
+    python -m tests.benchmarks.bench_dvc_serializer --count 100000
+
+Compares the original pure-Python PyYAML calls, the serializer's libyaml YAML form and its compact JSON form.
+"""
+import os
+import pathlib
+import tempfile
+import time
+
+import click
+import yaml
+
+from gen3_tracker.git import DVC
+from gen3_tracker.git.serializer import dump_dvc, load_dvc, SafeLoader
+
+
+def _yaml_data(i: int) -> dict:
+    return {
+        'meta': {'patient': f'P{i % 1000}', 'specimen': f'S{i}', 'no_bucket': False},
+        'outs': [{
+            'hash': 'md5', 'md5': f'{i:032x}', 'is_symlink': False, 'mime': 'text/plain',
+            'modified': '2024-04-30T17:46:30.819143+00:00', 'path': f'data/file-{i:07d}.txt',
+            'realpath': f'/home/user/project/data/file-{i:07d}.txt', 'size': i,
+        }]
+    }
+
+
+def _legacy_dump(yaml_data, path):
+    with open(path, 'w') as f:
+        yaml.dump(yaml_data, f, default_flow_style=False)
+
+
+def _legacy_load(path):
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def _time(label, fn, paths, count):
+    start = time.perf_counter()
+    for i, path in enumerate(paths):
+        fn(i, path)
+    elapsed = time.perf_counter() - start
+    click.echo(f"{label:<32} {elapsed:8.2f}s {count / elapsed:10,.0f} files/s")
+
+
+@click.command()
+@click.option('--count', default=100_000, show_default=True, help='Number of .dvc files.')
+@click.option('--directory', default=tempfile.gettempdir(), show_default=True, type=click.Path(exists=True, file_okay=False))
+def main(count, directory):
+    click.echo(f"libyaml: {SafeLoader.__module__ != 'yaml.loader'}")
+    with tempfile.TemporaryDirectory(dir=directory) as tmp_dir:
+        for form in ['legacy', 'yaml', 'compact']:
+            manifest_path = pathlib.Path(tmp_dir) / form / 'MANIFEST'
+            manifest_path.mkdir(parents=True)
+            paths = [manifest_path / f'file-{i:07d}.txt.dvc' for i in range(count)]
+            if form == 'legacy':
+                _time(f"dump {form}", lambda i, p: _legacy_dump(_yaml_data(i), p), paths, count)
+                _time(f"load {form}", lambda i, p: _legacy_load(p), paths, count)
+            else:
+                _time(f"dump {form}", lambda i, p: dump_dvc(_yaml_data(i), p, compact=form == 'compact'), paths, count)
+                _time(f"load {form}", lambda i, p: load_dvc(p), paths, count)
+                _time(f"load {form} + DVC.model_validate", lambda i, p: DVC.model_validate(load_dvc(p)), paths, count)
+            click.echo(f"{'size ' + form:<32} {sum(os.path.getsize(_) for _ in paths) / count:8.0f} bytes/file")
+
+
+if __name__ == '__main__':
+    main()
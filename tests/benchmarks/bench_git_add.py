@@ -0,0 +1,60 @@
+"""Benchmark: staging many .dvc files, one shell `git add a b c ...` vs `git_add` streaming pathspecs on stdin.
+
+    python -m tests.benchmarks.bench_git_add --count 100000
+
+The shell command line is limited by ARG_MAX (see `getconf ARG_MAX`), the legacy command fails once the paths exceed it.
+"""
+import os
+import pathlib
+import tempfile
+import time
+
+import click
+
+from gen3_tracker.git import git_add, run_command
+
+
+def _repo(parent: pathlib.Path, name: str, count: int) -> list[str]:
+    """Create a repository with count .dvc files, return their paths."""
+    path = parent / name
+    (path / 'MANIFEST' / 'data').mkdir(parents=True)
+    os.chdir(path)
+    run_command('git init -q')
+    paths = []
+    for i in range(count):
+        _ = f'MANIFEST/data/file-{i:07d}.txt.dvc'
+        with open(_, 'w') as f:
+            f.write(f'outs:\n- path: data/file-{i:07d}.txt\n')
+        paths.append(_)
+    return paths
+
+
+@click.command()
+@click.option('--count', default=100_000, show_default=True, help='Number of .dvc files to stage.')
+@click.option('--directory', default=tempfile.gettempdir(), show_default=True, type=click.Path(exists=True, file_okay=False))
+def main(count, directory):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(dir=directory) as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        try:
+            paths = _repo(tmp_dir, 'legacy', count)
+            command = f'git add {" ".join(paths)}'
+            start = time.perf_counter()
+            try:
+                run_command(command)
+                click.echo(f"legacy  git add ({len(command):,} bytes of arguments): {time.perf_counter() - start:.2f}s")
+            except OSError as e:
+                click.echo(f"legacy  git add ({len(command):,} bytes of arguments): failed {e}")
+
+            paths = _repo(tmp_dir, 'batched', count)
+            start = time.perf_counter()
+            git_add(paths)
+            click.echo(f"git_add: {time.perf_counter() - start:.2f}s")
+            staged = run_command('git ls-files MANIFEST | wc -l').stdout.strip()
+            click.echo(f"staged {staged} of {count} files")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    main()
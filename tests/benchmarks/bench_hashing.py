@@ -0,0 +1,86 @@
+"""Micro-benchmark: md5 throughput by read buffer size, with and without read-ahead.
+
+Run it on a local disk and on a network filesystem (NFS/Lustre) mount, e.g.:
+
+    python -m tests.benchmarks.bench_hashing /tmp --size 1024
+    python -m tests.benchmarks.bench_hashing /mnt/lustre/scratch --size 1024
+
+Note: re-reads are served from the page cache, use a file larger than RAM (or drop caches) for cold numbers.
+"""
+import hashlib
+import mmap
+import os
+import pathlib
+import tempfile
+import time
+
+import click
+
+from gen3_tracker.git.hasher import calculate_hashes
+
+KiB = 1024
+MiB = 1024 * KiB
+
+
+def _legacy_md5(path):
+    """The original implementation, 4 KiB reads."""
+    hash_md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+
+def _mmap_md5(path):
+    """Hash a memory map of the file."""
+    hash_md5 = hashlib.md5()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        view = memoryview(m)
+        for i in range(0, len(m), 4 * MiB):
+            hash_md5.update(view[i:i + 4 * MiB])
+        view.release()
+    return hash_md5.hexdigest()
+
+
+def _time(fn, path, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+@click.command()
+@click.argument('directory', default=tempfile.gettempdir(), type=click.Path(exists=True, file_okay=False))
+@click.option('--size', default=256, show_default=True, help='Size of the test file in MiB.')
+@click.option('--repeat', default=3, show_default=True, help='Best of n runs.')
+def main(directory, size, repeat):
+    """Compare hashing backends on a test file written to DIRECTORY."""
+    path = pathlib.Path(directory) / f'g3t-bench-hashing-{os.getpid()}.bin'
+    try:
+        with open(path, 'wb') as f:
+            for _ in range(size):
+                f.write(os.urandom(MiB))
+
+        candidates = [('legacy 4KiB read()', _legacy_md5), ('mmap', _mmap_md5)]
+        for buffer_size in [64 * KiB, 1 * MiB, 4 * MiB, 16 * MiB]:
+            for read_ahead in [False, True]:
+                name = f"readinto {buffer_size // KiB}KiB{' +read-ahead' if read_ahead else ''}"
+                candidates.append((name, lambda p, b=buffer_size, r=read_ahead: calculate_hashes(['md5'], p, buffer_size=b, read_ahead=r)['md5']))
+
+        expected = None
+        click.echo(f"{'backend':32} {'seconds':>8} {'MiB/s':>8}")
+        for name, fn in candidates:
+            elapsed, result = _time(fn, path, repeat)
+            expected = expected or result
+            assert result == expected, f"{name} returned {result}, expected {expected}"
+            click.echo(f"{name:32} {elapsed:8.3f} {size / elapsed:8.1f}")
+    finally:
+        path.unlink(missing_ok=True)
+
+
+if __name__ == '__main__':
+    main()
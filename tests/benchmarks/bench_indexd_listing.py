@@ -0,0 +1,68 @@
+"""Benchmark: time and peak memory of reading a project's indexd listing, against a local fake indexd.
+
+    python -m tests.benchmarks.bench_indexd_listing --count 200000 --latency 0.05
+
+Compares the sdk's list_with_params into one list (before) with iter_records a page at a time (after),
+each building the did: updated_date dict push diffs against. The fake server runs in process, its page encoding is traced too.
+"""
+import time
+import tracemalloc
+import uuid
+
+import click
+
+from gen3_tracker.gen3.session import gen3_index
+from gen3_tracker.git.cloner import iter_records
+from tests.fake_indexd import FakeIndexd
+
+PROJECT_ID = 'bench-project'
+
+
+def _record(i: int) -> dict:
+    did = str(uuid.uuid5(uuid.NAMESPACE_DNS, str(i)))
+    return {
+        'did': did, 'rev': f'{i:08x}', 'baseid': f'{i:08x}-0000-0000-0000-000000000001',
+        'file_name': f'data/file-{i:07d}.txt', 'size': i, 'hashes': {'md5': f'{i:032x}'}, 'form': 'object', 'acl': [],
+        'urls': [f's3://bench-bucket/{did}/data/file-{i:07d}.txt'], 'urls_metadata': {},
+        'authz': ['/programs/bench/projects/project'], 'version': None, 'uploader': None, 'description': None,
+        'metadata': {'document_reference_id': did, 'patient_identifier': f'P{i % 1000}',
+                     'project_id': PROJECT_ID, 'no_bucket': False, 'md5': f'{i:032x}', 'realpath': f'/home/user/project/data/file-{i:07d}.txt'},
+        'created_date': '2024-04-30T17:46:30.819143', 'updated_date': '2024-04-30T17:46:30.819143',
+        'content_created_date': None, 'content_updated_date': None,
+    }
+
+
+def _before(index_client, page_size):
+    records = [_.to_json() for _ in index_client.client.list_with_params(params={'authz': '/programs/bench/projects/project', 'metadata': {}}, page_size=page_size)]
+    return {_['did']: _['updated_date'] for _ in records}
+
+
+def _after(index_client, page_size, prefetch):
+    return {_['did']: _['updated_date'] for _ in iter_records(project_id=PROJECT_ID, page_size=page_size, prefetch=prefetch, index_client=index_client)}
+
+
+def _measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    click.echo(f"{label:<36} {elapsed:8.2f}s  held {current / 2 ** 20:8,.1f} MiB  peak {peak / 2 ** 20:8,.1f} MiB  {len(result):,} records")
+
+
+@click.command()
+@click.option('--count', default=200_000, show_default=True, help='Number of records in the project.')
+@click.option('--latency', default=0.05, show_default=True, help='Seconds the fake indexd takes per page.')
+@click.option('--page-size', default=1000, show_default=True, help='Records per page.')
+@click.option('--prefetch', default=4, show_default=True, help='Pages read ahead, see iter_records.')
+def main(count, latency, page_size, prefetch):
+    with FakeIndexd(latency=latency) as fake:
+        fake.records = {_['did']: _ for _ in map(_record, range(count))}
+        index_client = gen3_index(endpoint=fake.url)
+        _measure("list_with_params, one list (before)", lambda: _before(index_client, page_size))
+        _measure(f"iter_records, prefetch {prefetch} (after)", lambda: _after(index_client, page_size, prefetch))
+
+
+if __name__ == '__main__':
+    main()
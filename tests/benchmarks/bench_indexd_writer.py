@@ -0,0 +1,63 @@
+"""Benchmark: indexing throughput against a local fake indexd with a simulated round trip time.
+
+    python -m tests.benchmarks.bench_indexd_writer --count 2000 --latency 0.05 --workers 1,8,32 --async-concurrency 64,256
+
+With threads each record is a create and a read of the new record, with asyncio only a create.
+Every --error-every-th request fails with a 503 and is retried.
+"""
+import os
+import tempfile
+import time
+
+import click
+
+from gen3_tracker.gen3 import indexd
+from gen3_tracker.gen3.session import gen3_index
+from gen3_tracker.git import DVC, to_indexd, to_indexd_async
+from tests.fake_indexd import FakeIndexd
+
+PROJECT_ID = 'bench-project'
+
+
+def _dvc_objects(count: int) -> list[DVC]:
+    return [DVC.from_trusted({
+        'meta': {'patient': f'P{i % 1000}', 'specimen': f'S{i}'},
+        'outs': [{
+            'hash': 'md5', 'md5': f'{i:032x}', 'modified': '2024-04-30T17:46:30.819143+00:00',
+            'path': f'data/file-{i:07d}.txt', 'realpath': f'/home/user/project/data/file-{i:07d}.txt', 'size': i,
+            'object_id': f'{i:08x}-0000-0000-0000-000000000000',
+        }]
+    }) for i in range(count)]
+
+
+@click.command()
+@click.option('--count', default=2000, show_default=True, help='Number of records to index.')
+@click.option('--latency', default=0.05, show_default=True, help='Seconds the fake indexd takes per request.')
+@click.option('--workers', default='1,8,32', show_default=True, help='Comma separated worker counts to compare.')
+@click.option('--async-concurrency', default='64,256', show_default=True, help='Comma separated asyncio concurrencies to compare, "" for none.')
+@click.option('--error-every', default=50, show_default=True, help='Every n-th request fails with a 503, 0 for none.')
+def main(count, latency, workers, async_concurrency, error_every):
+    indexd.BACKOFF = latency
+    dvc_objects = _dvc_objects(count)
+    os.chdir(tempfile.mkdtemp())
+    for worker_count in [int(_) for _ in workers.split(',')]:
+        with FakeIndexd(latency=latency, error_every=error_every) as fake:
+            start = time.perf_counter()
+            for _ in to_indexd(dvc_objects, auth=None, project_id=PROJECT_ID, bucket_name='bench-bucket', overwrite=False,
+                               restricted_project_id=None, worker_count=worker_count, index_client=gen3_index(endpoint=fake.url)):
+                pass
+            elapsed = time.perf_counter() - start
+            assert len(fake.records) == count
+        click.echo(f"workers {worker_count:4d}  {elapsed:8.2f}s  {count / elapsed:9,.1f} records/s  {fake.errors:5d} retried errors  {fake.connections:6d} connections")
+    for concurrency in [int(_) for _ in async_concurrency.split(',') if _]:
+        with FakeIndexd(latency=latency, error_every=error_every) as fake:
+            start = time.perf_counter()
+            to_indexd_async(dvc_objects, auth=None, project_id=PROJECT_ID, bucket_name='bench-bucket', overwrite=False,
+                            restricted_project_id=None, concurrency=concurrency, endpoint=fake.url)
+            elapsed = time.perf_counter() - start
+            assert len(fake.records) == count
+        click.echo(f"async   {concurrency:4d}  {elapsed:8.2f}s  {count / elapsed:9,.1f} records/s  {fake.errors:5d} retried errors  {fake.connections:6d} connections")
+
+
+if __name__ == '__main__':
+    main()
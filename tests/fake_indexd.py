@@ -0,0 +1,154 @@
+"""A local stand-in for indexd's create, get, delete, list and bulk endpoints, for tests and benchmarks.
+
+    with FakeIndexd(latency=0.05, error_every=10) as indexd:
+        index_client = gen3_index(endpoint=indexd.url)
+"""
+import bisect
+import itertools
+import threading
+import time
+import typing
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import orjson
+
+from gen3_tracker.git import DVC
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 drops the connections of concurrent clients
+    request_queue_size = 128
+
+
+class FakeIndexd:
+    """Records in a dict, each response delayed by latency seconds, every error_every-th request answered with error_status.
+    Connections are kept alive, connections counts the ones opened."""
+
+    def __init__(self, latency: float = 0.0, error_every: int = 0, error_status: int = 503):
+        self.latency = latency
+        self.error_every = error_every
+        self.error_status = error_status
+        self.records: dict[str, dict] = {}
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.server = _Server(('localhost', 0), self._handler())
+        self.url = f'http://localhost:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> 'FakeIndexd':
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        indexd = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # headers and body are separate writes, delayed acks would stall each keep-alive response
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with indexd.lock:
+                    indexd.connections += 1
+
+            def _respond(self, status: int, body: typing.Union[dict, list] = None):
+                data = orjson.dumps({} if body is None else body)
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', '0')
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _error(self) -> bool:
+                """Count the request, answer every error_every-th with an error."""
+                time.sleep(indexd.latency)
+                with indexd.lock:
+                    indexd.requests += 1
+                    if not indexd.error_every or indexd.requests % indexd.error_every:
+                        return False
+                    indexd.errors += 1
+                self._respond(indexd.error_status, {'error': 'injected'})
+                return True
+
+            def _list(self, query: dict) -> list[dict]:
+                """A page of the records with the authz and metadata of the query, in did order after start."""
+                limit = int(query.get('limit', ['100'])[0])
+                start = query.get('start', [''])[0]
+                metadata = dict(_.split(':', 1) for _ in query.get('metadata', []))
+                authz = query.get('authz', [None])[0]
+                with indexd.lock:
+                    dids = sorted(indexd.records)
+                records = (
+                    indexd.records[_] for _ in dids[bisect.bisect_right(dids, start):]
+                    if (not authz or authz in indexd.records[_].get('authz', []))
+                    and all(str((indexd.records[_].get('metadata') or {}).get(k)) == v for k, v in metadata.items())
+                )
+                return list(itertools.islice(records, limit))
+
+            def _did(self) -> str:
+                return urlparse(self.path).path.rstrip('/').split('/')[-1]
+
+            def do_POST(self):
+                body = orjson.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                if self._error():
+                    return
+                if self.path.endswith('bulk/documents'):
+                    return self._respond(200, [indexd.records[_] for _ in body if _ in indexd.records])
+                did = body.get('did') or str(uuid.uuid4())
+                now = datetime.now(timezone.utc).isoformat()
+                with indexd.lock:
+                    if did in indexd.records:
+                        return self._respond(409, {'error': f'{did} already exists'})
+                    indexd.records[did] = {**body, 'did': did, 'rev': uuid.uuid4().hex[:8], 'created_date': now, 'updated_date': now}
+                self._respond(200, {'did': did, 'rev': indexd.records[did]['rev'], 'baseid': did})
+
+            def do_GET(self):
+                if self._error():
+                    return
+                if urlparse(self.path).path.rstrip('/') == '/index':
+                    return self._respond(200, {'records': self._list(parse_qs(urlparse(self.path).query))})
+                record = indexd.records.get(self._did())
+                self._respond(200, record) if record else self._respond(404, {'error': 'no record found'})
+
+            def do_DELETE(self):
+                if self._error():
+                    return
+                with indexd.lock:
+                    record = indexd.records.pop(self._did(), None)
+                self._respond(200) if record else self._respond(404, {'error': 'no record found'})
+
+        return Handler
+
+
+def fake_record(i: int, project: str = 'project', updated_date: str = '2024-04-30T17:46:30.819143+00:00') -> dict:
+    """The i-th indexd record of /programs/test/projects/<project>, its did is derived from i."""
+    return {'did': str(uuid.uuid5(uuid.NAMESPACE_DNS, str(i))), 'rev': '1', 'file_name': f'data/file-{i}.txt', 'urls': [],
+            'authz': [f'/programs/test/projects/{project}'], 'metadata': {}, 'updated_date': updated_date}
+
+
+def fake_dvc_objects(count: int, patients: int = 0) -> list[DVC]:
+    """count committed files with object ids, the i-th one's patient is P<i>, or P<i % patients>."""
+    return [DVC.from_trusted({
+        'meta': {'patient': f'P{i % patients if patients else i}'},
+        'outs': [{
+            'hash': 'md5', 'md5': f'{i:032x}', 'modified': '2024-04-30T17:46:30.819143+00:00',
+            'path': f'data/file-{i}.txt', 'realpath': f'/data/file-{i}.txt', 'size': i,
+            'object_id': f'{i:08x}-0000-0000-0000-000000000000',
+        }]
+    }) for i in range(count)]
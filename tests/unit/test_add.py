@@ -0,0 +1,114 @@
+import os
+import pathlib
+import uuid
+
+from click.testing import CliRunner
+
+from gen3_tracker.git.adder import create_dvcs
+
+
+def test_parallel_create_dvcs_matches_serial(tmp_path: pathlib.Path):
+    """Ensure the process pool produces the same dvc dicts, in the same order, as the serial path."""
+    os.chdir(tmp_path)
+    data_dir = pathlib.Path('my-project-data')
+    data_dir.mkdir()
+    targets = []
+    for i in range(20):
+        _ = data_dir / f'file-{i}.txt'
+        _.write_text(f'hello {i}\n' * i)
+        targets.append(str(_))
+
+    def _jobs():
+        return (({'meta': {'patient': 'P1'}}, _, None) for _ in targets)
+
+    serial = list(create_dvcs(_jobs(), worker_count=1))
+    # several batches through the same pool
+    parallel = list(create_dvcs(_jobs(), worker_count=4, batch_size=7))
+
+    assert [_[0] for _ in parallel] == targets
+    assert serial == parallel
+    assert all(_[2]['outs'][0]['md5'] for _ in parallel)
+
+
+def test_add_from_manifest(tmp_path: pathlib.Path):
+    """Ensure files and urls listed in a manifest are added in one invocation, and staged."""
+    from gen3_tracker.git import run_command, to_dvc
+    from tests import run
+
+    runner = CliRunner()
+    project_id = f"cbds-{uuid.uuid4().hex}"
+    os.chdir(tmp_path)
+    run(runner, ["--debug", "--profile", "local", "init", project_id, "--no-server"], expected_files=[".g3t", ".git"])
+
+    pathlib.Path('my-project-data').mkdir()
+    pathlib.Path('my-project-data/hello.txt').write_text('hello\n')
+    pathlib.Path('my-project-data/world.txt').write_text('world\n')
+    pathlib.Path('manifest.tsv').write_text(
+        "path\turl\tsize\tmodified\tmd5\tpatient\n"
+        "my-project-data/hello.txt\t\t\t\t\tP1\n"
+        "my-project-data/world.txt\t\t\t\t\tP2\n"
+        "\ts3://my-bucket/big.bam\t123\t2024-01-01\tacbd18db4cc2f85cedef654fccc4a4d8\tP3\n"
+    )
+
+    run(runner, ["--debug", "add", "--from-manifest", "manifest.tsv", "--specimen", "S1"],
+        expected_files=["MANIFEST/my-project-data/hello.txt.dvc", "MANIFEST/my-project-data/world.txt.dvc", "MANIFEST/my-bucket/big.bam.dvc"])
+
+    hello = to_dvc('MANIFEST/my-project-data/hello.txt.dvc')
+    assert (hello.meta.patient, hello.meta.specimen) == ('P1', 'S1')
+    big = to_dvc('MANIFEST/my-bucket/big.bam.dvc')
+    assert (big.out.size, big.out.source_url, big.meta.patient) == (123, 's3://my-bucket/big.bam', 'P3')
+
+    staged = run_command('git diff --cached --name-only').stdout.split()
+    assert {'MANIFEST/my-project-data/hello.txt.dvc', 'MANIFEST/my-project-data/world.txt.dvc', 'MANIFEST/my-bucket/big.bam.dvc'} <= set(staged)
+
+    # a url without a hash is reported with its line
+    pathlib.Path('no-hash.tsv').write_text("url\tsize\tmodified\ns3://my-bucket/other.bam\t123\t2024-01-01\n")
+    run(runner, ["add", "--from-manifest", "no-hash.tsv"], expected_output=["no-hash.tsv:1 One of --md5"])
+
+
+def test_add_recursive_resumes_from_checkpoint(tmp_path: pathlib.Path):
+    """Ensure `add <dir>/**` walks the same files as glob, and an interrupted add resumes after the checkpoint."""
+    import glob
+
+    from gen3_tracker.common import state_dir
+    from gen3_tracker.git import run_command
+    from gen3_tracker.git.walker import AddCheckpoint, split_recursive_pattern, walk_files
+    from tests import run
+
+    runner = CliRunner()
+    project_id = f"cbds-{uuid.uuid4().hex}"
+    os.chdir(tmp_path)
+    run(runner, ["--debug", "--profile", "local", "init", project_id, "--no-server"], expected_files=[".g3t", ".git"])
+
+    for _ in ['a/1.txt', 'a/b/2.txt', 'a/b/3.csv', 'a/c/4.txt', 'a/.hidden/5.txt', 'a/6.txt']:
+        pathlib.Path(_).parent.mkdir(parents=True, exist_ok=True)
+        pathlib.Path(_).write_text(_)
+
+    assert split_recursive_pattern('a/**') == ('a', None)
+    assert split_recursive_pattern('a/**/*.txt') == ('a', '*.txt')
+    assert split_recursive_pattern('a/*.txt') is None
+    for pattern in ['a/**', 'a/**/*.txt']:
+        expected = sorted(_ for _ in glob.glob(pattern, recursive=True) if os.path.isfile(_))
+        assert [_.path for _ in walk_files(*split_recursive_pattern(pattern))] == expected
+    assert [_.path for _ in walk_files('a', after='a/b/3.csv')] == ['a/c/4.txt']
+
+    # simulate an add interrupted after a/b/2.txt, walk order is a/1.txt a/6.txt a/b/2.txt a/b/3.csv a/c/4.txt
+    checkpoint = AddCheckpoint.default()
+    assert checkpoint.start('a/**', ['--patient', 'P1']) is None
+    pathlib.Path('MANIFEST/a/1.txt.dvc').parent.mkdir(parents=True)
+    pathlib.Path('MANIFEST/a/1.txt.dvc').write_text('{"outs": [], "meta": {}}\n')
+    checkpoint.record('a/1.txt', pathlib.Path('MANIFEST/a/1.txt.dvc'))
+    checkpoint.record('a/6.txt', pathlib.Path('MANIFEST/a/6.txt.dvc'))
+    checkpoint.record('a/b/2.txt', pathlib.Path('MANIFEST/a/b/2.txt.dvc'))
+    checkpoint.close()
+
+    result = run(runner, ["--debug", "add", "a/**", "--patient", "P1"], expected_files=["MANIFEST/a/b/3.csv.dvc", "MANIFEST/a/c/4.txt.dvc"])
+    assert 'Resuming add of a/**' in result.output
+    # skipped by the resumed walk
+    assert not pathlib.Path('MANIFEST/a/b/2.txt.dvc').exists()
+    assert not pathlib.Path('MANIFEST/a/6.txt.dvc').exists()
+    assert pathlib.Path('MANIFEST/a/1.txt.dvc').read_text().startswith('{')
+    assert not (state_dir() / 'add-checkpoint.ndjson').exists()
+    staged = run_command('git diff --cached --name-only').stdout.split()
+    assert 'MANIFEST/a/1.txt.dvc' in staged
+    assert 'MANIFEST/a/.hidden/5.txt.dvc' not in staged
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import pathlib
+
+import aiohttp
+import pytest
+
+from gen3_tracker.gen3 import async_indexd, indexd
+from gen3_tracker.gen3.async_indexd import AsyncIndexd
+from gen3_tracker.gen3.session import gen3_index
+from gen3_tracker.git import DVC, to_indexd_async
+from tests.fake_indexd import FakeIndexd, fake_dvc_objects
+
+PROJECT_ID = 'test-project'
+
+
+def _to_indexd_async(fake: FakeIndexd, dvc_objects: list[DVC], overwrite: bool = False, on_saved=None) -> list:
+    return to_indexd_async(dvc_objects, auth=None, project_id=PROJECT_ID, bucket_name='test-bucket', overwrite=overwrite,
+                           restricted_project_id=None, concurrency=16, endpoint=fake.url, on_saved=on_saved)
+
+
+def test_async_indexd(tmp_path: pathlib.Path, monkeypatch):
+    """Ensure the asyncio indexd client writes the records the sync client does, retries 5xx, and lists and bulk reads them."""
+    os.chdir(tmp_path)
+    monkeypatch.setattr(indexd, 'BACKOFF', 0.01)
+    monkeypatch.setattr(async_indexd, 'BULK_SIZE', 3)
+    dvc_objects = fake_dvc_objects(40, patients=3)
+
+    with FakeIndexd(error_every=7) as fake:
+        saved = []
+        assert _to_indexd_async(fake, dvc_objects, on_saved=saved.append) == ['OK'] * len(dvc_objects)
+        assert len(saved) == len(dvc_objects)
+        assert fake.errors > 0
+        assert sorted(fake.records) == sorted(_.object_id for _ in dvc_objects)
+        record = fake.records[dvc_objects[1].object_id]
+        assert record['authz'] == ['/programs/test/projects/project']
+        assert record['urls'] == [f's3://test-bucket/{dvc_objects[1].object_id}/data/file-1.txt']
+        assert record['metadata']['patient_identifier'] == 'P1'
+
+        # existing records are replaced
+        revs = {did: _['rev'] for did, _ in fake.records.items()}
+        assert _to_indexd_async(fake, dvc_objects[:10], overwrite=True) == ['OK'] * 10
+        assert all(fake.records[_.object_id]['rev'] != revs[_.object_id] for _ in dvc_objects[:10])
+
+        fake.error_every = 0
+        params = {'authz': '/programs/test/projects/project', 'metadata': {'patient_identifier': 'P1'}}
+        expected = sorted(_.to_json()['did'] for _ in gen3_index(endpoint=fake.url).client.list_with_params(params=params, page_size=5))
+
+        async def _read():
+            async with AsyncIndexd(endpoint=fake.url) as client:
+                listed = [_['did'] async for _ in client.list(params, page_size=5)]
+                return listed, await client.bulk([_.object_id for _ in dvc_objects[:10]] + ['missing'])
+
+        listed, records = asyncio.run(_read())
+        assert listed == expected and len(listed) == 13
+        assert [_['did'] for _ in records] == [_.object_id for _ in dvc_objects[:10]]
+
+        deleted = async_indexd.delete_records(None, [dvc_objects[0].object_id, 'missing'], endpoint=fake.url)
+        assert deleted[0]['did'] == dvc_objects[0].object_id and deleted[1] is None
+        assert dvc_objects[0].object_id not in fake.records
+
+    assert 'retry 1 of' in pathlib.Path('logs/indexd.log').read_text()
+
+    with FakeIndexd(error_every=1, error_status=400) as fake:
+        with pytest.raises(aiohttp.ClientResponseError):
+            _to_indexd_async(fake, dvc_objects[:1])
+        assert fake.requests == 1
@@ -0,0 +1,40 @@
+import os
+import pathlib
+import uuid
+
+from click.testing import CliRunner
+
+from gen3_tracker.git import committed_dvc_data, run_command
+from gen3_tracker.git.compact import CompactManifest
+from tests import run
+
+
+def test_compact_manifest(tmp_path: pathlib.Path):
+    """Ensure the compact manifest has the committed files' columns, and materializes the same DVC objects."""
+    runner = CliRunner()
+    project_id = f"cbds-{uuid.uuid4().hex}"
+    os.chdir(tmp_path)
+    run(runner, ["--debug", "--profile", "local", "init", project_id, "--no-server"], expected_files=[".g3t", ".git"])
+
+    data_dir = pathlib.Path('my-project-data')
+    data_dir.mkdir()
+    for i in range(5):
+        (data_dir / f'file-{i}.txt').write_text(f'hello {i}\n')
+    run(runner, ["--debug", "add", "my-project-data/*", "--patient", "P1"], expected_files=["MANIFEST/my-project-data/file-4.txt.dvc"])
+    run_command('git commit -q -m "add files"')
+
+    committed = CompactManifest.committed(project_id)
+    committed_files, dvc_objects = committed_dvc_data()
+    for _ in dvc_objects:
+        _.project_id = project_id
+    assert len(committed) == 5
+    assert committed.paths == committed_files
+    assert committed.object_ids == [_.object_id for _ in dvc_objects]
+    assert list(committed.sizes) == [_.out.size for _ in dvc_objects]
+    assert committed.modified == [_.out.modified for _ in dvc_objects]
+    record = committed.record(2)
+    assert (record.data_path, record.hash_type, record.hash_value) == ('my-project-data/file-2.txt', 'md5', dvc_objects[2].out.md5)
+    assert record.meta == {'patient': 'P1'}
+
+    assert committed.materialize([3, 1]) == [dvc_objects[3], dvc_objects[1]]
+    assert committed.materialize() == dvc_objects
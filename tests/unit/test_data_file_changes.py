@@ -0,0 +1,64 @@
+import os
+import pathlib
+import uuid
+
+from click.testing import CliRunner
+
+from gen3_tracker.git import calculate_hash, data_file_changes, to_dvc
+from tests import run
+
+
+def test_data_file_changes_update(tmp_path: pathlib.Path):
+    """Ensure changed data files are reported once, re-hashed concurrently on update, and missing files ignored."""
+    runner = CliRunner()
+    project_id = f"cbds-{uuid.uuid4().hex}"
+    os.chdir(tmp_path)
+    run(runner, ["--debug", "--profile", "local", "init", project_id, "--no-server"], expected_files=[".g3t", ".git"])
+
+    data_dir = pathlib.Path('my-project-data')
+    data_dir.mkdir()
+    for i in range(10):
+        (data_dir / f'file-{i}.txt').write_text(f'hello {i}\n')
+    run(runner, ["--debug", "add", "my-project-data/*"], expected_files=["MANIFEST/my-project-data/file-9.txt.dvc"])
+    assert data_file_changes(pathlib.Path('MANIFEST')) == []
+
+    # created and added a while ago
+    for _ in data_dir.glob('*.txt'):
+        os.utime(_, (_.stat().st_atime - 200, _.stat().st_mtime - 200))
+    for _ in pathlib.Path('MANIFEST/my-project-data').glob('*.dvc'):
+        os.utime(_, (_.stat().st_atime - 100, _.stat().st_mtime - 100))
+    for i in [1, 3, 5]:
+        (data_dir / f'file-{i}.txt').write_text(f'changed {i}\n')
+    (data_dir / 'file-9.txt').unlink()
+
+    changes = data_file_changes(pathlib.Path('MANIFEST'), update=True, worker_count=4, hash_worker_count=2)
+    assert [_.dvc_path.name for _ in changes] == ['file-1.txt.dvc', 'file-3.txt.dvc', 'file-5.txt.dvc']
+    for i in [1, 3, 5]:
+        dvc = to_dvc(f'MANIFEST/my-project-data/file-{i}.txt.dvc')
+        assert dvc.out.md5 == calculate_hash('md5', data_dir / f'file-{i}.txt')
+        assert dvc.out.size == len(f'changed {i}\n')
+    assert data_file_changes(pathlib.Path('MANIFEST')) == []
+
+
+def test_add_update_all_digests(tmp_path: pathlib.Path):
+    """Ensure add --update re-calculates every digest of a changed file, not only the primary hash."""
+    runner = CliRunner()
+    project_id = f"cbds-{uuid.uuid4().hex}"
+    os.chdir(tmp_path)
+    run(runner, ["--debug", "--profile", "local", "init", project_id, "--no-server"], expected_files=[".g3t", ".git"])
+
+    data_file = pathlib.Path('my-project-data/file.txt')
+    data_file.parent.mkdir()
+    data_file.write_text('hello\n')
+    run(runner, ["--debug", "add", str(data_file), "--digests", "md5,sha256"], expected_files=["MANIFEST/my-project-data/file.txt.dvc"])
+    dvc_path = pathlib.Path('MANIFEST/my-project-data/file.txt.dvc')
+    assert to_dvc(dvc_path).out.sha256 == calculate_hash('sha256', data_file)
+
+    # added a while ago, then changed
+    os.utime(dvc_path, (dvc_path.stat().st_atime - 100, dvc_path.stat().st_mtime - 100))
+    data_file.write_text('changed\n')
+    run(runner, ["--debug", "add", "--update"], expected_output=["Updated 1 data files."])
+    dvc = to_dvc(dvc_path)
+    assert dvc.out.hash == 'md5'
+    assert dvc.out.md5 == calculate_hash('md5', data_file)
+    assert dvc.out.sha256 == calculate_hash('sha256', data_file)
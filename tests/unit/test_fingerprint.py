@@ -0,0 +1,64 @@
+import os
+import pathlib
+import uuid
+
+from click.testing import CliRunner
+
+from gen3_tracker.git import calculate_hash, complete_pending_hashes, data_file_changes, to_dvc
+from gen3_tracker.git.hasher import Fingerprint, fingerprint, fingerprint_changed
+from tests import run
+
+KiB = 1024
+
+
+def test_fingerprint(tmp_path: pathlib.Path):
+    """Ensure a touch is not a change, while a different size or sampled content is."""
+    data_file = tmp_path / 'big.bam'
+    data_file.write_bytes(os.urandom(64 * KiB))
+    value = str(fingerprint(data_file, sample_size=4 * KiB))
+    assert Fingerprint.parse(value).size == 64 * KiB
+    assert not fingerprint_changed(value, data_file)
+
+    os.utime(data_file, ns=(0, 1))
+    assert not fingerprint_changed(value, data_file)
+
+    with open(data_file, 'r+b') as f:
+        f.seek(32 * KiB - 2 * KiB)
+        f.write(b'changed')
+    assert fingerprint_changed(value, data_file)
+
+    data_file.write_bytes(os.urandom(65 * KiB))
+    assert fingerprint_changed(value, data_file)
+
+
+def test_add_fingerprint_defers_hash(tmp_path: pathlib.Path):
+    """Ensure `add --fingerprint` skips the full hash of large files, status detects changes, the hash is completed later."""
+    runner = CliRunner()
+    project_id = f"cbds-{uuid.uuid4().hex}"
+    os.chdir(tmp_path)
+    run(runner, ["--debug", "--profile", "local", "init", project_id, "--no-server"], expected_files=[".g3t", ".git"])
+
+    pathlib.Path('my-project-data').mkdir()
+    big = pathlib.Path('my-project-data/big.bam')
+    big.write_bytes(os.urandom(4 * 1024 * KiB))
+    small = pathlib.Path('my-project-data/small.txt')
+    small.write_text('small\n')
+    run(runner, ["--debug", "add", "my-project-data/*", "--fingerprint", "1"], expected_files=["MANIFEST/my-project-data/big.bam.dvc"])
+
+    dvc = to_dvc('MANIFEST/my-project-data/big.bam.dvc')
+    assert dvc.out.hash_pending and dvc.out.fingerprint
+    assert not to_dvc('MANIFEST/my-project-data/small.txt.dvc').out.hash_pending
+
+    # a touch is not a change, new content is
+    os.utime(big, ns=(big.stat().st_atime_ns, big.stat().st_mtime_ns + 10 ** 10))
+    assert not data_file_changes(pathlib.Path('MANIFEST'))
+    with open(big, 'r+b') as f:
+        f.write(b'changed')
+    assert len(data_file_changes(pathlib.Path('MANIFEST'))) == 1
+    assert data_file_changes(pathlib.Path('MANIFEST'), update=True)
+    assert not data_file_changes(pathlib.Path('MANIFEST'))
+    dvc = to_dvc('MANIFEST/my-project-data/big.bam.dvc')
+    assert dvc.out.hash_pending
+
+    assert complete_pending_hashes([dvc]) == [dvc]
+    assert dvc.out.md5 == calculate_hash('md5', big)
@@ -0,0 +1,46 @@
+import os
+import pathlib
+import uuid
+
+from click.testing import CliRunner
+
+from gen3_tracker.git import committed_dvc_data, run_command
+from gen3_tracker.git.objects import GitObjectReader
+from tests import run
+
+
+def test_committed_dvc_data(tmp_path: pathlib.Path):
+    """Ensure committed content is read from git objects, by one cat-file process, regardless of the working tree."""
+    runner = CliRunner()
+    project_id = f"cbds-{uuid.uuid4().hex}"
+    os.chdir(tmp_path)
+    run(runner, ["--debug", "--profile", "local", "init", project_id, "--no-server"], expected_files=[".g3t", ".git"])
+
+    data_dir = pathlib.Path('my-project-data')
+    data_dir.mkdir()
+    for i in range(5):
+        (data_dir / f'file-{i}.txt').write_text(f'hello {i}\n')
+    run(runner, ["--debug", "add", "my-project-data/*"], expected_files=["MANIFEST/my-project-data/file-4.txt.dvc"])
+    run_command('git commit -q -m "add files"')
+
+    with GitObjectReader() as reader:
+        assert reader.read('HEAD:MANIFEST/my-project-data/file-1.txt.dvc') is not None
+        assert reader.read('HEAD:MANIFEST/missing.dvc') is None
+        assert reader.read('HEAD:MANIFEST/a missing file.dvc') is None
+        names = [f'HEAD:MANIFEST/my-project-data/file-{i}.txt.dvc' for i in range(5)] + ['HEAD:MANIFEST/missing.dvc']
+        contents = dict(reader.read_many(names))
+        assert contents['HEAD:MANIFEST/missing.dvc'] is None
+        assert b'file-3.txt' in contents['HEAD:MANIFEST/my-project-data/file-3.txt.dvc']
+        # stop early, the stream stays in sync
+        for _ in reader.read_many(names):
+            break
+        assert reader.read('HEAD:MANIFEST/my-project-data/file-0.txt.dvc') == contents['HEAD:MANIFEST/my-project-data/file-0.txt.dvc']
+
+    # uncommitted changes and deletions are ignored
+    (data_dir / 'file-1.txt').write_text('changed 1\n')
+    run(runner, ["--debug", "add", "my-project-data/file-1.txt"])
+    pathlib.Path('MANIFEST/my-project-data/file-2.txt.dvc').unlink()
+    for _ in range(2):
+        committed_files, dvc_objects = committed_dvc_data()
+        assert committed_files == [f'MANIFEST/my-project-data/file-{i}.txt.dvc' for i in range(5)]
+        assert [_.out.size for _ in dvc_objects] == [len(f'hello {i}\n') for i in range(5)]
@@ -0,0 +1,32 @@
+import os
+import pathlib
+
+from gen3_tracker.git import calculate_hash
+from gen3_tracker.git.hasher import HashCache
+
+
+def test_hash_cache(tmp_path: pathlib.Path):
+    """Ensure unchanged files are served from the cache, changed files are re-hashed, stale entries evicted."""
+    data_file = tmp_path / 'hello.txt'
+    data_file.write_text('hello\n')
+
+    with HashCache(tmp_path / 'hash-cache.sqlite') as hash_cache:
+        assert hash_cache.hash('md5', data_file) == calculate_hash('md5', data_file)
+        assert hash_cache.hash('md5', data_file) == calculate_hash('md5', data_file)
+        assert (hash_cache.hits, hash_cache.misses) == (1, 1)
+
+        # change the content, the key changes
+        data_file.write_text('hello world\n')
+        os.utime(data_file, ns=(0, 1))
+        assert hash_cache.hash('md5', data_file) == calculate_hash('md5', data_file)
+
+        info = hash_cache.info()
+        assert info['entries'] == 2
+        assert (info['hits'], info['misses']) == (1, 2)
+
+        assert hash_cache.compact() == 1
+        assert hash_cache.info()['entries'] == 1
+
+        data_file.unlink()
+        assert hash_cache.compact() == 1
+        assert hash_cache.info()['entries'] == 0
@@ -33,3 +33,38 @@ def test_valid_hash_values():
         print(_)
         item = DVCItem(**_)
         print(item)
+
+
+def test_calculate_hashes_single_read(tmp_path):
+    """Ensure all digests are calculated from one read, and match their reference implementations."""
+    import hashlib
+    import zlib
+    from gen3_tracker.git.hasher import calculate_hashes
+
+    data = b'0123456789' * 1000
+    data_file = tmp_path / 'data.bin'
+    data_file.write_bytes(data)
+
+    hashes = calculate_hashes(ACCEPTABLE_HASHES.keys(), data_file, etag_part_size=4096)
+    for hash_type in ['md5', 'sha1', 'sha256', 'sha512']:
+        assert hashes[hash_type] == hashlib.new(hash_type, data).hexdigest()
+    assert hashes['crc'] == f"{zlib.crc32(data):08x}"
+    parts = [hashlib.md5(data[i:i + 4096]).digest() for i in range(0, len(data), 4096)]
+    assert hashes['etag'] == f"{hashlib.md5(b''.join(parts)).hexdigest()}-3"
+    for hash_type, hash_value in hashes.items():
+        assert ACCEPTABLE_HASHES[hash_type](hash_value), f'Invalid {hash_type} {hash_value}'
+
+    # a file that fits in a single part has the md5 as its etag
+    assert calculate_hashes(['etag'], data_file)['etag'] == hashes['md5']
+
+
+def test_read_ahead_matches_serial_reads(tmp_path):
+    """Ensure the read-ahead pipeline yields the same digests as plain reads, across buffer and part boundaries."""
+    from gen3_tracker.git.hasher import calculate_hashes
+
+    data_file = tmp_path / 'data.bin'
+    data_file.write_bytes(bytes(range(256)) * 1001)
+    hash_types = ['md5', 'sha256', 'crc', 'etag']
+    expected = calculate_hashes(hash_types, data_file, etag_part_size=5000, read_ahead=False)
+    for buffer_size in [1000, 4096, 7777]:
+        assert calculate_hashes(hash_types, data_file, etag_part_size=5000, buffer_size=buffer_size, read_ahead=True) == expected
@@ -0,0 +1,65 @@
+import pathlib
+
+import pytest
+import requests
+
+from gen3_tracker.gen3.session import gen3_index
+from gen3_tracker.git import indexd_mirror
+from gen3_tracker.git.indexd_mirror import IndexdMirror
+from tests.fake_indexd import FakeIndexd, fake_record
+
+PROJECT_ID = 'test-project'
+
+
+def test_indexd_mirror(tmp_path: pathlib.Path, monkeypatch):
+    """Ensure the mirror is replaced by a sync, and only the refreshed dids are re-read."""
+    monkeypatch.setattr(indexd_mirror, 'BATCH_SIZE', 7)
+    with FakeIndexd() as fake, IndexdMirror(tmp_path / 'indexd.sqlite') as mirror:
+        fake.records = {_['did']: _ for _ in map(fake_record, range(20))}
+        index_client = gen3_index(endpoint=fake.url)
+
+        assert mirror.state(PROJECT_ID) is None
+        assert not mirror.synced(PROJECT_ID)
+        assert mirror.sync(PROJECT_ID, index_client=index_client) == 20
+        assert mirror.synced(PROJECT_ID) and not mirror.synced(PROJECT_ID, max_age_ns=0)
+        assert [_['did'] for _ in mirror.records(PROJECT_ID)] == sorted(fake.records)
+        assert mirror.dids(PROJECT_ID) == {did: _['updated_date'] for did, _ in fake.records.items()}
+        assert mirror.state(PROJECT_ID)['synced_ns']
+
+        # an update, a new record and a removed one, only the refreshed dids are read
+        updated, added, removed = fake_record(1, updated_date='2025-01-01T00:00:00+00:00'), fake_record(20), fake_record(2)
+        fake.records.update({updated['did']: updated, added['did']: added})
+        del fake.records[removed['did']]
+        request_count = fake.requests
+        assert mirror.refresh(PROJECT_ID, [updated['did'], added['did'], removed['did']], index_client=index_client) == 2
+        assert fake.requests - request_count == 1
+        # no dids, nothing to read, e.g. an incremental push that only deleted files
+        assert mirror.refresh(PROJECT_ID, [], index_client=index_client) == 0
+        assert fake.requests - request_count == 1
+        assert mirror.dids(PROJECT_ID, [updated['did'], added['did'], removed['did'], fake_record(3)['did']]) == {
+            updated['did']: updated['updated_date'], added['did']: added['updated_date'], fake_record(3)['did']: fake_record(3)['updated_date']
+        }
+
+        # records removed from the server behind the mirror's back are forgotten by the next sync
+        del fake.records[fake_record(3)['did']]
+        assert mirror.sync(PROJECT_ID, index_client=index_client) == 19
+        assert mirror.dids(PROJECT_ID) == {did: _['updated_date'] for did, _ in fake.records.items()}
+
+        # a failed sync or refresh leaves the mirror as it was
+        expected = mirror.dids(PROJECT_ID)
+        del fake.records[fake_record(4)['did']]
+        fake.error_every, fake.error_status = 2, 400
+        with pytest.raises(requests.exceptions.HTTPError):
+            mirror.sync(PROJECT_ID, index_client=index_client)
+        fake.error_every = 1
+        with pytest.raises(requests.exceptions.HTTPError):
+            mirror.refresh(PROJECT_ID, list(expected), index_client=index_client)
+        assert mirror.dids(PROJECT_ID) == expected
+        fake.error_every = 0
+        fake.records[fake_record(4)['did']] = fake_record(4)
+
+        mirror.remove([updated['did']])
+        assert updated['did'] not in mirror.dids(PROJECT_ID)
+        assert mirror.info()['projects'][PROJECT_ID]['records'] == 18
+        assert mirror.clear() == 18
+        assert mirror.state(PROJECT_ID) is None
@@ -0,0 +1,66 @@
+import os
+import pathlib
+import random
+import time
+
+import pytest
+import requests
+
+from gen3_tracker.gen3 import indexd
+from gen3_tracker.gen3.session import gen3_index
+from gen3_tracker.git import DVC, ordered_map, to_indexd
+from tests.fake_indexd import FakeIndexd, fake_dvc_objects
+
+PROJECT_ID = 'test-project'
+
+
+def _to_indexd(fake: FakeIndexd, dvc_objects: list[DVC], overwrite: bool = False, worker_count: int = 4) -> list:
+    return list(to_indexd(dvc_objects, auth=None, project_id=PROJECT_ID, bucket_name='test-bucket', overwrite=overwrite,
+                          restricted_project_id=None, worker_count=worker_count, index_client=gen3_index(endpoint=fake.url)))
+
+
+def test_ordered_map():
+    """Ensure results are yielded in order, whatever order the calls complete in."""
+    def _slow(i):
+        time.sleep(random.uniform(0, 0.01))
+        return i * 2
+
+    assert list(ordered_map(_slow, range(50), worker_count=8)) == [i * 2 for i in range(50)]
+    assert list(ordered_map(_slow, range(5), worker_count=1)) == [0, 2, 4, 6, 8]
+
+
+def test_indexd_writer(tmp_path: pathlib.Path, monkeypatch):
+    """Ensure concurrent indexing retries 5xx and 429 responses, logs to logs/indexd.log, and does not retry other errors."""
+    os.chdir(tmp_path)
+    monkeypatch.setattr(indexd, 'BACKOFF', 0.01)
+    dvc_objects = fake_dvc_objects(40)
+
+    with FakeIndexd(error_every=7) as fake:
+        assert _to_indexd(fake, dvc_objects) == ['OK'] * len(dvc_objects)
+        assert fake.errors > 0
+        assert sorted(fake.records) == sorted(_.object_id for _ in dvc_objects)
+        record = fake.records[dvc_objects[1].object_id]
+        assert record['authz'] == ['/programs/test/projects/project']
+        assert record['urls'] == [f's3://test-bucket/{dvc_objects[1].object_id}/data/file-1.txt']
+
+        # existing records are replaced
+        revs = {did: _['rev'] for did, _ in fake.records.items()}
+        assert _to_indexd(fake, dvc_objects[:10], overwrite=True) == ['OK'] * 10
+        assert all(fake.records[_.object_id]['rev'] != revs[_.object_id] for _ in dvc_objects[:10])
+
+    assert 'retry 1 of' in pathlib.Path('logs/indexd.log').read_text()
+
+    with FakeIndexd(error_every=3, error_status=429) as fake:
+        assert _to_indexd(fake, dvc_objects[:10], worker_count=1) == ['OK'] * 10
+        assert fake.errors > 0 and len(fake.records) == 10
+
+        # deleted, retried, missing records are not an error
+        index_client = gen3_index(endpoint=fake.url)
+        for _ in dvc_objects[:3] + dvc_objects[:1]:
+            indexd.delete_indexd(index_client, _.object_id)
+        assert sorted(fake.records) == sorted(_.object_id for _ in dvc_objects[3:10])
+
+    with FakeIndexd(error_every=1, error_status=400) as fake:
+        with pytest.raises(requests.exceptions.HTTPError):
+            _to_indexd(fake, dvc_objects[:1])
+        assert fake.requests == 1
@@ -0,0 +1,39 @@
+import time
+
+import pytest
+
+from gen3_tracker.gen3 import async_indexd
+from gen3_tracker.gen3.session import gen3_index
+from gen3_tracker.git.cloner import iter_records
+from tests.fake_indexd import FakeIndexd, fake_record
+
+
+@pytest.mark.parametrize('count', [95, 100, 0])
+def test_iter_records(count: int, monkeypatch):
+    """Ensure a project's records are read a page at a time, in order, with a bounded read ahead."""
+    monkeypatch.setattr(async_indexd, 'BULK_SIZE', 7)
+    with FakeIndexd() as fake:
+        fake.records = {_['did']: _ for _ in [fake_record(i) for i in range(count)] + [fake_record(i, 'other') for i in range(count, count + 5)]}
+        index_client = gen3_index(endpoint=fake.url)
+
+        records = list(iter_records(project_id='test-project', page_size=10, prefetch=3, index_client=index_client))
+        # in did order, read by 3 cursors over the did keyspace
+        assert [_['did'] for _ in records] == sorted(fake_record(i)['did'] for i in range(count))
+        assert all(_['metadata']['project_id'] == 'test-project' for _ in records)
+
+        dids = [fake_record(i)['did'] for i in reversed(range(count))]
+        assert [_['did'] for _ in iter_records(object_ids=dids, prefetch=3, index_client=index_client)] == dids
+
+        # the asyncio path reads the same records, none for no object_ids, not the whole index
+        records = list(iter_records(project_id='test-project', page_size=10, use_async=True, index_client=index_client))
+        assert sorted(_['did'] for _ in records) == sorted(fake_record(i)['did'] for i in range(count))
+        assert [_['did'] for _ in iter_records(object_ids=dids, use_async=True, index_client=index_client)] == dids
+
+        if count:
+            # each cursor holds at most 2 queued pages and 1 waiting to be queued, plus the page being consumed
+            requests = fake.requests
+            records = iter_records(project_id='test-project', page_size=10, prefetch=3, index_client=index_client)
+            next(records)
+            time.sleep(0.5)
+            records.close()
+            assert fake.requests - requests <= 3 * (2 + 1) + 1
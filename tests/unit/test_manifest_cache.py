@@ -0,0 +1,48 @@
+import os
+import pathlib
+
+from gen3_tracker.git.manifest_cache import ManifestCache
+from gen3_tracker.git.serializer import dump_dvc, load_dvc
+
+
+def _write(tmp_path: pathlib.Path, data_path: str, patient: str, md5: str) -> pathlib.Path:
+    dvc_path = tmp_path / 'MANIFEST' / f'{data_path}.dvc'
+    dvc_path.parent.mkdir(parents=True, exist_ok=True)
+    dump_dvc({
+        'meta': {'patient': patient},
+        'outs': [{'hash': 'md5', 'md5': md5, 'modified': '2024-04-30T17:46:30.819143+00:00', 'path': data_path, 'size': 6,
+                  'object_id': f'{md5[:8]}-0000-0000-0000-000000000000'}]
+    }, dvc_path)
+    # old enough to be trusted
+    os.utime(dvc_path, ns=(0, 10 ** 18))
+    return dvc_path
+
+
+def test_manifest_cache(tmp_path: pathlib.Path):
+    """Ensure only changed files are parsed, and files can be found by object_id, hash and meta identifiers."""
+    os.chdir(tmp_path)
+    a = _write(tmp_path, 'data/a.txt', 'P1', 'a' * 32)
+    _write(tmp_path, 'data/b.txt', 'P1', 'b' * 32)
+    _write(tmp_path, 'data/c.txt', 'P2', 'c' * 32)
+
+    with ManifestCache(tmp_path / 'manifest.sqlite') as manifest_cache:
+        assert manifest_cache.refresh() == 3
+        assert manifest_cache.refresh() == 0
+        assert [_.out.path for _ in manifest_cache.load(['MANIFEST/data/c.txt.dvc', 'MANIFEST/data/a.txt.dvc'])] == ['data/c.txt', 'data/a.txt']
+        assert manifest_cache.parsed == 3
+
+        assert [path for path, _ in manifest_cache.find(patient='P1')] == ['MANIFEST/data/a.txt.dvc', 'MANIFEST/data/b.txt.dvc']
+        assert [dvc.out.path for _, dvc in manifest_cache.find(hash_value='c' * 32)] == ['data/c.txt']
+        assert [dvc.out.path for _, dvc in manifest_cache.find(object_id='bbbbbbbb-0000-0000-0000-000000000000')] == ['data/b.txt']
+        assert manifest_cache.find(patient='P1', hash_value='c' * 32) == []
+
+        # changed and removed files
+        yaml_data = load_dvc(a)
+        yaml_data['meta']['patient'] = 'P3'
+        dump_dvc(yaml_data, a)
+        os.utime(a, ns=(0, 10 ** 18 + 1))
+        (tmp_path / 'MANIFEST/data/b.txt.dvc').unlink()
+        assert manifest_cache.refresh() == 1
+        assert [dvc.out.path for _, dvc in manifest_cache.find(patient='P3')] == ['data/a.txt']
+        assert manifest_cache.find(patient='P1') == []
+        assert manifest_cache.info()['entries'] == 2
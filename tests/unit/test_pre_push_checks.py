@@ -0,0 +1,44 @@
+import os
+import pathlib
+import uuid
+
+import pytest
+from click.testing import CliRunner
+
+from gen3_tracker.git import run_command
+from gen3_tracker.git.cli import pre_push_checks
+from tests import run
+
+
+def test_pre_push_checks(tmp_path: pathlib.Path):
+    """Ensure push checks status and META in process, and returns the committed manifest it read."""
+    runner = CliRunner()
+    project_id = f"cbds-{uuid.uuid4().hex}"
+    os.chdir(tmp_path)
+    run(runner, ["--debug", "--profile", "local", "init", project_id, "--no-server"], expected_files=[".g3t", ".git"])
+
+    data_dir = pathlib.Path('my-project-data')
+    data_dir.mkdir()
+    for i in range(3):
+        (data_dir / f'file-{i}.txt').write_text(f'hello {i}\n')
+    run(runner, ["--debug", "add", "my-project-data/*"], expected_files=["MANIFEST/my-project-data/file-2.txt.dvc"])
+    run(runner, ["--debug", "meta", "init"], expected_files=["META/DocumentReference.ndjson"])
+    run_command('git add META && git commit -q -m "add files"')
+
+    checked = pre_push_checks(project_id)
+    assert checked.manifest.paths == [f'MANIFEST/my-project-data/file-{i}.txt.dvc' for i in range(3)]
+    assert all(_.project_id == project_id for _ in checked.manifest.materialize())
+    assert checked.validation and not checked.validation.exceptions
+    assert pre_push_checks(project_id, skip_validate=True).validation is None
+
+    # a data file changed after it was added
+    _ = data_dir / 'file-1.txt'
+    _.write_text('changed 1\n')
+    os.utime(_, (_.stat().st_atime + 10, _.stat().st_mtime + 10))
+    with pytest.raises(AssertionError, match='data files that you need to update'):
+        pre_push_checks(project_id)
+
+    # uncommitted changes
+    run(runner, ["--debug", "add", "my-project-data/file-1.txt"])
+    with pytest.raises(AssertionError, match='Uncommitted changes'):
+        pre_push_checks(project_id)
@@ -0,0 +1,60 @@
+import os
+import pathlib
+import subprocess
+import sys
+
+import orjson
+import pytest
+
+from gen3_tracker.git import process, run_command
+
+
+def test_process(tmp_path: pathlib.Path, monkeypatch):
+    """Ensure commands run without a shell, stream their output, and are recorded in the command log."""
+    os.chdir(tmp_path)
+    log_path = tmp_path / 'commands.ndjson'
+    monkeypatch.setenv(process.COMMAND_LOG_ENV, str(log_path))
+
+    assert process.to_argv('git commit -m "a message"') == (['git', 'commit', '-m', 'a message'], False)
+    assert process.to_argv('git ls-files | wc -l') == ('git ls-files | wc -l', True)
+    assert process.to_argv('  ') == ('  ', True)
+
+    # arguments are passed literally
+    result = run_command(['echo', 'a && b; $HOME'])
+    assert result.stdout == 'a && b; $HOME\n'
+    assert run_command('echo one && echo two').stdout == 'one\ntwo\n'
+
+    assert list(process.stream(['printf', 'a\\0b\\0\\0c'], separator=b'\0')) == [b'a', b'b', b'', b'c']
+    lines = process.stream(['seq', '1000000'])
+    assert next(lines) == b'1'
+    lines.close()
+    with pytest.raises(subprocess.CalledProcessError):
+        list(process.stream(['git', 'rev-parse', '--verify', '-q', 'no-such-ref']))
+
+    records = [orjson.loads(_) for _ in log_path.read_bytes().splitlines()]
+    assert [_['program'] for _ in records] == ['echo', 'echo', 'printf', 'seq', 'git']
+    assert records[0]['stdout_bytes'] == len('a && b; $HOME\n')
+    assert [_['shell'] for _ in records] == [False, True, False, False, False]
+    assert records[2]['streamed'] and records[2]['return_code'] == 0
+    assert records[4]['return_code'] != 0
+    assert all(_['elapsed'] >= 0 for _ in records)
+
+    summary = process.summarize(log_path)
+    assert summary['echo']['count'] == 2
+    assert summary['git']['failures'] == 1
+
+    # the log can be disabled
+    monkeypatch.setenv(process.COMMAND_LOG_ENV, '')
+    run_command(['true'])
+    assert len(log_path.read_bytes().splitlines()) == len(records)
+
+
+def test_stream_large_stderr(monkeypatch):
+    """Ensure a command writing more than a pipe buffer to stderr before its stdout does not block the stream."""
+    monkeypatch.setenv(process.COMMAND_LOG_ENV, '')
+    script = "import sys; sys.stderr.write('w' * 1024 * 1024); sys.stdout.write('a\\nb\\n'); sys.exit(1)"
+    records = []
+    with pytest.raises(subprocess.CalledProcessError) as e:
+        records.extend(process.stream([sys.executable, '-c', script]))
+    assert records == [b'a', b'b']
+    assert len(e.value.stderr) == 1024 * 1024
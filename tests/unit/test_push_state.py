@@ -0,0 +1,60 @@
+import os
+import pathlib
+import uuid
+
+from click.testing import CliRunner
+
+from gen3_tracker.git import run_command
+from gen3_tracker.git.cli import pre_push_checks
+from gen3_tracker.git.compact import CompactManifest
+from gen3_tracker.git.push_state import changed_since_push, load_push_state, save_push_state
+from gen3_tracker.git.status import head_commit
+from tests import run
+
+
+def test_changed_since_push(tmp_path: pathlib.Path):
+    """Ensure an incremental push sees exactly the .dvc files added, modified and deleted since the last push."""
+    runner = CliRunner()
+    project_id = f"cbds-{uuid.uuid4().hex}"
+    os.chdir(tmp_path)
+    run(runner, ["--debug", "--profile", "local", "init", project_id, "--no-server"], expected_files=[".g3t", ".git"])
+
+    data_dir = pathlib.Path('my-project-data')
+    data_dir.mkdir()
+    for i in range(5):
+        (data_dir / f'file-{i}.txt').write_text(f'hello {i}\n')
+    run(runner, ["--debug", "add", "my-project-data/*"], expected_files=["MANIFEST/my-project-data/file-4.txt.dvc"])
+    run_command('git commit -q -m "add files"')
+
+    # never pushed
+    assert changed_since_push(project_id) is None
+    save_push_state(project_id, head_commit(), incremental=False)
+    assert load_push_state()['reconciled_ns']
+    assert changed_since_push(project_id).changed == []
+    assert changed_since_push('another-project') is None
+
+    (data_dir / 'file-5.txt').write_text('hello 5\n')
+    (data_dir / 'file-1.txt').write_text('changed 1\n')
+    run(runner, ["--debug", "add", "my-project-data/file-5.txt"])
+    run(runner, ["--debug", "add", "my-project-data/file-1.txt"])
+    run_command(['git', 'rm', '-q', 'MANIFEST/my-project-data/file-2.txt.dvc'])
+    run(runner, ["--debug", "meta", "init"], expected_files=["META/DocumentReference.ndjson"])
+    run_command('git add META && git commit -q -m "change files"')
+
+    diff = changed_since_push(project_id)
+    assert diff.head == head_commit()
+    assert [path for path, _ in diff.changed] == ['MANIFEST/my-project-data/file-1.txt.dvc', 'MANIFEST/my-project-data/file-5.txt.dvc']
+    assert [path for path, _ in diff.deleted] == ['MANIFEST/my-project-data/file-2.txt.dvc']
+    # the deleted file's object_id, from its content at the last push
+    deleted = CompactManifest.from_objects(project_id, diff.deleted)
+    assert deleted.data_paths == ['my-project-data/file-2.txt']
+
+    checked = pre_push_checks(project_id, skip_validate=True, incremental=True)
+    assert checked.diff == diff
+    assert checked.manifest.data_paths == ['my-project-data/file-1.txt', 'my-project-data/file-5.txt']
+    assert len(pre_push_checks(project_id, skip_validate=True).manifest) == 5
+
+    # the last push is not in the history
+    run_command('git reset -q --hard HEAD~1')
+    save_push_state(project_id, diff.head, incremental=True)
+    assert changed_since_push(project_id) is None
@@ -1,4 +1,8 @@
-from gen3_tracker.git import to_dvc, DVCItem
+import yaml
+
+from gen3_tracker.common import parse_iso_tz_date
+from gen3_tracker.git import to_dvc, DVC, DVCItem
+from gen3_tracker.git.serializer import dump_dvc, dumps_dvc, load_dvc, loads_dvc
 from pathlib import Path
 
 
@@ -15,3 +19,36 @@ def test_read_dvc_item():
     item = DVCItem(**_)
     assert item
     assert item.hash == 'md5'
+
+
+def test_dvc_serializer_forms(data_path: Path, tmp_path: Path):
+    """Ensure the yaml and compact forms round trip, are readable by a plain yaml reader, and existing files keep their form."""
+    yaml_data = load_dvc(data_path / 'hello.txt.dvc')
+    assert yaml_data == yaml.safe_load((data_path / 'hello.txt.dvc').read_text())
+
+    compact = dumps_dvc(yaml_data, compact=True)
+    assert compact.count(b'\n') == 1
+    assert loads_dvc(compact) == yaml_data
+    assert yaml.safe_load(compact) == yaml_data
+    assert loads_dvc(dumps_dvc(yaml_data)) == yaml_data
+
+    dvc_path = dump_dvc(yaml_data, tmp_path / 'hello.txt.dvc', compact=True)
+    yaml_data['meta']['patient'] = 'P2'
+    dump_dvc(yaml_data, dvc_path)
+    assert dvc_path.read_bytes().startswith(b'{')
+    assert to_dvc(dvc_path).meta.patient == 'P2'
+
+
+def test_dvc_from_trusted(data_path: Path):
+    """Ensure trusted construction matches validation, and dates are canonicalized either way."""
+    yaml_data = load_dvc(data_path / 'hello.txt.dvc')
+    assert DVC.from_trusted(yaml_data) == DVC.model_validate(yaml_data)
+
+    yaml_data['outs'][0]['modified'] = '2024-04-30T17:46:30.819143'
+    dvc = DVC.from_trusted(yaml_data)
+    assert dvc == DVC.model_validate(yaml_data)
+    assert dvc.out.modified == '2024-04-30T17:46:30.819143+00:00'
+    assert dvc.meta.patient == yaml_data['meta']['patient']
+
+    assert parse_iso_tz_date('2024-04-30T17:46:30Z') == '2024-04-30T17:46:30+00:00'
+    assert parse_iso_tz_date('April 30 2024 17:46') == '2024-04-30T17:46:00+00:00'
@@ -0,0 +1,58 @@
+import os
+import pathlib
+
+from gen3_tracker.gen3 import session as gen3_session
+from gen3_tracker.gen3.session import curl, gen3_index, session
+from gen3_tracker.git import to_indexd
+from tests.fake_indexd import FakeIndexd, fake_dvc_objects
+
+
+class _Auth:
+    """Stands in for Gen3Auth, see curl."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.calls = 0
+
+    def __call__(self, request):
+        self.calls += 1
+        request.headers['Authorization'] = 'bearer test'
+        return request
+
+
+def test_session(tmp_path: pathlib.Path, monkeypatch):
+    """Ensure gen3 clients share a session whose pool grows on demand and keeps connections alive."""
+    os.chdir(tmp_path)
+    monkeypatch.setenv(gen3_session.POOL_SIZE_ENV, '2')
+    gen3_session.close_session()
+
+    assert session() is session()
+    assert session().get_adapter('https://example.org')._pool_maxsize == 2
+    assert session(min_pool_size=8).get_adapter('https://example.org')._pool_maxsize == 8
+    assert session(min_pool_size=4).get_adapter('https://example.org')._pool_maxsize == 8
+
+    with FakeIndexd() as fake:
+        auth = _Auth(fake.url)
+        for _ in range(20):
+            assert curl(auth, 'index/missing').status_code == 404
+        assert auth.calls == 20
+        assert fake.connections == 1
+
+        # a larger pool replaces the adapter, the replaced one's connections are closed
+        adapter = session().get_adapter(fake.url)
+        assert adapter.poolmanager.pools
+        session(min_pool_size=16)
+        assert not adapter.poolmanager.pools
+        assert curl(auth, 'index/missing').status_code == 404
+        assert fake.connections == 2
+
+    dvc_objects = fake_dvc_objects(50)
+    with FakeIndexd(latency=0.001) as fake:
+        _ = to_indexd(dvc_objects, auth=None, project_id='test-project', bucket_name='test-bucket', overwrite=False,
+                      restricted_project_id=None, worker_count=4, index_client=gen3_index(endpoint=fake.url))
+        assert len(list(_)) == len(dvc_objects)
+        # each record is a create and a read, over at most one connection per worker
+        assert fake.requests == 2 * len(dvc_objects)
+        assert fake.connections <= 4
+
+    gen3_session.close_session()
@@ -0,0 +1,56 @@
+import os
+import pathlib
+import uuid
+
+from click.testing import CliRunner
+
+from gen3_tracker.git import run_command
+from gen3_tracker.git.status import scan_status
+from tests import run
+
+
+def test_status_incremental(tmp_path: pathlib.Path):
+    """Ensure incremental scans only inspect changed .dvc files, and still report outstanding changes."""
+    runner = CliRunner()
+    project_id = f"cbds-{uuid.uuid4().hex}"
+    os.chdir(tmp_path)
+    run(runner, ["--debug", "--profile", "local", "init", project_id, "--no-server"], expected_files=[".g3t", ".git"])
+
+    data_dir = pathlib.Path('my-project-data')
+    data_dir.mkdir()
+    for i in range(10):
+        (data_dir / f'file-{i}.txt').write_text(f'hello {i}\n')
+    run(runner, ["--debug", "add", "my-project-data/*"], expected_files=["MANIFEST/my-project-data/file-9.txt.dvc"])
+    run_command('git commit -q -m "add files"')
+    # created and added a while ago
+    for _ in data_dir.glob('*.txt'):
+        os.utime(_, (_.stat().st_atime - 200, _.stat().st_mtime - 200))
+    for _ in pathlib.Path('MANIFEST/my-project-data').glob('*.dvc'):
+        os.utime(_, (_.stat().st_atime - 100, _.stat().st_mtime - 100))
+
+    (data_dir / 'file-1.txt').write_text('changed 1\n')
+    snapshot = scan_status()
+    assert not snapshot.incremental
+    assert snapshot.dvc_count == 10
+    assert [_.dvc_path.name for _ in snapshot.changes] == ['file-1.txt.dvc']
+    assert snapshot.document_reference_out_of_date
+
+    # nothing changed since the last run: the outstanding change is still reported
+    snapshot = scan_status(incremental=True)
+    assert snapshot.incremental
+    assert snapshot.dvc_count < 10
+    assert [_.dvc_path.name for _ in snapshot.changes] == ['file-1.txt.dvc']
+
+    # a new file, since HEAD
+    (data_dir / 'file-10.txt').write_text('hello 10\n')
+    run(runner, ["--debug", "add", "my-project-data/file-10.txt"], expected_files=["MANIFEST/my-project-data/file-10.txt.dvc"])
+    snapshot = scan_status(since='HEAD', save=False)
+    assert snapshot.latest_file == 'MANIFEST/my-project-data/file-10.txt.dvc'
+    snapshot = scan_status(incremental=True)
+    assert snapshot.latest_file == 'MANIFEST/my-project-data/file-10.txt.dvc'
+
+    # fixed
+    run(runner, ["--debug", "add", "my-project-data/file-1.txt"])
+    snapshot = scan_status(incremental=True)
+    assert snapshot.changes == []
+    assert scan_status().changes == []
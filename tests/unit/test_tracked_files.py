@@ -0,0 +1,49 @@
+import os
+import pathlib
+
+from gen3_tracker.git import git_add, run_command
+from gen3_tracker.git.tracker import TrackedFiles
+
+
+def test_tracked_files(tmp_path: pathlib.Path):
+    """Ensure the index lists committed and staged MANIFEST files, and is invalidated by git changes."""
+    os.chdir(tmp_path)
+    run_command('git init -q')
+    run_command('git config user.email "test@example.com" && git config user.name "test"')
+    cache_path = tmp_path / 'tracked-files.json'
+
+    # no commits yet
+    assert TrackedFiles(cache_path).committed() == []
+
+    (tmp_path / 'MANIFEST').mkdir()
+    (tmp_path / 'MANIFEST/a.txt.dvc').write_text('a')
+    (tmp_path / 'README.md').write_text('readme')
+    run_command('git add MANIFEST/a.txt.dvc README.md && git commit -q -m a')
+    assert TrackedFiles(cache_path).committed() == ['MANIFEST/a.txt.dvc']
+    assert cache_path.is_file()
+
+    (tmp_path / 'MANIFEST/b.txt.dvc').write_text('b')
+    run_command('git add MANIFEST/b.txt.dvc')
+    tracked_files = TrackedFiles(cache_path)
+    assert tracked_files.committed() == ['MANIFEST/a.txt.dvc']
+    assert sorted(tracked_files.staged()) == ['MANIFEST/a.txt.dvc', 'MANIFEST/b.txt.dvc']
+
+    # removed files are no longer tracked
+    run_command('git commit -q -m b && git rm -q MANIFEST/a.txt.dvc && git commit -q -m rm')
+    assert TrackedFiles(cache_path).committed() == ['MANIFEST/b.txt.dvc']
+
+
+def test_git_add_literal_paths(tmp_path: pathlib.Path):
+    """Ensure paths are staged in one call, literally, including names with spaces and glob characters."""
+    os.chdir(tmp_path)
+    run_command('git init -q')
+    (tmp_path / 'MANIFEST').mkdir()
+    names = ['MANIFEST/a b.dvc', 'MANIFEST/[c].dvc', 'MANIFEST/c.dvc', 'MANIFEST/d*.dvc']
+    for _ in names:
+        (tmp_path / _).write_text(_)
+    assert git_add([names[0], names[1], names[0], names[3]]) == 3
+    assert sorted(TrackedFiles().staged()) == sorted([names[0], names[1], names[3]])
+    assert git_add([]) == 0
+    # directories are expanded, ./ prefixes normalized
+    assert git_add(['./MANIFEST']) == 1
+    assert len(TrackedFiles().staged()) == 4
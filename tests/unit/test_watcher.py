@@ -0,0 +1,62 @@
+import os
+import pathlib
+import uuid
+
+from click.testing import CliRunner
+
+from gen3_tracker.git import run_command
+from gen3_tracker.git.status import scan_status
+from gen3_tracker.git.watcher import DirtySet, ProjectWatcher
+from tests import run
+
+
+def test_watcher_dirty_set(tmp_path: pathlib.Path):
+    """Ensure a polling watcher records changed data, MANIFEST and META files, and status only inspects those."""
+    runner = CliRunner()
+    project_id = f"cbds-{uuid.uuid4().hex}"
+    os.chdir(tmp_path)
+    run(runner, ["--debug", "--profile", "local", "init", project_id, "--no-server"], expected_files=[".g3t", ".git"])
+
+    data_dir = pathlib.Path('my-project-data')
+    data_dir.mkdir()
+    for i in range(10):
+        (data_dir / f'file-{i}.txt').write_text(f'hello {i}\n')
+    run(runner, ["--debug", "add", "my-project-data/*"], expected_files=["MANIFEST/my-project-data/file-9.txt.dvc"])
+    run_command('git commit -q -m "add files"')
+    # created and added a while ago
+    for _ in data_dir.glob('*.txt'):
+        os.utime(_, (_.stat().st_atime - 200, _.stat().st_mtime - 200))
+    for _ in pathlib.Path('MANIFEST/my-project-data').glob('*.dvc'):
+        os.utime(_, (_.stat().st_atime - 100, _.stat().st_mtime - 100))
+
+    dirty_set = DirtySet.default()
+    with dirty_set:
+        watcher = ProjectWatcher(dirty_set)
+        watcher.load()
+        assert len(watcher.data_paths) == 10
+        assert watcher.poll() == 0
+        dirty_set.register(os.getpid(), 'polling', 1)
+
+        # the baseline
+        assert not scan_status().watched
+
+        (data_dir / 'file-1.txt').write_text('changed 1\n')
+        pathlib.Path('META/DocumentReference.ndjson').write_text('{}\n')
+        assert watcher.poll() == 2
+        assert dirty_set.paths() == ['MANIFEST/my-project-data/file-1.txt.dvc']
+        assert dirty_set.paths(['meta']) == ['META/DocumentReference.ndjson']
+
+        snapshot = scan_status()
+        assert snapshot.watched
+        assert snapshot.dvc_count < 10
+        assert [_.dvc_path.name for _ in snapshot.changes] == ['file-1.txt.dvc']
+        assert dirty_set.paths() == []
+
+        run(runner, ["--debug", "add", "--update"])
+        assert watcher.poll() == 1
+        assert dirty_set.paths() == ['MANIFEST/my-project-data/file-1.txt.dvc']
+        assert scan_status().changes == []
+
+        dirty_set.unregister(os.getpid())
+        assert dirty_set.watcher() is None
+        assert not scan_status().watched